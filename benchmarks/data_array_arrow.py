@@ -0,0 +1,78 @@
+"""Benchmark writing and reading a DataArray as parquet
+
+Compares :py:meth:`smif.data_layer.data_array.DataArray.to_arrow` and
+:py:meth:`~smif.data_layer.data_array.DataArray.from_arrow` with converting through a
+MultiIndexed pandas.DataFrame, as earlier versions of smif did, for hourly data for 1,000
+regions over a year.
+
+Run with::
+
+    python benchmarks/data_array_arrow.py
+"""
+import os
+import tempfile
+import timeit
+import tracemalloc
+
+import numpy as np
+import pandas
+import pyarrow as pa
+import pyarrow.parquet as pq
+from smif.data_layer.data_array import DataArray
+from smif.metadata import Spec
+
+
+def write_via_df(path, data_array):
+    pq.write_table(pa.Table.from_pandas(data_array.as_df()), path)
+
+
+def read_via_df(path, spec):
+    return DataArray.from_df(spec, pandas.read_parquet(path, engine='pyarrow'))
+
+
+def write_arrow(path, data_array):
+    pq.write_table(data_array.to_arrow(), path)
+
+
+def read_arrow(path, spec):
+    return DataArray.from_arrow(spec, pq.read_table(path))
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2 ** 20
+
+
+def main(repeat=3):
+    spec = Spec(
+        name='demand',
+        dims=['lad', 'hour'],
+        coords={
+            'lad': ['E{:08d}'.format(i) for i in range(1000)],
+            'hour': list(range(8760))
+        },
+        dtype='float'
+    )
+    data_array = DataArray(spec, np.random.rand(*spec.shape))
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'demand.parquet')
+        cases = (
+            ('write', lambda: write_arrow(path, data_array),
+             lambda: write_via_df(path, data_array)),
+            ('read', lambda: read_arrow(path, spec), lambda: read_via_df(path, spec)),
+        )
+        for label, fast_fn, slow_fn in cases:
+            fast = min(timeit.repeat(fast_fn, number=1, repeat=repeat))
+            slow = min(timeit.repeat(slow_fn, number=1, repeat=repeat))
+            print("{} ({:,} cells): arrow {:.2f}s {:.0f}MiB, via DataFrame {:.2f}s {:.0f}MiB"
+                  .format(label, data_array.data.size, fast, peak_memory(fast_fn), slow,
+                          peak_memory(slow_fn)))
+        assert read_arrow(path, spec) == data_array
+
+
+if __name__ == '__main__':
+    main()
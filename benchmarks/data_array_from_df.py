@@ -0,0 +1,57 @@
+"""Benchmark creating a DataArray from a pandas.DataFrame
+
+Compares :py:meth:`smif.data_layer.data_array.DataArray.from_df` with converting through
+xarray, as earlier versions of smif did, for arrays of about a million cells - for example
+hourly data for 120 regions over a year.
+
+Run with::
+
+    python benchmarks/data_array_from_df.py
+"""
+import timeit
+
+import numpy as np
+from smif.data_layer.data_array import DataArray, _reindex_xr_data_array
+from smif.metadata import Spec
+
+
+def via_xarray(spec, dataframe):
+    if dataframe.index.names == [None]:
+        dataframe = dataframe.set_index(spec.dims)
+    xr_data_array = dataframe.to_xarray()[spec.name]
+    xr_data_array = _reindex_xr_data_array(spec, xr_data_array)
+    return DataArray(spec, xr_data_array.data)
+
+
+def main(repeat=3):
+    spec = Spec(
+        name='demand',
+        dims=['lad', 'hour'],
+        coords={
+            'lad': ['E{:08d}'.format(i) for i in range(120)],
+            'hour': list(range(8760))
+        },
+        dtype='float'
+    )
+    data = np.random.rand(*spec.shape)
+    full = DataArray(spec, data).as_df()
+    # shuffled rows with a few missing, as might be read from file
+    partial = full.sample(frac=0.99, random_state=0)
+
+    cases = (
+        ('full', full),
+        ('shuffled, 1% missing', partial),
+        ('unindexed', full.reset_index())
+    )
+    for label, dataframe in cases:
+        assert DataArray.from_df(spec, dataframe) == via_xarray(spec, dataframe)
+        fast = min(timeit.repeat(
+            lambda: DataArray.from_df(spec, dataframe), number=1, repeat=repeat))
+        slow = min(timeit.repeat(
+            lambda: via_xarray(spec, dataframe), number=1, repeat=repeat))
+        print("{} ({:,} cells): from_df {:.3f}s, via xarray {:.3f}s, {:.1f}x faster".format(
+            label, len(dataframe), fast, slow, slow / fast))
+
+
+if __name__ == '__main__':
+    main()
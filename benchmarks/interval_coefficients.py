@@ -0,0 +1,46 @@
+"""Benchmark loading interval sets and generating interval conversion coefficients
+
+Times loading a set of hourly intervals over a year, then compares
+:py:meth:`smif.convert.interval.IntervalSet.get_proportions`, which finds the proportions for
+all pairs of intervals at once, with finding the proportion for each intersecting pair of
+intervals in turn, as earlier versions of smif did, for hourly intervals over a year converted
+to hourly intervals over a year.
+
+Run with::
+
+    python benchmarks/interval_coefficients.py
+"""
+import timeit
+
+from smif.convert.interval import IntervalSet
+from smif.convert.register import NDimensionalRegister, build_coefficients
+
+
+def hourly_set(name):
+    return IntervalSet(name, [
+        {'name': str(hour), 'interval': [('PT{}H'.format(hour), 'PT{}H'.format(hour + 1))]}
+        for hour in range(8760)
+    ])
+
+
+def main():
+    print("load 8760 intervals: {:.2f}s".format(
+        timeit.timeit(lambda: hourly_set('hourly'), number=1)))
+
+    from_set = hourly_set('hourly')
+    to_set = hourly_set('hourly_copy')
+    register = NDimensionalRegister()
+    shape = (len(from_set), len(to_set))
+
+    def vectorised():
+        return build_coefficients(*from_set.get_proportions(to_set), shape)
+
+    def pairwise():
+        return build_coefficients(*register._get_pairwise_proportions(from_set, to_set), shape)
+
+    print("all pairs at once: {:.2f}s".format(timeit.timeit(vectorised, number=1)))
+    print("pair by pair:      {:.2f}s".format(timeit.timeit(pairwise, number=1)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark generating region conversion coefficients
+
+Compares :py:meth:`smif.convert.region.RegionSet.get_proportions`, which finds the
+proportions for all intersecting pairs of regions at once, with finding the proportion for
+each intersecting pair of regions in turn, as earlier versions of smif did, for a grid of
+10,000 squares converted to an offset grid of 40,000 smaller squares.
+
+Run with::
+
+    python benchmarks/region_coefficients.py
+"""
+import timeit
+
+from smif.convert.region import RegionSet
+from smif.convert.register import NDimensionalRegister
+
+
+def grid(name, size, cell, offset=0.0):
+    elements = []
+    for i in range(size):
+        for j in range(size):
+            x, y = i * cell + offset, j * cell + offset
+            elements.append({'feature': {
+                'type': 'Feature',
+                'properties': {'name': '{}_{}'.format(i, j)},
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [[
+                        [x, y], [x, y + cell], [x + cell, y + cell], [x + cell, y]
+                    ]]
+                }
+            }})
+    return RegionSet(name, elements)
+
+
+def main():
+    from_set = grid('coarse', 100, 1.0)
+    to_set = grid('fine', 200, 0.5, offset=0.1)
+    register = NDimensionalRegister()
+
+    def all_pairs():
+        return from_set.get_proportions(to_set)
+
+    def pairwise():
+        return register._get_pairwise_proportions(from_set, to_set)
+
+    print("all pairs at once: {:.2f}s".format(timeit.timeit(all_pairs, number=1)))
+    print("pair by pair:      {:.2f}s".format(timeit.timeit(pairwise, number=1)))
+
+
+if __name__ == '__main__':
+    main()
@@ -47,7 +47,7 @@ if [[ "$DISTRIB" == "conda" ]]; then
         xarray \
         pandas \
         psycopg2 \
-        pyarrow \
+        scipy \
         shapely \
         fiona
 
@@ -55,6 +55,9 @@ if [[ "$DISTRIB" == "conda" ]]; then
 fi
 
 pip install 'flake8>=3.7'
+# pyarrow>=2.0 is needed to filter parquet row groups on read, and 2.0 is the last release
+# with wheels for Python 3.5
+pip install 'pyarrow>=2.0'
 
 if [[ "$PYTHON_VERSION" == "3.5" ]]; then
     pip install 'Pint==0.9'
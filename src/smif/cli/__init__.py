@@ -8,6 +8,8 @@ This command line interface implements a number of methods.
         of systems model
 - `validate` performs a validation check of the configuration file
 - `app` runs the graphical user interface, opening in a web browser
+- `serve-jobs` runs a model run, publishing each job for `worker` processes, which
+        may run on other machines with access to the same project folder
 
 Folder structure
 ----------------
@@ -79,10 +81,13 @@ import smif.cli.log
 from smif.controller import (copy_project_folder, execute_decision_step,
                              execute_model_before_step, execute_model_run,
                              execute_model_step)
+from smif.controller.job import DistributedJobScheduler, run_worker
 from smif.controller.run import DAFNIRunScheduler, SubProcessRunScheduler
 from smif.data_layer import Store
 from smif.data_layer.file import (CSVDataStore, FileMetadataStore,
-                                  ParquetDataStore, YamlConfigStore)
+                                  NpyDataStore, ParquetDataStore,
+                                  YamlConfigStore, partition_parquet_by_timestep)
+from smif.data_layer.sqlite_interface import SqliteDataStore
 from smif.http_api import create_app
 
 try:
@@ -271,6 +276,24 @@ def csv2parquet(args):
                 continue
 
 
+def prepare_partition(args):
+    """Rewrite Parquet scenario and narrative data with one row group per timestep, so that
+    single timesteps can be read without reading whole files. Pass a filename or a directory
+    to search recursively, by default the project data folder.
+    """
+    path = args.path or os.path.join(args.directory, 'data')
+    if path.endswith(".parquet"):
+        files = [path]
+    else:
+        files = glob.glob(os.path.join(path, '**', '*.parquet'), recursive=True)
+
+    for parquet_path in sorted(files):
+        if partition_parquet_by_timestep(parquet_path):
+            print("Partitioned", parquet_path, flush=True)
+        else:
+            print("Skipping", parquet_path, "(no timestep column)")
+
+
 def prepare_scenario(args):
     """Update scenario configuration file to include multiple scenario variants.
 
@@ -373,8 +396,15 @@ def run(args):
     else:
         model_run_ids = [args.modelrun]
 
+    if args.runtime_history is None:
+        runtime_history = os.path.join(args.directory, 'results', 'job_runtimes.json')
+    else:
+        runtime_history = args.runtime_history
+
     store = _get_store(args)
-    execute_model_run(model_run_ids, store, args.warm, args.dry_run)
+    _configure_run_store(store, args)
+    execute_model_run(model_run_ids, store, args.warm, args.dry_run, args.workers,
+                      args.cache_models, runtime_history, args.jobs)
 
     try:
         logger.profiling_stop('run_model_runs', msg)
@@ -384,6 +414,65 @@ def run(args):
         logger.info('STOP run_model_runs %s', msg)
 
 
+def serve_jobs(args):
+    """Run the model runs as requested, publishing jobs to run for `smif worker` processes
+
+    Parameters
+    ----------
+    args
+    """
+    if args.batchfile:
+        with open(args.modelrun, 'r') as f:
+            model_run_ids = f.read().splitlines()
+    else:
+        model_run_ids = [args.modelrun]
+
+    if args.runtime_history is None:
+        runtime_history = os.path.join(args.directory, 'results', 'job_runtimes.json')
+    else:
+        runtime_history = args.runtime_history
+
+    store = _get_store(args)
+    job_scheduler = DistributedJobScheduler(
+        store, (args.host, args.port), _get_authkey(args), args.heartbeat_timeout,
+        runtime_history)
+    print("Waiting for workers on {}:{}".format(*job_scheduler.address), flush=True)
+    if _get_authkey(args) is None:
+        print("Workers must connect with --authkey {}".format(
+            job_scheduler.authkey.decode()), flush=True)
+    execute_model_run(model_run_ids, store, args.warm, job_scheduler=job_scheduler)
+
+
+def worker(args):
+    """Run jobs published by `smif serve-jobs` until it is finished
+
+    Parameters
+    ----------
+    args
+    """
+    store = _get_store(args)
+    run_worker(store, (args.host, args.port), _get_authkey(args), args.cache_models)
+
+
+def _get_authkey(args):
+    if args.authkey is not None:
+        return args.authkey.encode()
+    if 'SMIF_AUTHKEY' in os.environ:
+        return os.environ['SMIF_AUTHKEY'].encode()
+    return None
+
+
+def _configure_run_store(store, args):
+    """Set store caches and results writers as configured by `smif run` arguments
+    """
+    if args.data_cache_size is not None:
+        store.data_cache.max_bytes = args.data_cache_size * 1024 * 1024
+    if args.coefficient_cache_size is not None:
+        store.coefficient_cache.max_bytes = args.coefficient_cache_size * 1024 * 1024
+    if args.results_writers is not None:
+        store.results_writer.max_workers = args.results_writers
+
+
 def _get_store(args):
     """Contruct store as configured by arguments
     """
@@ -401,6 +490,20 @@ def _get_store(args):
             data_store=ParquetDataStore(args.directory),
             model_base_folder=args.directory
         )
+    elif args.interface == 'local_npy':
+        store = Store(
+            config_store=YamlConfigStore(args.directory),
+            metadata_store=FileMetadataStore(args.directory),
+            data_store=NpyDataStore(args.directory),
+            model_base_folder=args.directory
+        )
+    elif args.interface == 'local_sqlite':
+        store = Store(
+            config_store=YamlConfigStore(args.directory),
+            metadata_store=FileMetadataStore(args.directory),
+            data_store=SqliteDataStore(os.path.join(args.directory, 'data', 'smif.sqlite')),
+            model_base_folder=args.directory
+        )
     else:
         raise ValueError("Store interface type {} not recognised.".format(args.interface))
     return store
@@ -413,7 +516,7 @@ def _run_server(args):
         raise ValueError(msg.format(args.scheduler, args.interface))
 
     if args.scheduler == 'default':
-        model_scheduler = SubProcessRunScheduler()
+        model_scheduler = SubProcessRunScheduler(args.max_runs)
     elif args.scheduler == 'dafni':
         model_scheduler = DAFNIRunScheduler(args.username, args.password)
     else:
@@ -490,7 +593,8 @@ def parse_arguments():
                                     'progress, -vv to see debug messages.')
     parent_parser.add_argument('-i', '--interface',
                                default='local_csv',
-                               choices=['local_csv', 'local_binary'],
+                               choices=['local_csv', 'local_binary', 'local_npy',
+                                        'local_sqlite'],
                                help="Select the data interface (default: %(default)s)")
     parent_parser.add_argument('-d', '--directory',
                                default='.',
@@ -539,6 +643,14 @@ def parse_arguments():
         '-nc', '--noclobber',
         help='Do not convert existing data files', action='store_true')
 
+    parser_prepare_partition = subparsers.add_parser(
+        'prepare-partition', help='Partition Parquet data by timestep, for faster reads ' +
+        'of single timesteps', parents=[parent_parser])
+    parser_prepare_partition.set_defaults(func=prepare_partition)
+    parser_prepare_partition.add_argument(
+        'path', nargs='?',
+        help='Path to file, or directory to search recursively (default: project data folder)')
+
     parser_prepare_scenario = subparsers.add_parser(
         'prepare-scenario', help='Prepare scenario configuration file with multiple variants',
         parents=[parent_parser])
@@ -585,6 +697,11 @@ def parse_arguments():
                             default='default',
                             choices=['default', 'dafni'],
                             help="The module scheduling implementation to use")
+    parser_app.add_argument('--max-runs',
+                            type=int,
+                            default=1,
+                            help="The number of model runs to run at once, \
+                                  others are queued (default scheduler only)")
     parser_app.add_argument('-u', '--username',
                             help="The username for logging in to the dafni JobSubmissionAPI, \
                                   only needed with the dafni job scheduler")
@@ -609,6 +726,83 @@ def parse_arguments():
     parser_run.add_argument('-n', '--dry-run',
                             action='store_true',
                             help="Do not execute individual models, print steps instead")
+    parser_run.add_argument('--workers',
+                            type=int,
+                            help="Run independent model steps concurrently, using this \
+                                  number of worker processes")
+    parser_run.add_argument('--cache-models',
+                            action='store_true',
+                            help="With --workers, keep worker processes and loaded models \
+                                  between steps instead of loading models for each step")
+    parser_run.add_argument('--data-cache-size',
+                            type=int,
+                            help="Memory in MiB to use for keeping scenario and narrative \
+                                  data after reading, in each process (default: 256)")
+    parser_run.add_argument('--coefficient-cache-size',
+                            type=int,
+                            help="Memory in MiB to use for keeping conversion coefficients \
+                                  after reading, in each process (default: 512)")
+    parser_run.add_argument('--results-writers',
+                            type=int,
+                            help="Number of threads writing results in the background, in \
+                                  each process, so models do not wait for results to be \
+                                  written (default: 0, write results before continuing)")
+    parser_run.add_argument('--runtime-history',
+                            help="With --workers, file in which to record job runtimes, used \
+                                  to run jobs on the critical path first in later runs \
+                                  (default: results/job_runtimes.json)")
+    parser_run.add_argument('-j', '--jobs',
+                            type=int,
+                            help="With --batchfile, run this number of model runs \
+                                  concurrently in separate processes")
+
+    # DISTRIBUTED RUN
+    distributed_parser = ArgumentParser(add_help=False)
+    distributed_parser.add_argument('--host',
+                                    default='localhost',
+                                    help="The host on which the coordinator listens")
+    distributed_parser.add_argument('--port',
+                                    type=int,
+                                    default=6360,
+                                    help="The port on which the coordinator listens")
+    distributed_parser.add_argument('--authkey',
+                                    help="The key shared by the coordinator and workers \
+                                          (default: SMIF_AUTHKEY environment variable). \
+                                          Required by workers, and by the coordinator \
+                                          unless listening on a loopback address, where \
+                                          a random key is generated")
+
+    parser_serve_jobs = subparsers.add_parser(
+        'serve-jobs', help='Run a model run, publishing jobs for workers to run',
+        parents=[parent_parser, distributed_parser])
+    parser_serve_jobs.set_defaults(func=serve_jobs)
+    parser_serve_jobs.add_argument('modelrun',
+                                   help="Name of the model run to run")
+    parser_serve_jobs.add_argument('-w', '--warm',
+                                   action='store_true',
+                                   help="Use intermediate results from the last modelrun \
+                                         and continue from where it had left")
+    parser_serve_jobs.add_argument('-b', '--batchfile',
+                                   action='store_true',
+                                   help="Use a batchfile instead of a modelrun name (a \
+                                         list of modelrun names)")
+    parser_serve_jobs.add_argument('--heartbeat-timeout',
+                                   type=float,
+                                   default=60,
+                                   help="Seconds after which to give a job to another worker, \
+                                         if its worker has not been heard from")
+    parser_serve_jobs.add_argument('--runtime-history',
+                                   help="File in which to record job runtimes, used to \
+                                         publish jobs on the critical path first \
+                                         (default: results/job_runtimes.json)")
+
+    parser_worker = subparsers.add_parser(
+        'worker', help='Run jobs published by smif serve-jobs',
+        parents=[parent_parser, distributed_parser])
+    parser_worker.set_defaults(func=worker)
+    parser_worker.add_argument('--cache-models',
+                               action='store_true',
+                               help="Keep loaded models between jobs")
 
     # BEFORE RUN
     parser_before_step = subparsers.add_parser(
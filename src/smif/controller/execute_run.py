@@ -1,50 +1,228 @@
 """Execute a model run - discover and schedule all steps in order
 """
 import logging
+import multiprocessing
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 from smif.controller.build import build_model_run, get_model_run_definition
-from smif.controller.job import SerialJobScheduler
-from smif.exception import SmifModelRunError
+from smif.controller.execute_step import _get_model_and_handle
+from smif.controller.job import ParallelJobScheduler, SerialJobScheduler
+from smif.convert.adaptor import Adaptor
+from smif.exception import SmifDataError, SmifModelRunError
 
 
-def execute_model_run(model_run_ids, store, warm=False, dry=False):
+def execute_model_run(model_run_ids, store, warm=False, dry=False, workers=None,
+                      cache_models=False, runtime_history=None, jobs=None,
+                      job_scheduler=None):
     """Runs the model run
 
     Parameters
     ----------
     modelrun_ids: list
-        Modelrun ids that should be executed sequentially
+        Modelrun ids that should be executed
+    store: ~smif.data_layer.store.Store
+    warm: bool, default=False
+        Continue from results of a previous, incomplete run
+    dry: bool, default=False
+        Print the steps of each model run without running them
+    workers: int, optional
+        If set, run independent jobs in a model run concurrently using this number of worker
+        processes, otherwise run each job in series
+    cache_models: bool, default=False
+        If running jobs in worker processes, keep the workers and their loaded models between
+        steps
+    runtime_history: str, optional
+        If running jobs in worker processes, path to a file in which to record job runtimes and
+        from which to read the runtimes of previous runs, to prioritise jobs on the critical
+        path
+    jobs: int, optional
+        If set, run up to this number of model runs concurrently in separate processes,
+        otherwise run model runs sequentially
+    job_scheduler: optional
+        Job scheduler to run each model run, for example a
+        :class:`~smif.controller.job.DistributedJobScheduler`, instead of one chosen using
+        `workers`. The job scheduler is shut down once all model runs are complete.
     """
     model_run_definitions = []
     for model_run in model_run_ids:
         logging.info("Getting model run definition for '%s'", model_run)
         model_run_definitions.append(get_model_run_definition(store, model_run))
 
-    logging.debug("Initialising the job scheduler")
-    job_scheduler = SerialJobScheduler(store=store)
+    if job_scheduler is None and jobs is not None and not dry and len(model_run_ids) > 1:
+        _execute_concurrent_model_runs(
+            model_run_definitions, store, warm, workers, cache_models, runtime_history, jobs)
+        return
 
-    for model_run_config in model_run_definitions:
+    if job_scheduler is None:
+        logging.debug("Initialising the job scheduler")
+        job_scheduler = _get_job_scheduler(store, workers, cache_models, runtime_history)
 
-        logging.info("Build model run from configuration data")
-        modelrun = build_model_run(model_run_config)
+    try:
+        for model_run_config in model_run_definitions:
+            try:
+                _run_model_run(model_run_config, store, job_scheduler, warm, dry)
+            except SmifModelRunError as ex:
+                logging.exception(ex)
+                sys.exit(1)
+    finally:
+        job_scheduler.shutdown()
 
-        logging.info("Running model run %s", modelrun.name)
 
-        if dry:
-            print("Dry run, stepping through model run without execution:")
-            print("    smif decide {}".format(modelrun.name))
+def _get_job_scheduler(store, workers, cache_models, runtime_history):
+    if workers is None:
+        return SerialJobScheduler(store=store)
+    return ParallelJobScheduler(
+        store=store, max_workers=workers, cache_models=cache_models,
+        runtime_history=runtime_history)
 
-        try:
-            if warm:
-                modelrun.run(store, job_scheduler, store.prepare_warm_start(modelrun.name),
-                             dry_run=dry)
-            else:
-                modelrun.run(store, job_scheduler, dry_run=dry)
-        except SmifModelRunError as ex:
-            logging.exception(ex)
-            sys.exit(1)
 
-        if not dry:
-            print("Model run '%s' complete" % modelrun.name)
-        sys.stdout.flush()
+def _run_model_run(model_run_config, store, job_scheduler, warm, dry):
+    logging.info("Build model run from configuration data")
+    modelrun = build_model_run(model_run_config)
+
+    logging.info("Running model run %s", modelrun.name)
+
+    if dry:
+        print("Dry run, stepping through model run without execution:")
+        print("    smif decide {}".format(modelrun.name))
+
+    if warm:
+        modelrun.run(store, job_scheduler, store.prepare_warm_start(modelrun.name),
+                     dry_run=dry)
+    else:
+        modelrun.run(store, job_scheduler, dry_run=dry)
+
+    logging.info("Data cache: %s hits, %s misses", store.data_cache.hits,
+                 store.data_cache.misses)
+    logging.info("Coefficient cache: %s hits, %s misses", store.coefficient_cache.hits,
+                 store.coefficient_cache.misses)
+    if not dry:
+        print("Model run '%s' complete" % modelrun.name)
+    sys.stdout.flush()
+
+
+def _execute_concurrent_model_runs(model_run_definitions, store, warm, workers, cache_models,
+                                   runtime_history, jobs):
+    """Run model runs in a pool of processes, then print a summary of each model run
+
+    Where processes are started by forking, the scenario data, narrative data and conversion
+    coefficients of all the model runs are first read into the caches of `store`, so that the
+    processes share one copy of the cached (read-only) arrays rather than each reading its
+    own. Otherwise each process starts with empty caches. Each process keeps the first store
+    it is sent for later model runs.
+    """
+    global _SHARED_CACHES
+    if jobs < 1:
+        raise ValueError("Expected at least one job, got {}".format(jobs))
+
+    model_run_ids = [config['name'] for config in model_run_definitions]
+    if multiprocessing.get_start_method() == 'fork':
+        for model_run_config in model_run_definitions:
+            _warm_caches(store, model_run_config)
+        # inherited by the processes forked when the pool starts
+        _SHARED_CACHES = (store.data_cache, store.coefficient_cache)
+
+    summary = {}
+    try:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(_execute_model_run_in_process, store, model_run_id, warm,
+                                workers, cache_models, runtime_history): model_run_id
+                for model_run_id in model_run_ids
+            }
+            for future in as_completed(futures):
+                model_run_id = futures[future]
+                try:
+                    seconds = future.result()
+                except Exception as ex:
+                    logging.error("Model run '%s' failed: %s", model_run_id, ex)
+                    summary[model_run_id] = ('failed', None, str(ex))
+                else:
+                    summary[model_run_id] = ('complete', seconds, '')
+    finally:
+        _SHARED_CACHES = None
+
+    print("Model run summary:")
+    width = max(len(model_run_id) for model_run_id in model_run_ids)
+    for model_run_id in model_run_ids:
+        status, seconds, message = summary[model_run_id]
+        duration = '' if seconds is None else '{:.1f}s'.format(seconds)
+        print("    {}  {:8}  {:>8}  {}".format(
+            model_run_id.ljust(width), status, duration, message).rstrip())
+    sys.stdout.flush()
+
+    if any(status == 'failed' for status, _, _ in summary.values()):
+        sys.exit(1)
+
+
+def _warm_caches(store, model_run_config):
+    """Read the scenario data, narrative data and conversion coefficients used by a model run
+    into the caches of `store`, generating any missing coefficients
+    """
+    logging.info("Reading data for %s into caches", model_run_config['name'])
+    for scenario_name, variant_name in model_run_config['scenarios'].items():
+        for output in store.read_scenario(scenario_name)['provides']:
+            for timestep in model_run_config['timesteps']:
+                try:
+                    store.read_scenario_variant_data(
+                        scenario_name, variant_name, output['name'], timestep)
+                except SmifDataError:
+                    # not every output has data for every timestep - models which need
+                    # missing data fail when run
+                    pass
+
+    for sector_model in model_run_config['sos_model'].sector_models:
+        # setting up a data handle reads the model's narrative data
+        model, data_handle = _get_model_and_handle(
+            store, model_run_config['name'], sector_model.name)
+        if isinstance(model, Adaptor):
+            for from_spec in model.inputs.values():
+                if from_spec.name in model.outputs:
+                    to_spec = model.outputs[from_spec.name]
+                    model.get_coefficients(data_handle, from_spec, to_spec)
+                    # coefficients are only cached once read back from the store
+                    model.get_coefficients(data_handle, from_spec, to_spec)
+
+
+# Store used by model runs in a process, set by the first model run in each process
+_PROCESS_STORE = None
+# DataCache and CoefficientCache of the store in the parent process, warmed before processes
+# are forked, so shared between them
+_SHARED_CACHES = None
+
+
+def _execute_model_run_in_process(store, model_run_id, warm, workers, cache_models,
+                                  runtime_history):
+    """Run a single model run in a process from the pool
+
+    The store is set up by the first model run in each process and reused by later ones, as
+    ProcessPoolExecutor only takes an initializer from Python 3.7. If the process was forked
+    from one with warmed caches, the store uses those caches.
+
+    Returns
+    -------
+    float
+        Wall-clock time taken in seconds
+    """
+    global _PROCESS_STORE
+    if _PROCESS_STORE is None:
+        _PROCESS_STORE = store
+        if _SHARED_CACHES is not None:
+            _PROCESS_STORE.data_cache, _PROCESS_STORE.coefficient_cache = _SHARED_CACHES
+            for cache in _SHARED_CACHES:
+                # count only this process's reads
+                cache.hits = cache.misses = 0
+
+    start = time.time()
+    model_run_config = get_model_run_definition(_PROCESS_STORE, model_run_id)
+    job_scheduler = _get_job_scheduler(_PROCESS_STORE, workers, cache_models, runtime_history)
+    try:
+        _run_model_run(model_run_config, _PROCESS_STORE, job_scheduler, warm, False)
+    except SmifModelRunError as ex:
+        logging.exception(ex)
+        raise
+    finally:
+        job_scheduler.shutdown()
+    return time.time() - start
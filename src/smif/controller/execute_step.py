@@ -1,5 +1,7 @@
 """Execute a single step directly
 """
+import hashlib
+import json
 import logging
 import os
 import sys
@@ -10,6 +12,25 @@ from smif.data_layer.model_loader import ModelLoader
 from smif.decision.decision import DecisionManager
 from smif.exception import SmifDataNotFoundError
 
+# Loaded models, keyed by (model name, config hash), kept between steps once enabled in a
+# long-lived worker process by calling enable_model_cache
+_MODEL_CACHE = None
+
+
+def enable_model_cache():
+    """Keep loaded models in this process, to reuse for later steps
+
+    Model wrapper modules are imported and models are created from their configuration only
+    once per process, then the same model instance is used to run each timestep and decision
+    iteration. A model is loaded again if its configuration changes.
+
+    Models which keep state on the instance between calls to `simulate` should not be run with
+    the model cache enabled.
+    """
+    global _MODEL_CACHE
+    if _MODEL_CACHE is None:
+        _MODEL_CACHE = {}
+
 
 def execute_model_before_step(model_run_id, model_name, store, dry_run=False):
     """Runs model initialisation
@@ -50,14 +71,26 @@ def execute_model_step(model_run_id, model_name, timestep, decision, store, dry_
     decision: int
         Decision to run
     store: Store
+
+    Returns
+    -------
+    dict or None
+        Checksums of the results written by the model, keyed by output name, or None for a
+        dry run
     """
     if dry_run:
         print("    smif step {} --model {} --timestep {} --decision {}".format(
               model_run_id, model_name, timestep, decision))
-    else:
-        model, data_handle = _get_model_and_handle(
-            store, model_run_id, model_name, timestep, decision)
+        return None
+
+    model, data_handle = _get_model_and_handle(
+        store, model_run_id, model_name, timestep, decision)
+    try:
         model.simulate(data_handle)
+    finally:
+        # results must be written before any models which depend on them can run
+        store.flush_results()
+    return data_handle.results_checksums
 
 
 def _get_model_and_handle(store, model_run_id, model_name, timestep=None, decision=None):
@@ -71,13 +104,7 @@ def _get_model_and_handle(store, model_run_id, model_name, timestep=None, decisi
             model_run_id)
         sys.exit(1)
 
-    loader = ModelLoader()
-    sector_model_config = store.read_model(model_name)
-    # absolute path to be crystal clear for ModelLoader when loading python class
-    sector_model_config['path'] = os.path.normpath(
-        os.path.join(store.model_base_folder, sector_model_config['path'])
-    )
-    model = loader.load(sector_model_config)
+    model = _load_model(store, model_name)
 
     # DataHandle reads
     # - model run from store to find narratives and scenarios selected
@@ -94,6 +121,29 @@ def _get_model_and_handle(store, model_run_id, model_name, timestep=None, decisi
     return model, data_handle
 
 
+def _load_model(store, model_name):
+    """Helper method to load a model, from the model cache if enabled
+    """
+    sector_model_config = store.read_model(model_name)
+    # absolute path to be crystal clear for ModelLoader when loading python class
+    sector_model_config['path'] = os.path.normpath(
+        os.path.join(store.model_base_folder, sector_model_config['path'])
+    )
+    if _MODEL_CACHE is None:
+        return ModelLoader().load(sector_model_config)
+
+    config_hash = hashlib.sha1(
+        json.dumps(sector_model_config, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    key = (model_name, config_hash)
+    try:
+        model = _MODEL_CACHE[key]
+    except KeyError:
+        model = ModelLoader().load(sector_model_config)
+        _MODEL_CACHE[key] = model
+    return model
+
+
 def execute_decision_step(model_run_id, decision, store):
     """Request the next set of decisions from the decision manager, including the bundle of
     timesteps and decision iterations to simulate next.
@@ -4,8 +4,13 @@ Provides all the job run schedulers.
 
 # import classes for access like ::
 #         from smif.controller.job import SerialJobScheduler
+from smif.controller.job.distributed_job_scheduler import (DistributedJobScheduler,
+                                                           run_worker)
+from smif.controller.job.parallel_job_scheduler import ParallelJobScheduler
+from smif.controller.job.runtime_history import JobRuntimeHistory
 from smif.controller.job.serial_job_scheduler import SerialJobScheduler
 
 # Define what should be imported as * ::
 #         from smif.controller.job import *
-__all__ = ['SerialJobScheduler']
+__all__ = ['DistributedJobScheduler', 'JobRuntimeHistory', 'ParallelJobScheduler',
+           'SerialJobScheduler', 'run_worker']
@@ -0,0 +1,448 @@
+"""Job Schedulers are used to run job graphs.
+
+Runs a job graph across several machines: a coordinator publishes each operation over TCP as
+soon as all of the operations it depends on are complete, and worker processes on any host
+(started with ``smif worker``) pull operations, run them and report back.
+
+Workers read and write model run data through their own store, so every worker and the
+coordinator must be configured with the same shared data (for example a project folder on a
+shared filesystem).
+
+While running an operation, workers send a heartbeat every few seconds. If the coordinator
+does not hear from a worker within the heartbeat timeout, the worker is assumed lost and its
+operation is published again for another worker.
+
+Workers cannot be stopped remotely: if an operation times out, or the job graph is stopped, the
+coordinator stops waiting for the operation and ignores its result.
+
+Connections are authenticated using a shared key (see
+:py:mod:`multiprocessing.connection`), and messages are pickled, so anyone with the key can run
+code on the coordinator and workers. There is no default key: the coordinator generates a
+random key if listening on a loopback address, and refuses to listen on any other address
+without a key.
+"""
+import ipaddress
+import itertools
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from concurrent.futures import Future, TimeoutError
+from concurrent.futures import wait as futures_wait
+from multiprocessing.connection import Client, Listener
+
+from smif.controller.job.job_process import TRANSIENT_ERRORS
+from smif.controller.job.parallel_job_scheduler import (ParallelJobScheduler,
+                                                        _execute_job,
+                                                        _initialise_worker)
+from smif.exception import (SmifModelRunError, SmifTimeoutError,
+                            SmifTransientError)
+
+DEFAULT_ADDRESS = ('localhost', 6360)
+
+
+class DistributedJobScheduler(ParallelJobScheduler):
+    """Run JobGraphs produced by a :class:`~smif.controller.modelrun.ModelRun`, publishing
+    jobs for workers connected over TCP to run
+
+    The coordinator starts listening when the scheduler is created, and keeps listening
+    between job graphs until :py:meth:`shutdown` is called. All ready jobs are published at
+    once, in critical path order if a runtime history is given.
+
+    Parameters
+    ----------
+    store: ~smif.data_layer.store.Store
+        Store used for decide jobs, which run in the coordinator
+    address: tuple, optional
+        (host, port) on which to listen for workers, defaults to ('localhost', 6360). Port 0
+        picks any free port, see :py:attr:`address`.
+    authkey: bytes, optional
+        Shared key which workers must use to connect, required unless listening on a
+        loopback address, in which case a random key is generated, see :py:attr:`authkey`
+    heartbeat_timeout: float, default=60
+        Seconds after which a job is published again, if its worker has not been heard from
+    runtime_history: str, optional
+        Path to a file in which to record job runtimes, used to prioritise jobs by critical
+        path in later runs
+    """
+    def __init__(self, store=None, address=None, authkey=None, heartbeat_timeout=60,
+                 runtime_history=None):
+        super().__init__(store, max_workers=1, cache_models=True,
+                         runtime_history=runtime_history)
+        # publish every ready job, however many workers are connected
+        self.max_workers = sys.maxsize
+        self._executor = JobCoordinator(address or DEFAULT_ADDRESS, authkey, heartbeat_timeout)
+
+    @property
+    def address(self):
+        """(host, port) on which the coordinator is listening
+        """
+        return self._executor.address
+
+    @property
+    def authkey(self):
+        """Shared key which workers must use to connect
+        """
+        return self._executor.authkey
+
+    def _get_executor(self):
+        if self._executor is None:
+            raise SmifModelRunError("DistributedJobScheduler has been shut down")
+        return self._executor
+
+    def _submit_to_executor(self, executor, args):
+        """Publish a job - workers set up their own store when they start
+        """
+        return executor.submit(_execute_job, *args)
+
+    def _execute_attempt(self, executor, args, timeout):
+        """Publish a job and wait for it, giving up after `timeout` seconds
+        """
+        future = executor.submit(_execute_job, *args)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            executor.abandon([future])
+            raise SmifTimeoutError("Job did not finish within {} seconds".format(timeout))
+
+    def _terminate_workers(self):
+        """Stop waiting for any published jobs - workers finish their current job, but keep
+        running for later job graphs
+        """
+        if self._executor is not None:
+            self._executor.abandon()
+
+
+class JobCoordinator(object):
+    """Publish jobs to workers connected over TCP, with a similar interface to
+    :class:`concurrent.futures.Executor`
+
+    Each job is represented by a :class:`concurrent.futures.Future` which completes when a
+    worker reports the job complete.
+
+    Parameters
+    ----------
+    address: tuple
+        (host, port) on which to listen
+    authkey: bytes or None
+        If None, a random key is generated - only allowed on a loopback address
+    heartbeat_timeout: float
+    """
+    def __init__(self, address, authkey, heartbeat_timeout):
+        self.logger = logging.getLogger(__name__)
+        if authkey is None:
+            if not _is_loopback(address[0]):
+                raise ValueError(
+                    "An authkey is required to listen for workers on {}".format(address[0]))
+            authkey = os.urandom(16).hex().encode()
+        self.authkey = authkey
+        self.heartbeat_timeout = heartbeat_timeout
+        self._listener = Listener(tuple(address), authkey=authkey)
+        self.address = self._listener.address
+
+        self._job_counter = itertools.count()
+        self._jobs = {}
+        self._pending = deque()
+        self._assigned = {}
+        self._heard_from = {}
+        self._stopping = False
+        self._condition = threading.Condition()
+
+        threading.Thread(target=self._accept, daemon=True).start()
+        threading.Thread(target=self._check_heartbeats, daemon=True).start()
+
+    def submit(self, fn, *args):
+        """Publish a job for the next available worker
+
+        Parameters
+        ----------
+        fn: function
+            Must be :py:func:`smif.controller.job.parallel_job_scheduler._execute_job`,
+            workers always run jobs with it
+        args
+            Arguments for `fn`
+
+        Returns
+        -------
+        concurrent.futures.Future
+        """
+        if fn is not _execute_job:
+            raise ValueError("Workers can only run model operations")
+        future = Future()
+        with self._condition:
+            job_key = next(self._job_counter)
+            self._jobs[job_key] = (future, args)
+            self._pending.append(job_key)
+            self._condition.notify()
+        return future
+
+    def shutdown(self, wait=True):
+        """Stop listening for workers - connected workers are told to stop when they next ask
+        for a job
+
+        Parameters
+        ----------
+        wait: bool, default=True
+            If True, wait for any jobs already taken by workers to complete, unless their
+            workers are lost
+        """
+        with self._condition:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._condition.notify_all()
+        # wake the accepting thread so that it closes the listener
+        try:
+            Client(self.address, authkey=self.authkey).close()
+        except OSError:
+            pass
+        while wait:
+            with self._condition:
+                cutoff = time.time() - self.heartbeat_timeout
+                running = [
+                    self._jobs[job_key][0] for job_key, worker_id in self._assigned.items()
+                    if self._heard_from[worker_id] >= cutoff
+                ]
+            if not running:
+                break
+            futures_wait(running, timeout=1)
+
+    def abandon(self, futures=None):
+        """Stop waiting for jobs, marking them as failed and ignoring any later result
+        from a worker
+
+        Parameters
+        ----------
+        futures: list[concurrent.futures.Future], optional
+            Jobs to abandon, defaults to all jobs
+        """
+        with self._condition:
+            for job_key, (future, _) in list(self._jobs.items()):
+                if futures is not None and future not in futures:
+                    continue
+                del self._jobs[job_key]
+                self._assigned.pop(job_key, None)
+                if not future.done():
+                    future.set_exception(SmifModelRunError("Job was stopped"))
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                # failed authentication, or listener closed
+                if self._stopping:
+                    break
+                continue
+            if self._stopping:
+                connection.close()
+                break
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+        self._listener.close()
+
+    def _serve(self, connection):
+        """Respond to messages from a single worker until it disconnects
+        """
+        with connection:
+            while True:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    break
+                kind, worker_id = message[0], message[1]
+                with self._condition:
+                    self._heard_from[worker_id] = time.time()
+                if kind == 'get':
+                    reply = self._next_job(worker_id)
+                elif kind == 'done':
+                    self._complete(worker_id, *message[2:])
+                    reply = ('ok',)
+                else:
+                    # heartbeat
+                    reply = ('ok',)
+                try:
+                    connection.send(reply)
+                except (EOFError, OSError):
+                    break
+
+    def _next_job(self, worker_id, timeout=1):
+        """Take the next pending job, waiting briefly if there are none
+        """
+        with self._condition:
+            deadline = time.time() + timeout
+            while not self._stopping:
+                while self._pending:
+                    job_key = self._pending.popleft()
+                    if job_key not in self._jobs:
+                        # abandoned
+                        continue
+                    future, args = self._jobs[job_key]
+                    if future.done():
+                        # completed by a worker thought to be lost
+                        continue
+                    if not future.running() and not future.set_running_or_notify_cancel():
+                        # cancelled before any worker took it
+                        del self._jobs[job_key]
+                        continue
+                    self._assigned[job_key] = worker_id
+                    self.logger.debug("Job %s taken by %s", job_key, worker_id)
+                    return ('job', job_key, args)
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return ('wait',)
+                self._condition.wait(remaining)
+            return ('stop',)
+
+    def _complete(self, worker_id, job_key, error, transient, result):
+        with self._condition:
+            if job_key not in self._jobs:
+                return
+            future, _ = self._jobs.pop(job_key)
+            self._assigned.pop(job_key, None)
+        if future.done():
+            return
+        if error is None:
+            future.set_result(result)
+        else:
+            error_class = SmifTransientError if transient else SmifModelRunError
+            future.set_exception(
+                error_class("Job failed on worker {}:\n{}".format(worker_id, error)))
+
+    def _check_heartbeats(self):
+        """Publish jobs again if their workers have not been heard from in time
+        """
+        while not self._stopping:
+            time.sleep(min(1, self.heartbeat_timeout / 2))
+            with self._condition:
+                cutoff = time.time() - self.heartbeat_timeout
+                for job_key, worker_id in list(self._assigned.items()):
+                    if self._heard_from[worker_id] < cutoff:
+                        self.logger.warning(
+                            "Lost worker %s, publishing job %s again", worker_id, job_key)
+                        del self._assigned[job_key]
+                        self._pending.appendleft(job_key)
+                        self._condition.notify()
+
+
+def run_worker(store, address=None, authkey=None, cache_models=False, heartbeat_interval=5,
+               connect_timeout=30):
+    """Run jobs published by a :class:`DistributedJobScheduler` until it shuts down
+
+    Parameters
+    ----------
+    store: ~smif.data_layer.store.Store
+        Store with access to the same model run data as the coordinator
+    address: tuple, optional
+        (host, port) of the coordinator, defaults to ('localhost', 6360)
+    authkey: bytes
+        Shared key used by the coordinator
+    cache_models: bool, default=False
+        If True, keep loaded models to reuse for later jobs
+    heartbeat_interval: float, default=5
+        Seconds between heartbeats while running a job
+    connect_timeout: float, default=30
+        Seconds to keep trying to connect, if the coordinator is not yet listening
+
+    Returns
+    -------
+    int
+        Number of jobs completed
+    """
+    if authkey is None:
+        raise ValueError("An authkey is required to connect to the coordinator")
+    logger = logging.getLogger(__name__)
+    worker_id = '{}-{}'.format(socket.gethostname(), os.getpid())
+    connection = _connect(tuple(address or DEFAULT_ADDRESS), authkey, connect_timeout)
+    logger.info("Worker %s connected", worker_id)
+
+    _initialise_worker(store, cache_models)
+    lock = threading.Lock()
+
+    def request(*message):
+        with lock:
+            connection.send(message)
+            return connection.recv()
+
+    completed = 0
+    with connection:
+        while True:
+            try:
+                reply = request('get', worker_id)
+                if reply[0] == 'stop':
+                    break
+                if reply[0] == 'job':
+                    _, job_key, args = reply
+                    error, transient, result = _run_job(
+                        request, worker_id, args, heartbeat_interval)
+                    request('done', worker_id, job_key, error, transient, result)
+                    completed += 1
+            except (EOFError, OSError):
+                # coordinator has stopped
+                break
+
+    logger.info("Worker %s stopping after %s jobs", worker_id, completed)
+    return completed
+
+
+def _is_loopback(host):
+    """Whether `host` is a loopback address, so only reachable from this machine
+    """
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        # other host names may resolve to any address
+        return False
+
+
+def _connect(address, authkey, timeout):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return Client(address, authkey=authkey)
+        except ConnectionRefusedError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+def _run_job(request, worker_id, args, heartbeat_interval):
+    """Run a single job, sending heartbeats until it is done
+
+    Returns
+    -------
+    tuple
+        (error, transient, result) - traceback if the job failed, otherwise None, whether the
+        error was transient, and the job's results checksums if it succeeded, otherwise None
+    """
+    logger = logging.getLogger(__name__)
+    logger.info("Worker %s running %s", worker_id, args)
+    finished = threading.Event()
+    heartbeat = threading.Thread(
+        target=_send_heartbeats, args=(request, worker_id, finished, heartbeat_interval),
+        daemon=True)
+    heartbeat.start()
+    try:
+        return None, False, _execute_job(*args)
+    except (Exception, SystemExit) as ex:
+        # a job may exit, for example if its model run is missing, which must not stop the
+        # worker
+        error = traceback.format_exc()
+        logger.error("Worker %s failed to run %s\n%s", worker_id, args, error)
+        return error, isinstance(ex, TRANSIENT_ERRORS), None
+    finally:
+        finished.set()
+        heartbeat.join()
+
+
+def _send_heartbeats(request, worker_id, finished, interval):
+    while not finished.wait(interval):
+        try:
+            request('heartbeat', worker_id)
+        except (EOFError, OSError):
+            break
@@ -0,0 +1,176 @@
+"""Run single jobs from a job graph, with the timeout and retry settings of their models.
+
+A job with a timeout runs in its own process, so that it can be stopped if it takes too long
+or if its job graph is stopped. Jobs which fail with a transient error (see
+:data:`TRANSIENT_ERRORS`), or which time out if the model is set to retry timeouts, are
+retried, waiting longer before each retry, up to the number of retries set for the model (see
+:class:`~smif.model.model.Model`). Other errors, such as missing data or invalid
+configuration, fail the job on the first attempt.
+"""
+import multiprocessing
+import traceback
+
+from smif.controller.execute_step import (execute_model_before_step,
+                                          execute_model_step)
+from smif.exception import (SmifModelRunError, SmifTimeoutError,
+                            SmifTransientError)
+from smif.model import ModelOperation
+
+# errors after which a job may succeed if run again
+TRANSIENT_ERRORS = (OSError, SmifTransientError)
+
+
+def job_args(job):
+    """Unpack the arguments needed to run a job from a job graph node, passing only model names
+    rather than model objects, so that jobs can run in other processes
+
+    Parameters
+    ----------
+    job: dict
+        Job graph node attributes
+
+    Returns
+    -------
+    tuple
+        (operation, modelrun_name, model_name, timestep, decision_iteration)
+    """
+    if job['operation'] not in (ModelOperation.SIMULATE, ModelOperation.BEFORE_MODEL_RUN):
+        raise ValueError("Model operation not recognised", job)
+    return (
+        job['operation'],
+        job['modelrun_name'],
+        job['model'].name,
+        job['current_timestep'],
+        job['decision_iteration']
+    )
+
+
+def execute_job(store, operation, modelrun_name, model_name, timestep, decision_iteration):
+    """Run a single simulate or before_model_run job
+
+    Returns
+    -------
+    dict or None
+        Checksums of the results of a simulate job
+    """
+    if operation == ModelOperation.SIMULATE:
+        return execute_model_step(
+            modelrun_name, model_name, timestep, decision_iteration, store)
+    execute_model_before_step(modelrun_name, model_name, store)
+    return None
+
+
+def run_with_retries(run_once, model, stopped, logger, job_node_id):
+    """Run a job, retrying if it fails with a transient error, or times out and its model is
+    set to retry timeouts, up to the number of retries set for its model
+
+    Parameters
+    ----------
+    run_once: function
+        Called with no arguments to make each attempt
+    model: ~smif.model.model.Model
+    stopped: threading.Event
+        If set, do not retry
+    logger: logging.Logger
+    job_node_id: str
+
+    Returns
+    -------
+    The result of the first successful attempt
+    """
+    attempt = 0
+    while True:
+        try:
+            return run_once()
+        except Exception as ex:
+            if attempt >= model.retries or stopped.is_set() or not _should_retry(ex, model):
+                raise
+            delay = model.retry_delay * 2 ** attempt
+            logger.warning("Job %s failed, retrying in %s seconds: %s", job_node_id, delay, ex)
+            if stopped.wait(delay):
+                raise
+            attempt += 1
+
+
+def _should_retry(error, model):
+    if isinstance(error, SmifTimeoutError):
+        return model.retry_timeouts
+    return isinstance(error, TRANSIENT_ERRORS)
+
+
+class JobProcess(object):
+    """Run a function in its own process, which can be stopped
+
+    Parameters
+    ----------
+    fn: function
+    args
+        Arguments for `fn`
+    """
+    def __init__(self, fn, *args):
+        self._receiver, self._sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(
+            target=_run_and_send, args=(self._sender, fn, args))
+        self._killed = False
+
+    def run(self, timeout=None):
+        """Start the process and wait for its result
+
+        Parameters
+        ----------
+        timeout: float, optional
+            Seconds after which to stop the process
+
+        Returns
+        -------
+        The return value of `fn`
+
+        Raises
+        ------
+        SmifTimeoutError
+            If the process did not finish in time
+        SmifTransientError
+            If `fn` raised a transient error, or the process exited unexpectedly
+        SmifModelRunError
+            If `fn` raised any other exception, or the process was killed
+        """
+        self._process.start()
+        self._sender.close()
+        try:
+            if not self._receiver.poll(timeout):
+                raise SmifTimeoutError(
+                    "Job did not finish within {} seconds".format(timeout))
+            status, value = self._receiver.recv()
+        except EOFError:
+            if self._killed:
+                raise SmifModelRunError("Job was stopped")
+            raise SmifTransientError("Job process exited unexpectedly")
+        finally:
+            self.kill()
+            self._process.join()
+            self._receiver.close()
+
+        if status == 'transient_error':
+            raise SmifTransientError(value)
+        if status == 'error':
+            raise SmifModelRunError(value)
+        return value
+
+    def kill(self):
+        """Stop the process if it is running
+        """
+        self._killed = True
+        if self._process.is_alive():
+            self._process.terminate()
+
+
+def _run_and_send(sender, fn, args):
+    try:
+        result = fn(*args)
+    except Exception as ex:
+        status = 'transient_error' if isinstance(ex, TRANSIENT_ERRORS) else 'error'
+        sender.send((status, traceback.format_exc()))
+    else:
+        sender.send(('ok', result))
+    finally:
+        sender.close()
@@ -0,0 +1,385 @@
+"""Job Schedulers are used to run job graphs.
+
+Runs a job graph by dispatching each operation to a pool of worker processes as soon as all
+of the operations it depends on are complete, so that independent models (for example, models
+with no dependencies between them in the same timestep, or separate decision iterations) run
+concurrently.
+
+Decide operations run in the scheduling process, as decision modules may keep track of state
+between calls.
+
+Optionally, worker processes are kept running between job graphs and keep loaded models to
+reuse for later steps, so model wrappers are imported once per worker rather than once per
+step.
+
+Optionally, the runtime of each job is recorded, and when more jobs are ready than there are
+workers, jobs are prioritised by the estimated runtime of the longest chain of jobs which
+depends on them (their critical path), so that slow chains of models start as early as possible
+and workers are not left idle waiting on them at the end of each timestep.
+
+Jobs for models with a timeout or retries are watched from a thread in the scheduling process:
+each attempt at a job with a timeout runs in its own process, so it can be stopped without
+losing the rest of the worker pool. If any job fails, jobs which are still running are stopped
+rather than left to finish (before Python 3.7, jobs running in the worker pool are left to
+finish).
+"""
+import os
+import sys
+import time
+from concurrent.futures import (FIRST_COMPLETED, ProcessPoolExecutor,
+                                ThreadPoolExecutor, wait)
+from functools import partial
+
+import networkx
+from smif.controller.execute_step import enable_model_cache
+from smif.controller.job.job_process import (JobProcess, execute_job,
+                                             job_args, run_with_retries)
+from smif.controller.job.runtime_history import JobRuntimeHistory
+from smif.controller.job.serial_job_scheduler import SerialJobScheduler
+from smif.exception import SmifModelRunError
+from smif.model import ModelOperation
+
+# Store used by job functions in worker processes, set once per process by the first job it
+# runs
+_WORKER_STORE = None
+
+
+class ParallelJobScheduler(SerialJobScheduler):
+    """Run JobGraphs produced by a :class:`~smif.controller.modelrun.ModelRun`, running
+    independent jobs concurrently in a pool of worker processes
+
+    Parameters
+    ----------
+    store: ~smif.data_layer.store.Store
+        The store must be usable from several processes at once, so file-based stores are
+        suitable while in-memory stores will not share results between workers
+    max_workers: int, optional
+        Maximum number of jobs to run at once, defaults to the number of CPUs
+    cache_models: bool, default=False
+        If True, keep worker processes running between job graphs until :py:meth:`shutdown`
+        is called, and keep loaded models in each worker to reuse for later timesteps and
+        decision iterations (see :py:func:`smif.controller.execute_step.enable_model_cache`)
+    runtime_history: str, optional
+        Path to a file in which to record job runtimes, used to prioritise jobs by critical
+        path in later runs. If not given, ready jobs are run in the order they become ready.
+    """
+    def __init__(self, store=None, max_workers=None, cache_models=False,
+                 runtime_history=None):
+        super().__init__(store)
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 1:
+            raise ValueError("Expected at least one worker, got {}".format(max_workers))
+        self.max_workers = max_workers
+        self.cache_models = cache_models
+        self._executor = None
+        # futures submitted to the worker pool and not yet done
+        self._futures = set()
+        # threads which watch jobs with a timeout or retries
+        self._threads = None
+
+        if runtime_history is None:
+            self.runtime_history = None
+        else:
+            self.runtime_history = JobRuntimeHistory(runtime_history)
+        self._priority = {}
+        self._started = {}
+
+    def shutdown(self):
+        """Stop any worker processes which have been kept running between job graphs
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._threads is not None:
+            self._threads.shutdown(wait=True)
+            self._threads = None
+
+    def kill(self, job_graph_id):
+        """Kill a job_graph that is already running
+
+        Stops all running jobs, and does not start any further jobs.
+
+        Parameters
+        ----------
+        job_graph_id: int
+        """
+        if self._status[job_graph_id] != 'running':
+            return
+        self._status[job_graph_id] = 'stopped'
+        self._stopped.set()
+        self._kill_running()
+
+    def _kill_running(self):
+        for process in list(self._processes):
+            process.kill()
+        self._terminate_workers()
+
+    def _terminate_workers(self):
+        """Stop worker processes without waiting for their jobs to finish, where possible
+        """
+        executor = self._executor
+        if executor is None:
+            return
+        self._executor = None
+        # Executor.shutdown only takes cancel_futures from Python 3.9
+        for future in list(self._futures):
+            future.cancel()
+        # ProcessPoolExecutor has no public way to stop jobs which have started. Before Python
+        # 3.7, shutdown writes to a queue which a stopped worker may have left locked, so wait
+        # for running jobs instead.
+        processes = getattr(executor, '_processes', None)
+        if processes is None or sys.version_info < (3, 7):
+            self.logger.warning("Could not stop worker processes, waiting for running jobs")
+        else:
+            for process in list(processes.values()):
+                process.terminate()
+        executor.shutdown(wait=True)
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _submit_to_executor(self, executor, args):
+        """Submit a job to the worker pool - each worker sets up its store and model cache
+        when it runs its first job, as ProcessPoolExecutor only takes an initializer from
+        Python 3.7
+        """
+        future = executor.submit(
+            _execute_job_in_worker, self.store, self.cache_models, *args)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return future
+
+    def _run(self, job_graph, job_graph_id, dry_run=False):
+        """Run a job graph
+        - submit each job to the worker pool once all its predecessors are done
+        - dry runs step through jobs in series, so printed steps are in a runnable order
+        """
+        if dry_run:
+            super()._run(job_graph, job_graph_id, dry_run)
+            return
+
+        if not networkx.is_directed_acyclic_graph(job_graph):
+            raise NotImplementedError("Job graphs must not contain cycles")
+
+        try:
+            self.logger.profiling_start(
+                'ParallelJobScheduler._run()', 'graph_' + str(job_graph_id))
+        except AttributeError:
+            self.logger.info('START ParallelJobScheduler._run():graph_%s', job_graph_id)
+
+        self._status[job_graph_id] = 'running'
+        self._stopped.clear()
+        self._run_jobs(job_graph, job_graph_id)
+
+        self._status[job_graph_id] = 'done'
+        try:
+            self.logger.profiling_stop(
+                'ParallelJobScheduler._run()', 'graph_' + str(job_graph_id))
+        except AttributeError:
+            self.logger.info(
+                'STOP ParallelJobScheduler._run():graph_%s', job_graph_id)
+
+    def _run_jobs(self, job_graph, job_graph_id=None):
+        """Submit each job to the worker pool once all its predecessors are done, and wait for
+        all jobs to finish
+        """
+        if self.runtime_history is not None:
+            self._priority = self._critical_path_priority(job_graph, self.runtime_history)
+
+        # count of unfinished predecessors for each job
+        waiting_on = {
+            job_node_id: job_graph.in_degree(job_node_id) for job_node_id in job_graph.nodes
+        }
+        ready = [job_node_id for job_node_id, count in waiting_on.items() if count == 0]
+        running = {}
+
+        executor = self._get_executor()
+        journal = job_graph.graph.get('journal')
+
+        def release(job_node_id):
+            for successor in job_graph.successors(job_node_id):
+                waiting_on[successor] -= 1
+                if waiting_on[successor] == 0:
+                    ready.append(successor)
+
+        try:
+            while ready or running:
+                # decide jobs are quick and release simulate jobs, so run them straight away
+                self._run_decide_jobs(ready, job_graph, journal, release)
+
+                # only submit as many jobs as there are workers, so jobs which become ready
+                # later can still be chosen ahead of jobs which have been waiting
+                while ready and len(running) < self.max_workers:
+                    job_node_id = self._next_ready(ready, job_graph)
+                    ready.remove(job_node_id)
+                    running[self._submit_job(executor, job_node_id,
+                                             job_graph.nodes[job_node_id],
+                                             journal)] = job_node_id
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                if self._stopped.is_set():
+                    raise SmifModelRunError("Job graph {} was stopped".format(job_graph_id))
+                for future in done:
+                    job_node_id = running.pop(future)
+                    self._complete_job(
+                        future, job_node_id, job_graph.nodes[job_node_id], journal)
+                    release(job_node_id)
+        finally:
+            self._stop_jobs(running)
+
+    def _stop_jobs(self, running):
+        """Cancel any jobs not yet started, after all jobs are done or one has failed, and stop
+        any jobs still running
+        """
+        self._stopped.set()
+        for future in running:
+            future.cancel()
+        if any(not future.done() for future in running):
+            self._kill_running()
+            wait(running)
+        if self.cache_models:
+            # keep workers for the next job graph, once any running jobs are finished
+            wait(running)
+        else:
+            self.shutdown()
+        if self.runtime_history is not None:
+            self.runtime_history.save()
+
+    @staticmethod
+    def _next_decide(ready, job_graph):
+        """Find the next ready decide job, if any
+        """
+        for job_node_id in ready:
+            if job_graph.nodes[job_node_id]['operation'] == ModelOperation.DECIDE:
+                return job_node_id
+        return None
+
+    def _next_ready(self, ready, job_graph):
+        """Choose which of the ready jobs to submit next - the job with the longest critical
+        path if runtimes are known, otherwise the job which has been ready longest
+
+        Returns
+        -------
+        str
+            A job node id from `ready`
+        """
+        if self._priority:
+            return max(ready, key=lambda job_node_id: self._priority[job_node_id])
+        return ready[0]
+
+    @staticmethod
+    def _critical_path_priority(job_graph, runtime_history):
+        """Rank each job by the estimated runtime of the longest path from the start of the
+        job to the end of the job graph (the 'upward rank' used in HEFT list scheduling)
+
+        Parameters
+        ----------
+        job_graph: :class:`networkx.DiGraph`
+        runtime_history: :class:`~smif.controller.job.runtime_history.JobRuntimeHistory`
+
+        Returns
+        -------
+        dict
+            Critical path length in seconds, keyed by job node id
+        """
+        priority = {}
+        for job_node_id in reversed(list(networkx.topological_sort(job_graph))):
+            job = job_graph.nodes[job_node_id]
+            if job['operation'] == ModelOperation.DECIDE:
+                runtime = 0
+            else:
+                runtime = runtime_history.estimate(job_node_id, job)
+            priority[job_node_id] = runtime + max(
+                (priority[successor] for successor in job_graph.successors(job_node_id)),
+                default=0)
+        return priority
+
+    def _submit_job(self, executor, job_node_id, job, journal=None):
+        self.logger.info("Job %s", job_node_id)
+        try:
+            self.logger.profiling_start('ParallelJobScheduler._run()', 'job_' + job_node_id)
+        except AttributeError:
+            self.logger.info('START ParallelJobScheduler._run():job_%s', job_node_id)
+
+        if journal is not None:
+            journal.started(job_node_id, job)
+        self._started[job_node_id] = time.time()
+        args = job_args(job)
+        model = job['model']
+        if model.timeout is None and not model.retries:
+            return self._submit_to_executor(executor, args)
+
+        if self._threads is None:
+            self._threads = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._threads.submit(
+            run_with_retries, partial(self._execute_attempt, executor, args, model.timeout),
+            model, self._stopped, self.logger, job_node_id)
+
+    def _execute_attempt(self, executor, args, timeout):
+        """Run a job in the worker pool, or in its own process if it has a timeout
+        """
+        if timeout is None:
+            return self._submit_to_executor(executor, args).result()
+
+        process = JobProcess(execute_job, self.store, *args)
+        self._processes.add(process)
+        try:
+            return process.run(timeout)
+        finally:
+            self._processes.discard(process)
+
+    def _run_decide_jobs(self, ready, job_graph, journal, release):
+        decide = self._next_decide(ready, job_graph)
+        while decide is not None:
+            ready.remove(decide)
+            self._run_decide_job(decide, job_graph.nodes[decide], journal)
+            release(decide)
+            decide = self._next_decide(ready, job_graph)
+
+    def _run_decide_job(self, job_node_id, job, journal):
+        if journal is not None:
+            journal.started(job_node_id, job)
+        self._run_job(job_node_id, job)
+        if journal is not None:
+            journal.finished(job_node_id, job)
+
+    def _complete_job(self, future, job_node_id, job, journal):
+        self._finish_job(job_node_id)
+        # re-raises any exception from the worker process
+        checksums = future.result()
+        if self.runtime_history is not None:
+            self.runtime_history.record(
+                job_node_id, job, time.time() - self._started.pop(job_node_id))
+        if journal is not None:
+            journal.finished(job_node_id, job, checksums)
+
+    def _finish_job(self, job_node_id):
+        try:
+            self.logger.profiling_stop('ParallelJobScheduler._run()', 'job_' + job_node_id)
+        except AttributeError:
+            self.logger.info('STOP ParallelJobScheduler._run():job_%s', job_node_id)
+
+
+def _initialise_worker(store, cache_models):
+    global _WORKER_STORE
+    _WORKER_STORE = store
+    if cache_models:
+        enable_model_cache()
+
+
+def _execute_job_in_worker(store, cache_models, *args):
+    """Run a single job in a pool worker process, setting up the worker the first time
+    """
+    if _WORKER_STORE is None:
+        _initialise_worker(store, cache_models)
+    return _execute_job(*args)
+
+
+def _execute_job(operation, modelrun_name, model_name, timestep, decision_iteration):
+    """Run a single job in a worker process
+    """
+    return execute_job(
+        _WORKER_STORE, operation, modelrun_name, model_name, timestep, decision_iteration)
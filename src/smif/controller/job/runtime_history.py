@@ -0,0 +1,126 @@
+"""Record how long each job takes to run, to inform scheduling of later runs.
+
+Runtimes are kept in a JSON file, keyed by job id (see
+:py:meth:`smif.controller.modelrun.ModelRunner._make_job_id`), for example::
+
+    {
+        "energy_central_simulate_2010_0_energy_demand": {
+            "model": "energy_demand",
+            "operation": "simulate",
+            "seconds": 12.5
+        }
+    }
+"""
+import json
+import os
+import tempfile
+from logging import getLogger
+
+
+class JobRuntimeHistory(object):
+    """Wall-clock runtimes of previously-run jobs
+
+    Parameters
+    ----------
+    path: str
+        Path to JSON file, read if it exists and written by :py:meth:`save`
+    """
+    def __init__(self, path):
+        self.logger = getLogger(__name__)
+        self.path = str(path)
+        self._runtimes = self._read()
+        # job ids recorded by this instance, which take precedence over the file when saving
+        self._recorded = set()
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r') as file_handle:
+                return json.load(file_handle)
+        except (OSError, ValueError):
+            self.logger.warning("Could not read job runtime history from %s", self.path)
+            return {}
+
+    def record(self, job_id, job, seconds):
+        """Record the runtime of a job
+
+        Parameters
+        ----------
+        job_id: str
+        job: dict
+            Job graph node attributes
+        seconds: float
+        """
+        self._runtimes[job_id] = {
+            'model': job['model'].name,
+            'operation': job['operation'].value,
+            'seconds': seconds
+        }
+        self._recorded.add(job_id)
+
+    def estimate(self, job_id, job):
+        """Estimate the runtime of a job
+
+        Uses the last recorded runtime for the same job id if available, otherwise the mean
+        runtime of the same operation on the same model (for example from another model run),
+        otherwise the mean of all recorded runtimes.
+
+        Parameters
+        ----------
+        job_id: str
+        job: dict
+            Job graph node attributes
+
+        Returns
+        -------
+        float
+            Estimated runtime in seconds, or 1 if there is no history at all
+        """
+        try:
+            return self._runtimes[job_id]['seconds']
+        except KeyError:
+            pass
+
+        similar = [
+            runtime['seconds'] for runtime in self._runtimes.values()
+            if runtime['model'] == job['model'].name
+            and runtime['operation'] == job['operation'].value
+        ]
+        if similar:
+            return sum(similar) / len(similar)
+
+        if self._runtimes:
+            return sum(
+                runtime['seconds'] for runtime in self._runtimes.values()
+            ) / len(self._runtimes)
+
+        return 1.0
+
+    def save(self):
+        """Write runtimes to file
+
+        Runtimes recorded by other processes since the file was read are kept, so several
+        model runs may share a history file. The history is only used to prioritise jobs, so
+        failing to write it is logged rather than raised.
+        """
+        dirname = os.path.dirname(self.path)
+        tmp_path = None
+        try:
+            if dirname and not os.path.exists(dirname):
+                os.makedirs(dirname, exist_ok=True)
+            runtimes = self._read()
+            runtimes.update(
+                (job_id, self._runtimes[job_id]) for job_id in self._recorded)
+            self._runtimes = runtimes
+            # write to a unique temporary file then move, so an interrupted write does not
+            # lose history and concurrent writers do not clash
+            handle, tmp_path = tempfile.mkstemp(
+                dir=dirname or None, prefix=os.path.basename(self.path), suffix='.tmp')
+            with os.fdopen(handle, 'w') as file_handle:
+                json.dump(runtimes, file_handle, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as ex:
+            self.logger.warning("Could not save job runtime history to %s: %s", self.path, ex)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
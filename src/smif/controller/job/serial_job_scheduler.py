@@ -4,12 +4,17 @@ Runs a job graph by calling execute_model_step for each operation in order
 """
 import itertools
 import logging
+import threading
 import traceback
 from collections import defaultdict
+from functools import partial
 
 import networkx
 from smif.controller.execute_step import (execute_model_before_step,
                                           execute_model_step)
+from smif.controller.job.job_process import (JobProcess, execute_job,
+                                             job_args, run_with_retries)
+from smif.exception import SmifModelRunError
 from smif.model import ModelOperation
 
 
@@ -21,6 +26,8 @@ class SerialJobScheduler(object):
         self._id_counter = itertools.count()
         self.logger = logging.getLogger(__name__)
         self.store = store
+        self._stopped = threading.Event()
+        self._processes = set()
 
     def add(self, job_graph, dry_run=False):
         """Add a JobGraph to the SerialJobScheduler and run directly
@@ -35,20 +42,34 @@ class SerialJobScheduler(object):
         try:
             self._run(job_graph, job_graph_id, dry_run)
         except Exception as ex:
-            self._status[job_graph_id] = 'failed'
+            if self._status[job_graph_id] != 'stopped':
+                self._status[job_graph_id] = 'failed'
             traceback.print_exc()
             return job_graph_id, ex
 
         return job_graph_id, None
 
+    def shutdown(self):
+        """Release any resources held between job graphs - none for the SerialJobScheduler
+        """
+        pass
+
     def kill(self, job_graph_id):
-        """Kill a job_graph that is already running - not implemented
+        """Kill a job_graph that is already running
+
+        Stops any job running in its own process (jobs with a timeout), and does not start
+        any further jobs. Jobs running in the scheduler process finish first.
 
         Parameters
         ----------
         job_graph_id: int
         """
-        raise NotImplementedError
+        if self._status[job_graph_id] != 'running':
+            return
+        self._status[job_graph_id] = 'stopped'
+        self._stopped.set()
+        for process in list(self._processes):
+            process.kill()
 
     def get_status(self, job_graph_id):
         """Get job graph status
@@ -73,6 +94,8 @@ class SerialJobScheduler(object):
             Job graph was completed succesfully
         failed:
             Job graph completed running with an exit code
+        stopped:
+            Job graph was stopped (killed) before completing
         """
         return {'status': self._status[job_graph_id]}
 
@@ -80,6 +103,8 @@ class SerialJobScheduler(object):
         """Run a job graph
         - sort the jobs into a single list
         - unpack model, data_handle and operation from each node
+        - record each job in the graph's 'journal', if any (see
+          :class:`~smif.data_layer.job_journal.JobJournal`)
         """
         try:
             self.logger.profiling_start(
@@ -88,9 +113,17 @@ class SerialJobScheduler(object):
             self.logger.info('START SerialJobScheduler._run():graph_%s', job_graph_id)
 
         self._status[job_graph_id] = 'running'
+        self._stopped.clear()
 
+        journal = None if dry_run else job_graph.graph.get('journal')
         for job_node_id, job in self._get_run_order(job_graph):
-            self._run_job(job_node_id, job, dry_run)
+            if self._stopped.is_set():
+                raise SmifModelRunError("Job graph {} was stopped".format(job_graph_id))
+            if journal is not None:
+                journal.started(job_node_id, job)
+            checksums = self._run_job(job_node_id, job, dry_run)
+            if journal is not None:
+                journal.finished(job_node_id, job, checksums)
 
         self._status[job_graph_id] = 'done'
         try:
@@ -107,7 +140,14 @@ class SerialJobScheduler(object):
         except AttributeError:
             self.logger.info('START SerialJobScheduler._run():job_%s', job_node_id)
 
-        if job['operation'] == ModelOperation.SIMULATE:
+        checksums = None
+        if job['operation'] == ModelOperation.DECIDE:
+            # decisions are saved on dry runs too, so that the printed steps can be run
+            job['decision_manager'].get_and_save_decisions(
+                job['decision_iteration'],
+                job['current_timestep']
+            )
+        elif dry_run and job['operation'] == ModelOperation.SIMULATE:
             execute_model_step(
                 job['modelrun_name'],
                 job['model'].name,
@@ -116,7 +156,7 @@ class SerialJobScheduler(object):
                 self.store,
                 dry_run
             )
-        elif job['operation'] == ModelOperation.BEFORE_MODEL_RUN:
+        elif dry_run and job['operation'] == ModelOperation.BEFORE_MODEL_RUN:
             execute_model_before_step(
                 job['modelrun_name'],
                 job['model'].name,
@@ -124,12 +164,29 @@ class SerialJobScheduler(object):
                 dry_run
             )
         else:
-            raise ValueError("Model operation not recognised", job)
+            args = job_args(job)
+            checksums = run_with_retries(
+                partial(self._execute_attempt, args, job['model'].timeout),
+                job['model'], self._stopped, self.logger, job_node_id)
 
         try:
             self.logger.profiling_stop('SerialJobScheduler._run()', 'job_' + job_node_id)
         except AttributeError:
             self.logger.info('STOP SerialJobScheduler._run():job_%s', job_node_id)
+        return checksums
+
+    def _execute_attempt(self, args, timeout):
+        """Run a job in this process, or in its own process if it has a timeout
+        """
+        if timeout is None:
+            return execute_job(self.store, *args)
+
+        process = JobProcess(execute_job, self.store, *args)
+        self._processes.add(process)
+        try:
+            return process.run(timeout)
+        finally:
+            self._processes.discard(process)
 
     def _next_id(self):
         return next(self._id_counter)
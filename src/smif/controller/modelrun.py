@@ -17,6 +17,7 @@ ModeRun has attributes:
 - status
 
 """
+import itertools
 from logging import getLogger
 
 import networkx as nx
@@ -202,16 +203,27 @@ class ModelRunner(object):
                                            model_run.name,
                                            model_run.sos_model)
 
-        for bundle in decision_manager.decision_loop():
-            # each iteration is independent at this point, so the following loop is a
-            # candidate for running in parallel
-            job_graph = self.build_job_graph(model_run, bundle)
+        for bundle in decision_manager.decision_loop(save_decisions=False):
+            # each decision iteration is independent at this point, so decisions are made as
+            # jobs in the graph and each decision iteration can be simulated as soon as its own
+            # decisions are saved, alongside other decision iterations
+            job_graph = self.build_job_graph(model_run, bundle, decision_manager)
+            if not dry_run:
+                # job schedulers record when each job starts and finishes, so a warm start
+                # can skip exactly the finished jobs
+                job_graph.graph['journal'] = store.job_journal(model_run.name)
 
             if self.warm_start:
                 # filter graph to exclude already-available results
                 complete_jobs = store.completed_jobs(model_run.name)
                 job_graph = self.filter_job_graph(model_run.name, job_graph, complete_jobs)
 
+            if len(bundle['timesteps']) > 1:
+                self.logger.info(
+                    "Models with no dependencies between timesteps, which can simulate all "
+                    "timesteps in parallel: %s",
+                    self.find_timestep_parallel_models(job_graph))
+
             job_id, err = job_scheduler.add(job_graph, dry_run)
             self.logger.debug("Running job %s", job_id)
             if err is not None:
@@ -219,11 +231,34 @@ class ModelRunner(object):
                 self.logger.debug("Job %s %s", job_id, status['status'])
                 raise err
 
-    def build_job_graph(self, model_run, bundle):
+    def _add_decide_jobs(self, job_graph, model_run, bundle, decision_manager):
+        if decision_manager is None:
+            return
+        # one decide job per (decision iteration, timestep)
+        job_graph.add_nodes_from(
+            self._make_decide_job_nodes(
+                model_run.name,
+                decision_manager,
+                bundle,
+                model_run.model_horizon
+            )
+        )
+        # must run in order, and before any simulate jobs for the same decision iteration
+        # and timestep
+        job_graph.add_edges_from(
+            self._make_decide_job_edges(
+                model_run.name,
+                model_run.sos_model.sector_models,
+                bundle
+            )
+        )
+
+    def build_job_graph(self, model_run, bundle, decision_manager=None):
         """ Build a job graph
 
         Build and return the job graph for an entire bundle, including before_model_run jobs
-        when the models were not yet initialised.
+        when the models were not yet initialised, and decide jobs when a decision manager is
+        provided.
 
         Constraints:
         - Bundle must have keys: 'decision_iterations' and 'timesteps'
@@ -270,9 +305,15 @@ class ModelRunner(object):
             }
 
 
+        Decide jobs make and save the decisions for each (timestep, decision iteration) pair,
+        and must run before any simulate jobs for that pair. They are chained in the same order
+        as :py:meth:`smif.decision.decision.DecisionManager.decision_loop` would make them, as
+        decision modules may keep track of state between calls.
+
         Arguments
         ---------
         model_run: :class:`smif.controller.modelrun.ModelRun` bundle: :class:`dict`
+        decision_manager: :class:`smif.decision.decision.DecisionManager`, optional
 
         Returns
         -------
@@ -353,6 +394,8 @@ class ModelRunner(object):
                         )
                     )
 
+        self._add_decide_jobs(job_graph, model_run, bundle, decision_manager)
+
         if not model_run.initialised:
             # one before_model_run job per model
             self.logger.info("Initialising each of the sector models")
@@ -382,6 +425,46 @@ class ModelRunner(object):
 
         return job_graph
 
+    @staticmethod
+    def find_timestep_parallel_models(job_graph):
+        """Find the models which can simulate all timesteps in a job graph in parallel
+
+        A model can simulate all timesteps in parallel if none of its simulate jobs depend,
+        directly or through other models, on a simulate job from a different timestep. Each
+        dependency on a previous timestep is an edge between simulate jobs for different
+        timesteps in the job graph (see `_make_within_bundle_previous_simulate_job_edges`).
+
+        Arguments
+        ---------
+        job_graph: :class:`networkx.DiGraph`
+
+        Returns
+        -------
+        list[str]
+            Sorted list of model names
+        """
+        simulate_jobs = {
+            job_id for job_id, operation in job_graph.nodes(data='operation')
+            if operation == ModelOperation.SIMULATE
+        }
+
+        # jobs which must wait for a job from another timestep
+        dependent_jobs = set()
+        for from_id, to_id in job_graph.edges:
+            if from_id in simulate_jobs and to_id in simulate_jobs \
+                    and to_id not in dependent_jobs \
+                    and job_graph.nodes[from_id]['current_timestep'] != \
+                    job_graph.nodes[to_id]['current_timestep']:
+                dependent_jobs.add(to_id)
+                dependent_jobs.update(nx.descendants(job_graph, to_id))
+
+        models = {job_graph.nodes[job_id]['model'].name for job_id in simulate_jobs}
+        dependent_models = {
+            job_graph.nodes[job_id]['model'].name
+            for job_id in dependent_jobs & simulate_jobs
+        }
+        return sorted(models - dependent_models)
+
     @staticmethod
     def filter_job_graph(modelrun_name, job_graph, complete_jobs):
         filtered = job_graph.copy()
@@ -423,6 +506,44 @@ class ModelRunner(object):
             edges.append((from_id, to_id))
         return edges
 
+    @staticmethod
+    def _make_decide_job_nodes(modelrun_name, decision_manager, bundle, horizon):
+        return [
+            (
+                ModelRunner._make_job_id(
+                    modelrun_name, None, ModelOperation.DECIDE, timestep, decision_iteration),
+                {
+                    'model': None,
+                    'decision_manager': decision_manager,
+                    'modelrun_name': modelrun_name,
+                    'current_timestep': timestep,
+                    'timesteps': horizon,
+                    'decision_iteration': decision_iteration,
+                    'operation': ModelOperation.DECIDE
+                }
+            )
+            for decision_iteration, timestep in itertools.product(
+                bundle['decision_iterations'], bundle['timesteps'])
+        ]
+
+    @staticmethod
+    def _make_decide_job_edges(modelrun_name, models, bundle):
+        edges = []
+        previous_id = None
+        for decision_iteration, timestep in itertools.product(
+                bundle['decision_iterations'], bundle['timesteps']):
+            decide_id = ModelRunner._make_job_id(
+                modelrun_name, None, ModelOperation.DECIDE, timestep, decision_iteration)
+            if previous_id is not None:
+                edges.append((previous_id, decide_id))
+            previous_id = decide_id
+            for model in models:
+                to_id = ModelRunner._make_job_id(
+                    modelrun_name, model.name, ModelOperation.SIMULATE, timestep,
+                    decision_iteration)
+                edges.append((decide_id, to_id))
+        return edges
+
     @staticmethod
     def _make_simulate_job_nodes(modelrun_name, models, decision_iteration, timestep, horizon):
         return [
@@ -508,6 +629,9 @@ class ModelRunner(object):
                      decision_iteration=None):
         if operation == ModelOperation.BEFORE_MODEL_RUN:
             id_ = '%s_%s_%s' % (modelrun_name, operation.value, model_name)
+        elif operation == ModelOperation.DECIDE:
+            id_ = '%s_%s_%s_%s' % (
+                modelrun_name, operation.value, timestep, decision_iteration)
         else:
             id_ = '%s_%s_%s_%s_%s' % (
                 modelrun_name, operation.value, timestep, decision_iteration, model_name)
@@ -10,8 +10,11 @@ Calls smif run ... on the selected model in a sub process, where ...
 are the options set in the app for info/debug messages, warm start
 and output format.
 """
+import heapq
+import itertools
 import subprocess
-from collections import defaultdict
+import threading
+from collections import defaultdict, deque
 from datetime import datetime
 
 
@@ -19,13 +22,36 @@ class SubProcessRunScheduler(object):
     """The scheduler can run instances of smif as a subprocess
     and can provide information whether the modelrun is running,
     is done or has failed.
+
+    Model runs are queued and started in order of priority, then in the order they were
+    added, with at most `max_concurrent` running at once. Output from each subprocess is
+    read by a background thread into a bounded buffer, so checking status does not wait on
+    the model run.
+
+    Parameters
+    ----------
+    max_concurrent: int, default=1
+        Maximum number of model runs to run at once
+    max_output_lines: int, default=1000
+        Number of the most recent lines of output to keep for each model run
     """
-    def __init__(self):
+    def __init__(self, max_concurrent=1, max_output_lines=1000):
+        if max_concurrent < 1:
+            raise ValueError(
+                "Expected at least one concurrent model run, got {}".format(max_concurrent))
+        self.max_concurrent = max_concurrent
+        self.max_output_lines = max_output_lines
         self._status = defaultdict(lambda: 'unstarted')
         self._process = {}
-        self._output = defaultdict(str)
-        self._err = {}
-        self.lock = False
+        self._header = defaultdict(str)
+        self._output = {}
+        self._dropped_lines = defaultdict(int)
+        self._readers = {}
+        self._queue = []
+        self._queue_order = itertools.count()
+        self._args = {}
+        self._running = set()
+        self.lock = threading.RLock()
 
     def add(self, model_run_name, args):
         """Add a model_run to the Modelrun scheduler.
@@ -35,74 +61,131 @@ class SubProcessRunScheduler(object):
         model_run_name: str
             Name of the modelrun
         args: dict
-            Arguments for the command-line interface
+            Arguments for the command-line interface, and optionally 'priority' (int,
+            default 0) - model runs with higher priority are started first
 
         Exception
         ---------
         Exception
-            When the modelrun was already started
+            When the modelrun was already started or queued
 
         Notes
         -----
-        There is no queuing mechanism implemented, each `add`
-        will directly start a subprocess. This means that it
-        is possible to run multiple modelruns concurrently.
-        This may cause conflicts, it depends on the
-        implementation whether a certain sector model / wrapper
-        touches the filesystem or other shared resources.
+        Running several modelruns concurrently may cause conflicts, it depends on the
+        implementation whether a certain sector model / wrapper touches the filesystem or
+        other shared resources.
         """
-        if self._status[model_run_name] != 'running':
-            self._output[model_run_name] = ''
+        with self.lock:
+            if self._status[model_run_name] in ('running', 'queing'):
+                raise Exception('Model is already running.')
+
+            self._header[model_run_name] = ''
+            self._output[model_run_name] = deque(maxlen=self.max_output_lines)
+            self._dropped_lines[model_run_name] = 0
             self._status[model_run_name] = 'queing'
+            self._args[model_run_name] = args
+            heapq.heappush(self._queue, (
+                -int(args.get('priority', 0)), next(self._queue_order), model_run_name))
+            self._start_queued()
 
-            smif_call = (
-                'smif run ' +
-                '-'*(int(args['verbosity']) > 0) + 'v'*int(args['verbosity']) + ' ' +
-                model_run_name + ' ' +
-                '-d' + ' ' + args['directory'] + ' ' +
-                '-w'*args['warm_start'] + ' '*args['warm_start'] +
-                '-i' + ' ' + args['output_format']
-            )
-
-            self._process[model_run_name] = subprocess.Popen(
-                smif_call,
-                shell=True,
-                stdout=subprocess.PIPE, stderr=subprocess.STDOUT
-            )
-            format_args = {
-                'model_run_name': model_run_name,
-                'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'pid': str(self._process[model_run_name].pid),
-                'smif_call': smif_call,
-                'colour': "\x1b[1;34m",
-                'reset': "\x1b[0m",
-                'space': " \x1b"
-            }
-            format_str = """\
-                {colour}Modelrun{reset} {model_run_name}
-                {colour}Time{reset}     {datetime}
-                {colour}PID{reset}      {pid}
-                {colour}Command{reset}  {smif_call}
-                """
-            format_str.replace(" ", "{space}")
-            output = format_str.format(**format_args)
-            output += "-" * 100 + "\n"
-            self._output[model_run_name] = output
-            self._status[model_run_name] = 'running'
+    def _start_queued(self):
+        """Start queued model runs while there are fewer than `max_concurrent` running
+        """
+        while self._queue and len(self._running) < self.max_concurrent:
+            _, _, model_run_name = heapq.heappop(self._queue)
+            if self._status[model_run_name] == 'queing':
+                self._start(model_run_name, self._args.pop(model_run_name))
+
+    def _start(self, model_run_name, args):
+        smif_call = (
+            'smif run ' +
+            '-'*(int(args['verbosity']) > 0) + 'v'*int(args['verbosity']) + ' ' +
+            model_run_name + ' ' +
+            '-d' + ' ' + args['directory'] + ' ' +
+            '-w'*args['warm_start'] + ' '*args['warm_start'] +
+            '-i' + ' ' + args['output_format']
+        )
+
+        process = subprocess.Popen(
+            smif_call,
+            shell=True,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        self._process[model_run_name] = process
+        format_args = {
+            'model_run_name': model_run_name,
+            'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'pid': str(process.pid),
+            'smif_call': smif_call,
+            'colour': "\x1b[1;34m",
+            'reset': "\x1b[0m",
+            'space': " \x1b"
+        }
+        format_str = """\
+            {colour}Modelrun{reset} {model_run_name}
+            {colour}Time{reset}     {datetime}
+            {colour}PID{reset}      {pid}
+            {colour}Command{reset}  {smif_call}
+            """
+        format_str.replace(" ", "{space}")
+        output = format_str.format(**format_args)
+        output += "-" * 100 + "\n"
+        self._header[model_run_name] = output
+        self._status[model_run_name] = 'running'
+        self._running.add(model_run_name)
+
+        reader = threading.Thread(
+            target=self._read_output, args=(model_run_name, process), daemon=True)
+        self._readers[model_run_name] = reader
+        reader.start()
+
+    def _read_output(self, model_run_name, process):
+        """Read output from a model run subprocess until it exits, in a background thread
+        """
+        output = self._output[model_run_name]
+        for line in iter(process.stdout.readline, b''):
+            with self.lock:
+                if len(output) == output.maxlen:
+                    self._dropped_lines[model_run_name] += 1
+                output.append(line.decode(errors='replace'))
+        process.wait()
+        with self.lock:
+            self._update(model_run_name)
+
+    def _update(self, model_run_name):
+        """Check whether a running model run has exited, and if so start the next queued run
+        """
+        if self._status[model_run_name] != 'running':
+            return
+        returncode = self._process[model_run_name].poll()
+        if returncode is None:
+            return
+        if returncode == 0:
+            self._status[model_run_name] = 'done'
         else:
-            raise Exception('Model is already running.')
+            self._status[model_run_name] = 'failed'
+        self._running.discard(model_run_name)
+        self._start_queued()
 
     def kill(self, model_run_name):
-        """ Kill a Modelrun that is already running
+        """ Kill a Modelrun that is already running, or remove it from the queue
 
         Parameters
         ----------
         model_run_name: str
             Name of the modelrun
         """
-        if self._status[model_run_name] == 'running':
-            self._process[model_run_name].kill()
-            self._status[model_run_name] = 'stopped'
+        with self.lock:
+            if self._status[model_run_name] == 'running':
+                self._process[model_run_name].kill()
+                self._status[model_run_name] = 'stopped'
+                self._running.discard(model_run_name)
+                self._start_queued()
+            elif self._status[model_run_name] == 'queing':
+                self._queue = [item for item in self._queue if item[2] != model_run_name]
+                heapq.heapify(self._queue)
+                del self._args[model_run_name]
+                self._status[model_run_name] = 'stopped'
 
     def get_scheduler_type(self):
         return "default"
@@ -137,21 +220,17 @@ class SubProcessRunScheduler(object):
             Model run was completed succesfully
         failed:
             Model run completed running with an exit code
+
+        Only the most recent `max_output_lines` lines of output are returned.
         """
-        if self._status[model_run_name] == 'running':
-            if self.lock is False:
-                self.lock = True
-                for line in iter(self._process[model_run_name].stdout.readline, b''):
-                    self._output[model_run_name] += line.decode()
-                    self._process[model_run_name].stdout.flush()
-                self.lock = False
-
-            if self._process[model_run_name].poll() == 0:
-                self._status[model_run_name] = 'done'
-            elif self._process[model_run_name].poll() == 1:
-                self._status[model_run_name] = 'failed'
-
-        return {
-            'status': self._status[model_run_name],
-            'output': self._output[model_run_name]
-        }
+        with self.lock:
+            self._update(model_run_name)
+            output = self._header[model_run_name]
+            if self._dropped_lines[model_run_name]:
+                output += "[{} earlier lines not shown]\n".format(
+                    self._dropped_lines[model_run_name])
+            output += ''.join(self._output.get(model_run_name, ()))
+            return {
+                'status': self._status[model_run_name],
+                'output': output
+            }
@@ -4,9 +4,12 @@ data between units or dimensions.
 The method to override is `generate_coefficients`, which accepts two
 :class:`~smif.metadata.spec.Spec` definitions.
 """
+import hashlib
 from abc import ABCMeta, abstractmethod
 
 import numpy as np  # type: ignore
+from smif.data_layer.coefficients import (convert_with_sparse_coefficients,
+                                          issparse)
 from smif.data_layer.data_array import DataArray
 from smif.data_layer.data_handle import DataHandle
 from smif.exception import SmifDataNotFoundError
@@ -35,7 +38,7 @@ class Adaptor(Model, metaclass=ABCMeta):
     def get_coefficients(self,
                          data_handle: DataHandle,
                          from_spec: Spec,
-                         to_spec: Spec) -> np.ndarray:
+                         to_spec: Spec):
         """Read coefficients, or generate and save if necessary
 
         Parameters
@@ -46,11 +49,13 @@ class Adaptor(Model, metaclass=ABCMeta):
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or scipy.sparse.csr_matrix
+            Shared with other adaptors once read from the store, so must not be modified
         """
         from_dim, to_dim = self.get_convert_dims(from_spec, to_spec)
+        digest = _coords_digest(from_spec.dim_coords(from_dim), to_spec.dim_coords(to_dim))
         try:
-            coefficients = data_handle.read_coefficients(from_dim, to_dim)
+            coefficients = data_handle.read_coefficients(from_dim, to_dim, digest)
         except SmifDataNotFoundError:
             msg = "Generating coefficients for %s to %s"
             self.logger.info(msg, from_dim, to_dim)
@@ -60,7 +65,7 @@ class Adaptor(Model, metaclass=ABCMeta):
         return coefficients
 
     @abstractmethod
-    def generate_coefficients(self, from_spec: Spec, to_spec: Spec) -> np.ndarray:
+    def generate_coefficients(self, from_spec: Spec, to_spec: Spec):
         """Generate coefficients for a pair of :class:`~smif.metadata.spec.Spec` definitions
 
         Parameters
@@ -70,21 +75,22 @@ class Adaptor(Model, metaclass=ABCMeta):
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or scipy.sparse.csr_matrix
+            2D coefficients, which may be sparse for large, mostly-zero conversions
         """
         raise NotImplementedError
 
     def convert(self,
                 data_array: DataArray,
                 to_spec: Spec,
-                coefficients: np.ndarray):
+                coefficients):
         """Convert a dataset between :class:`~smif.metadata.spec.Spec` definitions
 
         Parameters
         ----------
         data: smif.data_layer.data_array.DataArray
         to_spec : smif.metadata.spec.Spec
-        coefficients : numpy.ndarray
+        coefficients : numpy.ndarray or scipy.sparse.spmatrix
 
         Returns
         -------
@@ -116,14 +122,14 @@ class Adaptor(Model, metaclass=ABCMeta):
 
     @staticmethod
     def convert_with_coefficients(data: np.ndarray,
-                                  coefficients: np.ndarray,
+                                  coefficients,
                                   axis: int):
         """Unchecked conversion, given data, coefficients and axis
 
         Parameters
         ----------
         data : numpy.ndarray
-        coefficients : numpy.ndarray
+        coefficients : numpy.ndarray or scipy.sparse.spmatrix
         axis : integer
             Axis along which to apply conversion coefficients
 
@@ -131,6 +137,9 @@ class Adaptor(Model, metaclass=ABCMeta):
         -------
         numpy.ndarray
         """
+        if issparse(coefficients):
+            return convert_with_sparse_coefficients(data, coefficients, axis)
+
         # Effectively a tensor contraction (the generalisation of dot product to multi-
         # dimensional ndarrays, tensors) implemented using the Einstein summation convention,
         # np.einsum, which lets us be explicit which dimensions we sum along.
@@ -174,3 +183,13 @@ class Adaptor(Model, metaclass=ABCMeta):
         to_convert_dim = to_convert_dims.pop()
 
         return from_convert_dim, to_convert_dim
+
+
+def _coords_digest(*coords):
+    """Identify coefficients by the elements of the dimensions they convert between
+    """
+    digest = hashlib.sha1()
+    for coord in coords:
+        digest.update("\n".join(str(id_) for id_ in coord.ids).encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -130,6 +130,7 @@ Development Notes
 """
 import logging
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 import numpy as np  # type: ignore
 from isodate import parse_duration  # type: ignore
@@ -221,10 +222,13 @@ class Interval(object):
             "Interval 'id' starts at hour 0 and ends at hour 1"
 
     """
+    __slots__ = ('_name', '_baseyear', '_interval', '_bounds')
+
+    logger = logging.getLogger(__name__)
+
     def __init__(self, name, list_of_intervals, base_year=BASE_YEAR):
         self._name = name
         self._baseyear = base_year
-        self.logger = logging.getLogger(__name__)
 
         if not list_of_intervals:
             msg = "Must construct Interval with at least one interval"
@@ -236,21 +240,33 @@ class Interval(object):
                 if len(interval) != 2:
                     msg = "Interval tuple must take form (<start>, <end>)"
                     raise ValueError(msg)
-            self._interval = list_of_intervals
+            self._set_intervals(list_of_intervals)
         elif isinstance(list_of_intervals, tuple):
-            self._interval = []
-            self._interval.append(list_of_intervals)
+            self._set_intervals([list_of_intervals])
         else:
             msg = "Interval tuple must take form (<start>, <end>)"
             raise ValueError(msg)
 
-        self._validate()
-
-    def _validate(self):
-        for lower, upper in self.bounds:
-            if lower > upper:
-                msg = "A time interval must not end before it starts - found %d > %d"
-                raise ValueError(msg, lower, upper)
+    def _set_intervals(self, list_of_intervals):
+        """Parse intervals to hours once, keeping the (start, end) hours of each interval in
+        sorted order as rows of an integer array
+        """
+        bounds = np.array(
+            [
+                (self._convert_to_hours(start), self._convert_to_hours(end))
+                for start, end in sorted(list_of_intervals)
+            ],
+            dtype='int32'
+        ).reshape((-1, 2))
+
+        backwards = bounds[:, 0] > bounds[:, 1]
+        if backwards.any():
+            lower, upper = bounds[backwards][0]
+            msg = "A time interval must not end before it starts - found %d > %d"
+            raise ValueError(msg, lower, upper)
+
+        self._interval = list_of_intervals
+        self._bounds = bounds
 
     @property
     def name(self):
@@ -305,17 +321,15 @@ class Interval(object):
     @interval.setter
     def interval(self, value):
         if isinstance(value, tuple):
-            self._interval.append(value)
+            self._set_intervals(self._interval + [value])
         elif isinstance(value, list):
             for element in value:
                 assert isinstance(element, tuple), "A time interval must be a tuple"
-            self._interval.extend(value)
+            self._set_intervals(self._interval + value)
         else:
             msg = "A time interval must add either a single tuple or a list of tuples"
             raise ValueError(msg)
 
-        self._validate()
-
     @property
     def baseyear(self):
         """The reference year
@@ -355,12 +369,7 @@ class Interval(object):
             of the interval
 
         """
-        hours = []
-        for start_interval, end_interval in self.interval:
-            start = self._convert_to_hours(start_interval)
-            end = self._convert_to_hours(end_interval)
-            hours.append((start, end))
-        return hours
+        return [tuple(bound) for bound in self._bounds.tolist()]
 
     def _convert_to_hours(self, duration):
         """
@@ -376,15 +385,7 @@ class Interval(object):
             The hour in the year associated with the duration
 
         """
-        reference = datetime(self._baseyear, 1, 1, 0)
-        parsed_duration = parse_duration(duration)
-        if isinstance(parsed_duration, timedelta):
-            hours = parsed_duration.days * 24 + \
-                    parsed_duration.seconds // 3600
-        else:
-            time = parsed_duration.totimedelta(reference)
-            hours = time.days * 24 + time.seconds // 3600
-        return hours
+        return _convert_to_hours(duration, self._baseyear)
 
     def to_hourly_array(self):
         """Converts a list of intervals to a boolean array of hours
@@ -395,11 +396,29 @@ class Interval(object):
             A boolean array
         """
         array = np.zeros(8760, dtype=np.int)
-        for lower, upper in self.bounds:
+        for lower, upper in self._bounds:
             array[lower:upper] += 1
         return array
 
 
+@lru_cache(maxsize=None)
+def _convert_to_hours(duration, base_year):
+    """Parse an ISO8601 duration to hours from the beginning of the base year
+
+    Cached for the process, as the intervals of a dimension are often defined using the same
+    few durations.
+    """
+    reference = datetime(base_year, 1, 1, 0)
+    parsed_duration = parse_duration(duration)
+    if isinstance(parsed_duration, timedelta):
+        hours = parsed_duration.days * 24 + \
+                parsed_duration.seconds // 3600
+    else:
+        time = parsed_duration.totimedelta(reference)
+        hours = time.days * 24 + time.seconds // 3600
+    return hours
+
+
 class IntervalSet(ResolutionSet):
     """A collection of intervals
 
@@ -417,8 +436,17 @@ class IntervalSet(ResolutionSet):
         self.logger = logging.getLogger(__name__)
         self.name = name
         self._base_year = base_year
+        self._bool_array = None
         self.data = data
-        self.bool_array = self._make_intersection_array()
+
+    @property
+    def bool_array(self):
+        """A boolean array where rows correspond to entries in the interval set and columns
+        represent hours of the year, made when first used
+        """
+        if self._bool_array is None:
+            self._bool_array = self._make_intersection_array()
+        return self._bool_array
 
     def _make_intersection_array(self):
         """
@@ -429,8 +457,8 @@ class IntervalSet(ResolutionSet):
             set and columns represent hours of the year
         """
         array = np.zeros((len(self.data), 8760), dtype=np.bool)
-        for row, interval in enumerate(self.data):
-            array[row, :] = interval.to_hourly_array()
+        hours = np.nonzero(self._hour_index >= 0)[0]
+        array[self._hour_index[hours], hours] = True
         return array
 
     @staticmethod
@@ -468,6 +496,49 @@ class IntervalSet(ResolutionSet):
 
         return proportion
 
+    def get_proportions(self, to_set):
+        """Find the proportion of each interval in each interval of `to_set`
+
+        Equivalent to :py:meth:`get_proportion` for every pair of intervals. Intervals in a
+        set do not overlap, so each hour of the year is in at most one interval of each set.
+        The hours in common between each pair of intervals are counted from the index of the
+        interval containing each hour, rather than comparing hourly arrays pair by pair.
+
+        Arguments
+        ---------
+        to_set : IntervalSet
+
+        Returns
+        -------
+        tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+            Source and destination indices of each intersecting pair of intervals, and the
+            proportion
+        """
+        if not isinstance(to_set, IntervalSet):
+            raise NotImplementedError
+
+        from_index, from_bounds = self._hour_index, self._n_bounds
+        to_index, to_bounds = to_set._hour_index, to_set._n_bounds
+        in_both = (from_index >= 0) & (to_index >= 0)
+
+        # count the hours in each intersection, using a single key for each pair
+        pairs = from_index[in_both] * len(to_set) + to_index[in_both]
+        pairs, intersection_duration = np.unique(pairs, return_counts=True)
+        rows, cols = np.divmod(pairs, len(to_set))
+
+        from_duration = np.bincount(from_index[from_index >= 0], minlength=len(self))
+        proportions = intersection_duration / from_duration[rows]
+
+        # scale for resampling or remapping, as in get_proportion
+        from_bounds = from_bounds[rows]
+        to_bounds = to_bounds[cols]
+        resample = from_bounds > 2
+        remap = ~resample & (to_bounds > 2)
+        proportions[resample] *= from_bounds[resample]
+        proportions[remap] /= to_bounds[remap]
+
+        return rows, cols, proportions
+
     def _compute_proportion(self, from_interval, to_interval):
         from_hours = from_interval.to_hourly_array()
         to_hours = to_interval.to_hourly_array()
@@ -489,8 +560,7 @@ class IntervalSet(ResolutionSet):
         -------
         float
         """
-        compact_array = np.sum(self.bool_array, axis=1)
-        coverage_value = np.sum(compact_array, axis=0)
+        coverage_value = np.count_nonzero(self._hour_index >= 0)
         self.logger.debug("Coverage of %s is %s", self.name, coverage_value)
         return coverage_value
 
@@ -508,14 +578,13 @@ class IntervalSet(ResolutionSet):
 
         Notes
         -----
-        Look at the columns of the intersection array and identify
-        overlapping intervals
+        Look up the intervals containing each hour of each of the bounds
         """
         elements = []
 
         for lower, upper in to_entry.bounds:
-            bool_array = np.sum(self.bool_array[:, lower:upper], axis=1)
-            intersect = np.nonzero(bool_array)[0]
+            intersect = np.unique(self._hour_index[lower:upper])
+            intersect = intersect[intersect >= 0]
             self.logger.debug(
                 "Interval '%s' intersects with '%s'",
                 to_entry.name, ",".join([str(self.data[x].name) for x in intersect])
@@ -568,22 +637,49 @@ class IntervalSet(ResolutionSet):
                 Interval(name, interval_list, self._base_year))
             names[name] = len(self._data) - 1
 
+        self._index_intervals()
+
+    def _index_intervals(self):
+        """Collect the bounds of all intervals, check that they do not overlap, then find the
+        interval containing each hour of the year
+        """
+        n_bounds = [len(interval._bounds) for interval in self._data]
+        if self._data:
+            bounds = np.concatenate([interval._bounds for interval in self._data])
+        else:
+            bounds = np.zeros((0, 2), dtype='int32')
+        # hours beyond the end of the year are ignored
+        self._all_bounds = np.minimum(bounds, 8760)
+        self._n_bounds = np.array(n_bounds, dtype='int64')
+        self._bool_array = None
+
         self._validate_intervals()
 
+        rows = np.repeat(np.arange(len(self._data)), n_bounds)
+        index = np.full(8760, -1, dtype='int64')
+        for (lower, upper), row in zip(self._all_bounds.tolist(), rows.tolist()):
+            index[lower:upper] = row
+        self._hour_index = index
+
     def _get_hourly_array(self):
         array = np.zeros(8760, dtype=np.int)
-        for interval in self.data:
-            array += interval.to_hourly_array()
+        for lower, upper in self._all_bounds:
+            array[lower:upper] += 1
         return array
 
     def _validate_intervals(self):
-        if self.data:
-            array = self._get_hourly_array()
-            duplicate_hours = np.where(array > 1)[0]
-            if duplicate_hours.size > 0:
-                hour = duplicate_hours[0]
-                msg = "Duplicate entry for hour {} in interval set {}."
-                raise ValueError(msg.format(hour, self.name))
+        """Check that no hour is in more than one interval, sweeping through all bounds in
+        order of start hour
+        """
+        bounds = self._all_bounds[self._all_bounds[:, 0] < self._all_bounds[:, 1]]
+        bounds = bounds[np.argsort(bounds[:, 0], kind='stable')]
+        # each bound overlaps an earlier bound if it starts before the latest end so far
+        latest_end = np.maximum.accumulate(bounds[:-1, 1])
+        overlaps = np.nonzero(bounds[1:, 0] < latest_end)[0]
+        if overlaps.size > 0:
+            hour = bounds[overlaps[0] + 1, 0]
+            msg = "Duplicate entry for hour {} in interval set {}."
+            raise ValueError(msg.format(hour, self.name))
 
     def get_entry_names(self):
         """Returns the names of the intervals
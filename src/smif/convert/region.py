@@ -1,13 +1,25 @@
 """Handles conversion between the sets of regions used in the `SosModel`
 """
+import os
 from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
 
+import numpy as np  # type: ignore
 from rtree import index  # type: ignore
 from shapely.geometry import mapping, shape  # type: ignore
+from shapely.prepared import prep  # type: ignore
 from shapely.validation import explain_validity  # type: ignore
 from smif.convert.adaptor import Adaptor
 from smif.convert.register import NDimensionalRegister, ResolutionSet
 
+# Use shapely's vectorised operations on arrays of geometries if available (shapely>=2.0)
+try:
+    import shapely  # type: ignore
+    from shapely import STRtree  # type: ignore
+    HAS_VECTORISED_SHAPELY = True
+except ImportError:
+    HAS_VECTORISED_SHAPELY = False
+
 __author__ = "Will Usher, Tom Russell"
 __copyright__ = "Will Usher, Tom Russell"
 __license__ = "mit"
@@ -42,6 +54,11 @@ class RegionAdaptor(Adaptor):
 
 NamedShape = namedtuple('NamedShape', ['name', 'shape'])
 
+# number of intersecting pairs of regions above which to find proportions in a process pool
+PROCESS_POOL_MIN_PAIRS = 100000
+# number of intersecting pairs of regions for each process to work on at a time
+PROCESS_POOL_CHUNK_SIZE = 20000
+
 
 class RegionSet(ResolutionSet):
     """Hold a set of regions, spatially indexed for ease of lookup when
@@ -55,17 +72,21 @@ class RegionSet(ResolutionSet):
         Iterable (probably a list or a reader handle)
         of fiona feature records e.g. the 'features' entry of
         a GeoJSON collection
+    max_workers: int, optional
+        Number of processes to use when finding proportions for many pairs of regions,
+        defaults to the number of CPUs, one to use a single process
 
     """
-    def __init__(self, set_name, elements):
+    def __init__(self, set_name, elements, max_workers=None):
         super().__init__()
         self.name = set_name
+        self.max_workers = max_workers
         self._regions = []
         self.data = [e['feature'] for e in elements]
 
-        self._idx = index.Index()
-        for pos, region in enumerate(self._regions):
-            self._idx.insert(pos, region.shape.bounds)
+        # spatial index and shape validity, found when first needed
+        self._index = None
+        self._valid = False
 
     @property
     def data(self):
@@ -129,6 +150,20 @@ class RegionSet(ResolutionSet):
             for region in self._regions
         ]
 
+    @property
+    def _idx(self):
+        """Spatial index of region bounds, bulk loaded when first used
+        """
+        if self._index is None:
+            if self._regions:
+                self._index = index.Index(
+                    (pos, region.shape.bounds, None)
+                    for pos, region in enumerate(self._regions)
+                )
+            else:
+                self._index = index.Index()
+        return self._index
+
     def intersection(self, to_entry):
         """Return the set of regions intersecting with the bounds of `to_entry`
         """
@@ -138,20 +173,111 @@ class RegionSet(ResolutionSet):
     def get_proportion(self, from_idx, entry_b):
         """Calculate the proportion of shape a that intersects with shape b
         """
+        self.validate()
         entry_a = self.data[from_idx]
-        if self.check_valid_shape(entry_a.shape):
-            if self.check_valid_shape(entry_b.shape):
-                intersection = entry_a.shape.intersection(entry_b.shape)
-                return intersection.area / entry_a.shape.area
-            else:
-                raise RuntimeError("Shape {} is not valid".format(entry_b.name))
+        if self.check_valid_shape(entry_b.shape):
+            intersection = entry_a.shape.intersection(entry_b.shape)
+            return intersection.area / entry_a.shape.area
+        else:
+            raise RuntimeError("Shape {} is not valid".format(entry_b.name))
+
+    def get_proportions(self, to_set):
+        """Find the proportion of each region which intersects each region of `to_set`
+
+        Equivalent to :py:meth:`get_proportion` for every pair of intersecting regions. The
+        shapes of each set are checked for validity once. Where one region contains the other,
+        the proportion is found from their areas, without finding their intersection.
+
+        With shapely>=2.0, intersecting pairs are found with one query of an STRtree and
+        proportions are found for arrays of pairs at once, in a process pool when there are
+        many pairs. Otherwise, each region of `to_set` is prepared and compared with the
+        regions found from the spatial index of this set.
+
+        Arguments
+        ---------
+        to_set : RegionSet
+
+        Returns
+        -------
+        tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+            Source and destination indices of each intersecting pair of regions, and the
+            proportion
+        """
+        if not isinstance(to_set, RegionSet):
+            raise NotImplementedError
+
+        self.validate()
+        to_set.validate()
+
+        if HAS_VECTORISED_SHAPELY:
+            from_shapes = np.array([region.shape for region in self._regions], dtype=object)
+            to_shapes = np.array([region.shape for region in to_set.data], dtype=object)
+            to_idx, from_idx = STRtree(from_shapes).query(to_shapes, predicate='intersects')
+            proportions = self._map_proportions(from_shapes[from_idx], to_shapes[to_idx])
         else:
-            raise RuntimeError("Shape {} from {} is not valid".format(entry_a.name, self.name))
+            from_idx, to_idx, proportions = self._get_prepared_proportions(to_set)
+
+        # regions which only touch have no area in common
+        non_zero = proportions > 0
+        return from_idx[non_zero], to_idx[non_zero], proportions[non_zero]
+
+    def _map_proportions(self, from_shapes, to_shapes):
+        """Find proportions for arrays of pairs of shapes, in chunks across a process pool if
+        there are many pairs
+        """
+        max_workers = self.max_workers or os.cpu_count() or 1
+        if max_workers == 1 or len(from_shapes) < PROCESS_POOL_MIN_PAIRS:
+            return _get_pair_proportions(from_shapes, to_shapes)
+
+        chunks = range(0, len(from_shapes), PROCESS_POOL_CHUNK_SIZE)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(
+                _get_pair_proportions,
+                [from_shapes[start:start + PROCESS_POOL_CHUNK_SIZE] for start in chunks],
+                [to_shapes[start:start + PROCESS_POOL_CHUNK_SIZE] for start in chunks]
+            )
+            return np.concatenate(list(results))
+
+    def _get_prepared_proportions(self, to_set):
+        rows, cols, values = [], [], []
+        for to_idx, to_entry in enumerate(to_set.data):
+            prepared = prep(to_entry.shape)
+            for from_idx in self.intersection(to_entry):
+                from_shape = self._regions[from_idx].shape
+                if prepared.contains(from_shape):
+                    proportion = 1.0
+                elif from_shape.contains(to_entry.shape):
+                    proportion = to_entry.shape.area / from_shape.area
+                elif prepared.intersects(from_shape):
+                    proportion = from_shape.intersection(to_entry.shape).area / from_shape.area
+                else:
+                    continue
+                rows.append(from_idx)
+                cols.append(to_idx)
+                values.append(proportion)
+        return (np.array(rows, dtype='int64'), np.array(cols, dtype='int64'),
+                np.array(values, dtype='float64'))
+
+    def validate(self):
+        """Check that the shape of every region is valid, once for the set
+
+        Raises
+        ------
+        RuntimeError
+            If any shape is not valid
+        """
+        if self._valid:
+            return
+        for region in self._regions:
+            if not self.check_valid_shape(region.shape):
+                raise RuntimeError(
+                    "Shape {} from {} is not valid".format(region.name, self.name))
+        self._valid = True
 
     def check_valid_shape(self, shape):
         if not shape.is_valid:
             validity = explain_validity(shape)
-            print("Shape is not valid. Explanation: %s", validity)
+            self.logger.warning("Shape is not valid. Explanation: %s", validity)
             return False
         else:
             return True
@@ -169,3 +295,35 @@ class RegionSet(ResolutionSet):
 
     def __len__(self):
         return len(self._regions)
+
+
+def _get_pair_proportions(from_shapes, to_shapes):
+    """Find the proportion of the area of each of `from_shapes` which intersects the shape
+    at the same position in `to_shapes`, using shapely's vectorised operations
+
+    Parameters
+    ----------
+    from_shapes : numpy.ndarray
+        Array of shapely geometries
+    to_shapes : numpy.ndarray
+        Array of shapely geometries, of the same length
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    shapely.prepare(to_shapes)
+    from_area = shapely.area(from_shapes)
+    proportions = np.empty(len(from_shapes), dtype='float64')
+
+    # from shapes within to shapes are wholly in the intersection
+    within = shapely.contains(to_shapes, from_shapes)
+    proportions[within] = 1.0
+    # to shapes within from shapes are the intersection
+    contains = ~within & shapely.contains(from_shapes, to_shapes)
+    proportions[contains] = shapely.area(to_shapes[contains]) / from_area[contains]
+
+    overlap = ~(within | contains)
+    intersection = shapely.intersection(from_shapes[overlap], to_shapes[overlap])
+    proportions[overlap] = shapely.area(intersection) / from_area[overlap]
+    return proportions
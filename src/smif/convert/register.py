@@ -10,6 +10,9 @@ from collections import OrderedDict, defaultdict
 from typing import Dict, List
 
 import numpy as np  # type: ignore
+from smif.data_layer.coefficients import (build_coefficients,
+                                          convert_with_sparse_coefficients,
+                                          issparse)
 
 
 class ResolutionSet(metaclass=ABCMeta):
@@ -82,6 +85,30 @@ class ResolutionSet(metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def get_proportions(self, to_set):
+        """Calculate the proportion of each entry in each entry of `to_set`, for all pairs of
+        entries at once
+
+        Override to generate coefficients faster than by calling `intersection` and
+        `get_proportion` for each entry in turn.
+
+        Arguments
+        ---------
+        to_set : ResolutionSet
+
+        Returns
+        -------
+        tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+            The index of each pair of entries with a non-zero proportion in this set and in
+            `to_set`, and the proportion
+
+        Raises
+        ------
+        NotImplementedError
+            If proportions can only be calculated for each pair of entries
+        """
+        raise NotImplementedError
+
     @property
     @abstractmethod
     def coverage(self):
@@ -175,7 +202,7 @@ class Register(LogMixin, metaclass=ABCMeta):
         return converted
 
     @staticmethod
-    def convert_with_coefficients(data, coefficients: np.ndarray, axis=None) -> np.ndarray:
+    def convert_with_coefficients(data, coefficients, axis=None) -> np.ndarray:
         """Convert an array of data using given coefficients, along a given axis
 
         .. deprecated
@@ -184,7 +211,7 @@ class Register(LogMixin, metaclass=ABCMeta):
         Parameters
         ----------
         data: numpy.ndarray
-        coefficients: numpy.ndarray
+        coefficients: numpy.ndarray or scipy.sparse.spmatrix
         axis: integer, optional
 
         Returns
@@ -199,7 +226,12 @@ class Register(LogMixin, metaclass=ABCMeta):
                       "resolution set from data matrix: %s != %s"
                 raise ValueError(msg, coefficients.shape[axis], data_count)
 
-        if axis == 0:
+        if issparse(coefficients):
+            # np.dot does not handle sparse matrices, which convert along the last axis too
+            if axis is None:
+                axis = data.ndim - 1
+            converted = convert_with_sparse_coefficients(data, coefficients, axis)
+        elif axis == 0:
             converted = np.dot(coefficients.T, data)
         elif axis == 1:
             converted = np.dot(data, coefficients)
@@ -280,7 +312,7 @@ class NDimensionalRegister(Register):
             msg = "Data interface not available to write coefficients"
             self.logger.warning(msg)
 
-    def get_coefficients(self, source: str, destination: str) -> np.ndarray:
+    def get_coefficients(self, source: str, destination: str):
         """Get coefficients representing intersection of sets
 
         Arguments
@@ -292,7 +324,7 @@ class NDimensionalRegister(Register):
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or scipy.sparse.csr_matrix
         """
         from_set = self.get_entry(source)
         to_set = self.get_entry(destination)
@@ -307,13 +339,15 @@ class NDimensionalRegister(Register):
 
         return coefficients
 
-    def generate_coefficients(
-            self, from_set: ResolutionSet, to_set: ResolutionSet) -> np.ndarray:
+    def generate_coefficients(self, from_set: ResolutionSet, to_set: ResolutionSet):
         """Generate coefficients for converting between two :class:`ResolutionSet`s
 
         Coefficients for converting a single dimension will always be 2D, of shape
         (len(from_set), len(to_set)).
 
+        Uses :py:meth:`ResolutionSet.get_proportions` if the source set implements it,
+        otherwise finds the proportion for each intersecting pair of entries.
+
         Parameters
         ----------
         from_set : ResolutionSet
@@ -321,15 +355,35 @@ class NDimensionalRegister(Register):
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or scipy.sparse.csr_matrix
+            Sparse if scipy is available and the coefficients are large and mostly zero (see
+            :func:`smif.data_layer.coefficients.build_coefficients`)
         """
-        coefficients = np.zeros((len(from_set), len(to_set)), dtype=np.float)
+        shape = (len(from_set), len(to_set))
         self.logger.debug("Coefficients array is of shape %s for %s to %s",
-                          coefficients.shape, from_set.name, to_set.name)
+                          shape, from_set.name, to_set.name)
+
+        try:
+            rows, cols, values = from_set.get_proportions(to_set)
+        except NotImplementedError:
+            rows, cols, values = self._get_pairwise_proportions(from_set, to_set)
+
+        coefficients = build_coefficients(rows, cols, values, shape)
+        self.logger.debug("Generated %s", coefficients)
+        return coefficients
+
+    def _get_pairwise_proportions(self, from_set: ResolutionSet, to_set: ResolutionSet):
+        """Collect the non-zero proportions for each entry in `to_set` in turn
+        """
+        rows, cols, values = [], [], []
+
+        from_idx_by_name = {}  # type: Dict[str, int]
+        for idx, name in enumerate(from_set.get_entry_names()):
+            from_idx_by_name.setdefault(name, idx)
 
-        from_names = from_set.get_entry_names()
         for to_idx, to_entry in enumerate(to_set):
-            for from_idx in from_set.intersection(to_entry):
+            # an entry may intersect several times, but has a single proportion
+            for from_idx in OrderedDict.fromkeys(from_set.intersection(to_entry)):
                 from_entry = from_set.data[from_idx]
                 proportion = from_set.get_proportion(from_idx, to_entry)
 
@@ -337,8 +391,9 @@ class NDimensionalRegister(Register):
                                   proportion * 100,
                                   to_entry.name, to_idx,
                                   from_entry.name, from_idx)
-                from_idx = from_names.index(from_entry.name)
 
-                coefficients[from_idx, to_idx] = proportion
-        self.logger.debug("Generated %s", coefficients)
-        return coefficients
+                rows.append(from_idx_by_name[from_entry.name])
+                cols.append(to_idx)
+                values.append(proportion)
+
+        return rows, cols, values
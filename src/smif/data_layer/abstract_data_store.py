@@ -226,7 +226,7 @@ class DataStore(metaclass=ABCMeta):
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or scipy.sparse.csr_matrix
 
         Notes
         -----
@@ -247,7 +247,7 @@ class DataStore(metaclass=ABCMeta):
             dimension name
         destination_dim : str
             dimension name
-        data : numpy.ndarray
+        data : numpy.ndarray or scipy.sparse.csr_matrix
 
         Notes
         -----
@@ -277,7 +277,7 @@ class DataStore(metaclass=ABCMeta):
 
     @abstractmethod
     def write_results(self, data, modelrun_name, model_name, timestep=None,
-                      decision_iteration=None):
+                      decision_iteration=None, checksum=None):
         """Write results of a `model_name` in `model_run_name` for a given `output_name`
 
         Parameters
@@ -287,6 +287,10 @@ class DataStore(metaclass=ABCMeta):
         model_name : str
         timestep : int, optional
         decision_iteration : int, optional
+        checksum : str, optional
+            Checksum of the data, if already computed (see
+            :py:meth:`~smif.data_layer.data_array.DataArray.checksum`), for stores which
+            record checksums of results
         """
 
     @abstractmethod
@@ -0,0 +1,126 @@
+"""Conversion coefficients, as dense numpy arrays or as scipy sparse matrices
+
+Coefficients between large dimensions are mostly zeros - each region of one region set
+intersects only a few regions of another. If scipy is installed, coefficients which are large
+and sparse enough are generated, stored and applied as :class:`scipy.sparse.csr_matrix`.
+Small or dense coefficients stay as :class:`numpy.ndarray`.
+"""
+import numpy as np  # type: ignore
+from smif.exception import SmifDataReadError
+
+# Import scipy if available (optional dependency)
+try:
+    import scipy.sparse  # type: ignore
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
+
+
+INSTALL_WARNING = """\
+Please install scipy to read sparse conversion coefficients. Try running:
+    pip install smif[sparse]
+or:
+    conda install scipy
+"""
+
+# coefficients with fewer elements stay dense
+SPARSE_MIN_SIZE = 100 * 100
+# coefficients with a larger proportion of non-zero elements stay dense
+SPARSE_MAX_DENSITY = 0.1
+
+
+def issparse(coefficients):
+    """Check whether coefficients are a scipy sparse matrix
+    """
+    return HAS_SCIPY and scipy.sparse.issparse(coefficients)
+
+
+def build_coefficients(rows, cols, values, shape):
+    """Build 2D coefficients from lists of non-zero elements
+
+    Parameters
+    ----------
+    rows : list[int]
+        Source index of each element
+    cols : list[int]
+        Destination index of each element
+    values : list[float]
+    shape : tuple(int, int)
+
+    Returns
+    -------
+    numpy.ndarray or scipy.sparse.csr_matrix
+        Sparse if scipy is available and there are at least `SPARSE_MIN_SIZE` elements, of
+        which at most `SPARSE_MAX_DENSITY` are non-zero
+    """
+    values = np.asarray(values, dtype='float64')
+    size = shape[0] * shape[1]
+    if HAS_SCIPY and size >= SPARSE_MIN_SIZE and len(values) <= SPARSE_MAX_DENSITY * size:
+        return scipy.sparse.csr_matrix((values, (rows, cols)), shape=shape)
+
+    coefficients = np.zeros(shape, dtype='float64')
+    coefficients[np.asarray(rows, dtype='int64'), np.asarray(cols, dtype='int64')] = values
+    return coefficients
+
+
+def to_dense(coefficients):
+    """Return coefficients as a numpy.ndarray
+    """
+    if issparse(coefficients):
+        return coefficients.toarray()
+    return np.asarray(coefficients)
+
+
+def convert_with_sparse_coefficients(data, coefficients, axis):
+    """Apply sparse coefficients along an axis of an nD array
+
+    Parameters
+    ----------
+    data : numpy.ndarray
+    coefficients : scipy.sparse.spmatrix
+        Of shape (data.shape[axis], n)
+    axis : int
+
+    Returns
+    -------
+    numpy.ndarray
+        With the same shape as data, except for n along `axis`
+    """
+    # flatten all other axes, to convert with a single 2D sparse-dense product
+    moved = np.moveaxis(data, axis, 0)
+    flat = moved.reshape(moved.shape[0], -1)
+    converted = np.asarray(coefficients.T.dot(flat))
+    converted = converted.reshape((coefficients.shape[1],) + moved.shape[1:])
+    return np.ascontiguousarray(np.moveaxis(converted, 0, axis))
+
+
+def dump_sparse_coefficients(file, coefficients):
+    """Write sparse coefficients in scipy's compressed npz format
+
+    Parameters
+    ----------
+    file : str or file-like
+    coefficients : scipy.sparse.spmatrix
+    """
+    scipy.sparse.save_npz(file, coefficients.tocsr())
+
+
+def load_sparse_coefficients(file):
+    """Read sparse coefficients written by :func:`dump_sparse_coefficients`
+
+    Parameters
+    ----------
+    file : str or file-like
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+
+    Raises
+    ------
+    SmifDataReadError
+        If scipy is not installed
+    """
+    if not HAS_SCIPY:
+        raise SmifDataReadError(INSTALL_WARNING)
+    return scipy.sparse.load_npz(file).tocsr()
@@ -1,8 +1,10 @@
 """DataArray provides a thin wrapper around multidimensional arrays and metadata
 """
+import hashlib
 from logging import getLogger
 
 import numpy as np  # type: ignore
+import pyarrow as pa  # type: ignore
 from smif.exception import SmifDataError, SmifDataMismatchError
 from smif.metadata.spec import Spec
 
@@ -130,6 +132,12 @@ class DataArray():
         """
         return self.data
 
+    def checksum(self) -> str:
+        """SHA-1 hex digest of the data values, hashed in place unless the data is not
+        C-contiguous
+        """
+        return hashlib.sha1(memoryview(np.ascontiguousarray(self.data))).hexdigest()
+
     def as_df(self) -> pandas.DataFrame:
         """Access DataArray as a :class:`pandas.DataFrame`
         """
@@ -166,15 +174,13 @@ class DataArray():
         if dims and len(index_names) == 1 and index_names[0] is None:
             # case when an unindexed dataframe was passed in, try to recover automagically
             if set(dims).issubset(set(data_columns)):
+                if name in data_columns:
+                    # read coordinates straight from columns, faster than building an index
+                    return cls(spec, _df_to_ndarray(spec, dataframe, from_columns=True))
                 dataframe = dataframe.set_index(dims)
                 data_columns = dataframe.columns.values.tolist()
                 index_names = dataframe.index.names
 
-        if len(dims) == 1 and isinstance(dataframe.index, pandas.MultiIndex):
-            # case with one-level MultiIndex which xarray seems to reorder unless cast to
-            # simple Index
-            dataframe = dataframe.reset_index().set_index(dims[0])
-
         if name not in data_columns or (dims and set(dims) != set(index_names)):
             msg = "Data for '{name}' expected a data column called '{name}' and index " + \
                   "names {dims}, instead got data columns {data_columns} and index names " + \
@@ -185,26 +191,68 @@ class DataArray():
                 data_columns=data_columns,
                 index_names=index_names))
 
-        try:
-            # convert to dataset
-            xr_dataset = dataframe.to_xarray()
+        if not dims:
+            return cls(spec, dataframe[name].values)
 
-            # extract xr.DataArray
-            xr_data_array = xr_dataset[spec.name]
+        return cls(spec, _df_to_ndarray(spec, dataframe))
 
-            # reindex to ensure data order and fill out NaNs
-            xr_data_array = _reindex_xr_data_array(spec, xr_data_array)
+    def to_arrow(self):
+        """Access DataArray as a :class:`pyarrow.Table`
 
-        # xarray raises Exception in v0.10 (narrowed to ValueError in v0.11)
-        except Exception as ex:  # pylint: disable=broad-except
-            dups = find_duplicate_indices(dataframe)
-            if dups:
-                msg = "Data for '{name}' contains duplicate values at {dups}"
-                raise SmifDataMismatchError(msg.format(name=name, dups=dups)) from ex
-            else:
-                raise ex
+        Each dimension is a dictionary-encoded column, with the coordinate ids as the
+        dictionary and integer codes computed directly from the shape of the data, so no
+        index of coordinate tuples is built. Rows are in the order of the flattened data.
+        """
+        if not self.dims:
+            if self.data.shape != ():
+                msg = "Expected zero-dimensional data, got %s" % self.data.shape
+                raise SmifDataMismatchError(msg)
+            return pa.table({self.name: pa.array([self.data[()]])})
+
+        columns = {}
+        shape = self.shape
+        for axis, coords in enumerate(self.coords):
+            codes = np.arange(shape[axis], dtype=_dictionary_code_dtype(shape[axis]))
+            # each code repeats for every cell in the following dims, and the whole run
+            # repeats for every cell in the preceding dims
+            codes = np.tile(
+                np.repeat(codes, int(np.prod(shape[axis + 1:]))),
+                int(np.prod(shape[:axis])))
+            columns[coords.name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes), pa.array(coords.ids))
+        columns[self.name] = pa.array(self.data.reshape(self.data.size))
+        return pa.table(columns)
 
-        return cls(spec, xr_data_array.data)
+    @classmethod
+    def from_arrow(cls, spec, table):
+        """Create a DataArray from a :class:`pyarrow.Table`
+
+        The table must have a column for each dimension, which may be dictionary-encoded,
+        and a data column named for the spec. Rows may be in any order, and any missing
+        values are filled with NaN.
+        """
+        name = spec.name
+        dims = spec.dims
+
+        column_names = table.column_names
+        if name not in column_names or not set(dims).issubset(column_names):
+            msg = "Data for '{name}' expected a data column called '{name}' and " + \
+                  "dimension columns {dims}, instead got columns {column_names}"
+            raise SmifDataMismatchError(msg.format(
+                name=name, dims=dims, column_names=column_names))
+
+        values = table.column(name).to_numpy()
+        if not dims:
+            return cls(spec, values)
+
+        positions = [_arrow_coord_positions(spec, table, dim) for dim in dims]
+
+        def find_duplicates(flat_positions):
+            rows = np.flatnonzero(pandas.Series(flat_positions).duplicated().values)
+            duplicates = table.select(dims).take(pa.array(rows)).to_pydict()
+            return [dict(zip(duplicates, row)) for row in zip(*duplicates.values())]
+
+        return cls(spec, _place_values(spec, positions, values, find_duplicates))
 
     def as_xarray(self):
         """Access DataArray as a :class:`xarray.DataArray`
@@ -305,6 +353,155 @@ def _array_equal_nan(a, b):
         return np.all(a == b)
 
 
+def _df_to_ndarray(spec, dataframe, from_columns=False):
+    """Place values from a DataFrame in an array matching the dims and coords of `spec`,
+    filling any missing values with NaN
+
+    Each index level (or column, if `from_columns`) is matched against the coordinates of its
+    dimension, then values are written directly to their position in the flattened array.
+    """
+    values = dataframe[spec.name].values
+
+    positions = []
+    for dim in spec.dims:
+        if from_columns:
+            dim_values = dataframe[dim]
+        else:
+            dim_values = dataframe.index
+        dim_positions = _coord_positions(dim_values, dim, spec.dim_names(dim))
+        unexpected = dim_positions == -1
+        if unexpected.any():
+            # all index values must exist in dimension - extras would otherwise be dropped
+            if from_columns:
+                index_values = dataframe[dim].values
+            else:
+                index_values = dataframe.index.get_level_values(dim)
+            msg = "Data for '{name}' contained unexpected values in the set of " + \
+                  "coordinates for dimension '{dim}': {extras}"
+            raise SmifDataMismatchError(msg.format(
+                dim=dim, extras=list(set(index_values[unexpected])), name=spec.name))
+        positions.append(dim_positions)
+
+    def find_duplicates(flat_positions):
+        if from_columns:
+            return find_duplicate_indices(dataframe.set_index(spec.dims))
+        return find_duplicate_indices(dataframe)
+
+    return _place_values(spec, positions, values, find_duplicates)
+
+
+def _place_values(spec, positions, values, find_duplicates):
+    """Write values to their position in an array matching the dims and coords of `spec`,
+    filling any missing values with NaN
+
+    Parameters
+    ----------
+    spec: smif.metadata.spec.Spec
+    positions: list[numpy.ndarray]
+        Position of each value along each dimension
+    values: numpy.ndarray
+    find_duplicates: function
+        Called with the flattened position of each value, to list duplicate coordinates
+        for an error message
+    """
+    size = int(np.prod(spec.shape))
+    flat_positions = np.ravel_multi_index(positions, spec.shape)
+    if len(flat_positions) == size and \
+            np.array_equal(flat_positions, np.arange(size)):
+        # already in order and complete
+        return np.array(values).reshape(spec.shape)
+
+    filled = np.zeros(size, dtype='bool')
+    filled[flat_positions] = True
+    if np.count_nonzero(filled) != len(flat_positions):
+        msg = "Data for '{name}' contains duplicate values at {dups}"
+        raise SmifDataMismatchError(msg.format(
+            name=spec.name, dups=find_duplicates(flat_positions)))
+
+    if len(flat_positions) == size:
+        data = np.empty(size, dtype=values.dtype)
+    else:
+        dtype, fill_value = _promote_for_missing(values.dtype)
+        data = np.full(size, fill_value, dtype=dtype)
+    data[flat_positions] = values
+    return data.reshape(spec.shape)
+
+
+def _coord_positions(dim_values, dim, dim_names):
+    """Find the position in `dim_names` of each value of `dim`, or -1 if not found
+
+    Parameters
+    ----------
+    dim_values: pandas.Series or pandas.Index or pandas.MultiIndex
+        Column or index with values of `dim`, or a MultiIndex with a level named `dim`
+    dim: str
+    dim_names: list
+    """
+    dim_index = pandas.Index(dim_names)
+    if isinstance(dim_values, pandas.MultiIndex):
+        level = dim_values.names.index(dim)
+        codes, uniques = dim_values.codes[level], dim_values.levels[level]
+    elif isinstance(dim_values, pandas.Series):
+        codes, uniques = pandas.factorize(dim_values)
+    else:
+        return dim_index.get_indexer(dim_values)
+    # match each distinct value once, then look up by code - codes of -1 (missing values)
+    # pick the -1 appended at the end
+    return np.append(dim_index.get_indexer(uniques), -1)[codes]
+
+
+def _arrow_coord_positions(spec, table, dim):
+    """Find the position in the coordinates of `dim` of each value in its column of `table`
+
+    Each distinct value is matched once, using the dictionary of each chunk of the column.
+    """
+    dim_index = pandas.Index(spec.dim_names(dim))
+    column = table.column(dim)
+    if not pa.types.is_dictionary(column.type):
+        column = column.dictionary_encode()
+
+    chunk_positions = []
+    for chunk in column.chunks:
+        # null codes pick the -1 appended at the end
+        lookup = np.append(dim_index.get_indexer(chunk.dictionary.to_pandas()), -1)
+        codes = chunk.indices.fill_null(-1).to_numpy()
+        chunk_positions.append(lookup[codes])
+    if chunk_positions:
+        positions = np.concatenate(chunk_positions)
+    else:
+        positions = np.array([], dtype='int64')
+
+    unexpected = positions == -1
+    if unexpected.any():
+        msg = "Data for '{name}' contained unexpected values in the set of " + \
+              "coordinates for dimension '{dim}': {extras}"
+        extras = table.column(dim).filter(pa.array(unexpected)).unique().to_pylist()
+        raise SmifDataMismatchError(msg.format(dim=dim, extras=extras, name=spec.name))
+    return positions
+
+
+def _dictionary_code_dtype(length):
+    """Find the smallest integer type for dictionary codes of `length` values
+    """
+    for dtype in ('int8', 'int16', 'int32'):
+        if length <= np.iinfo(dtype).max:
+            return dtype
+    return 'int64'
+
+
+def _promote_for_missing(dtype):
+    """Find a dtype and fill value which can represent missing values, as xarray would when
+    reindexing
+    """
+    if dtype.kind in 'fc':
+        return dtype, np.nan
+    if dtype.kind in 'iu':
+        return np.dtype('float64'), np.nan
+    if dtype.kind in 'mM':
+        return dtype, np.datetime64('NaT') if dtype.kind == 'M' else np.timedelta64('NaT')
+    return np.dtype('object'), np.nan
+
+
 def _reindex_xr_data_array(spec, xr_data_array):
     """Reindex to ensure full data, order
     """
@@ -0,0 +1,173 @@
+"""Keep recently read data in memory, up to a size limit.
+
+In a model run, the same scenario data is read by several models in each timestep, and again
+for base and previous timesteps, and narrative data is read each time a model is stepped. A
+:class:`DataCache` on the :class:`~smif.data_layer.store.Store` is shared by every
+:class:`~smif.data_layer.data_handle.DataHandle` in the process, so each is read from the data
+store once.
+
+A :class:`CoefficientCache` on the store likewise keeps conversion coefficients, which are read
+by adaptors for each variable in each timestep but do not change during a model run.
+"""
+import threading
+from collections import OrderedDict
+from copy import copy
+from logging import getLogger
+
+from smif.data_layer.coefficients import issparse
+from smif.data_layer.data_array import DataArray
+
+# default size limit, in bytes
+DEFAULT_DATA_CACHE_SIZE = 256 * 1024 * 1024
+# default size limit for coefficients, in bytes
+DEFAULT_COEFFICIENT_CACHE_SIZE = 512 * 1024 * 1024
+
+
+class DataCache(object):
+    """Least-recently-used cache of DataArrays
+
+    Keys are tuples, so that entries can be invalidated by key prefix - for example,
+    ``('scenario', 'population')`` matches ``('scenario', 'population', 'high', 'count',
+    2010)``.
+
+    Parameters
+    ----------
+    max_bytes: int, optional
+        Size limit, counting the size of each cached numpy array, defaults to 256MiB. Zero
+        disables the cache.
+
+    Attributes
+    ----------
+    hits: int
+        Number of reads found in the cache
+    misses: int
+        Number of reads not found in the cache
+    """
+    def __init__(self, max_bytes=DEFAULT_DATA_CACHE_SIZE):
+        self.logger = getLogger(__name__)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # start with an empty cache in other processes
+        return {'max_bytes': self.max_bytes}
+
+    def __setstate__(self, state):
+        self.__init__(state['max_bytes'])
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        """Total size in bytes of the cached data
+        """
+        return self._bytes
+
+    def get(self, key):
+        """Read data from the cache
+
+        Parameters
+        ----------
+        key: tuple
+
+        Returns
+        -------
+        ~smif.data_layer.data_array.DataArray or None
+            A copy of the cached data, which the caller may modify, or None if not cached
+        """
+        with self._lock:
+            try:
+                data_array = self._entries[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._copy(data_array)
+
+    def put(self, key, data_array):
+        """Add data to the cache, evicting the least recently used data if over the size limit
+
+        Data larger than the size limit is not cached.
+
+        Parameters
+        ----------
+        key: tuple
+        data_array: ~smif.data_layer.data_array.DataArray
+        """
+        nbytes = self._nbytes(data_array)
+        if nbytes > self.max_bytes:
+            return
+        data_array = self._copy(data_array)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = data_array
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, prefix=()):
+        """Remove cached data
+
+        Parameters
+        ----------
+        prefix: tuple, optional
+            Remove data with keys which start with `prefix`, by default all data
+        """
+        with self._lock:
+            for key in list(self._entries):
+                if key[:len(prefix)] == prefix:
+                    self._remove(key)
+
+    def _remove(self, key):
+        try:
+            data_array = self._entries.pop(key)
+        except KeyError:
+            return
+        self._bytes -= self._nbytes(data_array)
+
+    @staticmethod
+    def _nbytes(data_array):
+        return data_array.data.nbytes
+
+    @staticmethod
+    def _copy(data_array):
+        return DataArray(copy(data_array.spec), data_array.data.copy())
+
+
+class CoefficientCache(DataCache):
+    """Least-recently-used cache of conversion coefficients
+
+    Coefficients are kept and returned without copying, so every adaptor in the process
+    shares a single matrix. Cached numpy arrays are made read-only, and cached sparse matrices
+    should not be modified.
+
+    Keys are tuples of (source_dim, destination_dim, digest), where the digest identifies the
+    elements of both dimensions.
+
+    Parameters
+    ----------
+    max_bytes: int, optional
+        Size limit, counting the size of each cached array or sparse matrix, defaults to
+        512MiB. Zero disables the cache.
+    """
+    def __init__(self, max_bytes=DEFAULT_COEFFICIENT_CACHE_SIZE):
+        super().__init__(max_bytes)
+
+    @staticmethod
+    def _nbytes(coefficients):
+        if issparse(coefficients):
+            return coefficients.data.nbytes + coefficients.indices.nbytes + \
+                coefficients.indptr.nbytes
+        return coefficients.nbytes
+
+    @staticmethod
+    def _copy(coefficients):
+        if not issparse(coefficients):
+            coefficients.setflags(write=False)
+        return coefficients
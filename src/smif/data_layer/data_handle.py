@@ -67,6 +67,8 @@ class DataHandle(object):
         self._parameters = {}  # type: Dict[str, DataArray]
         self._load_parameters(sos_model, modelrun['narratives'])
 
+        self._results_checksums = {}  # type: Dict[str, str]
+
     def _load_dependencies(self, sos_model, scenario_variants):
         """Load Model dependencies as a dict with {input_name: list[Dependency]}
         """
@@ -508,14 +510,27 @@ class DataHandle(object):
         spec = self._outputs[output_name]
 
         da = DataArray(spec, data)
+        checksum = da.checksum()
 
         self._store.write_results(
             da,
             self._modelrun_name,
             self._model_name,
             self._current_timestep,
-            self._decision_iteration
+            self._decision_iteration,
+            checksum
         )
+        self._results_checksums[output_name] = checksum
+
+    @property
+    def results_checksums(self):
+        """Checksums of the results set through this DataHandle, keyed by output name
+
+        Returns
+        -------
+        dict
+        """
+        return dict(self._results_checksums)
 
     def get_results(self, output_name, decision_iteration=None,
                     timestep=None):
@@ -579,7 +594,8 @@ class DataHandle(object):
         """
         return self._store.read_unit_definitions()
 
-    def read_coefficients(self, source_dim: str, destination_dim: str) -> np.ndarray:
+    def read_coefficients(self, source_dim: str, destination_dim: str,
+                          digest: str = None) -> np.ndarray:
         """Reads coefficients from the store
 
         Coefficients are uniquely identified by their source/destination dimensions.
@@ -592,12 +608,15 @@ class DataHandle(object):
             Dimension name
         destination_dim: str
             Dimension name
+        digest: str, optional
+            Identifies the elements of both dimensions
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or scipy.sparse.csr_matrix
+            Shared with other readers, so must not be modified
         """
-        data = self._store.read_coefficients(source_dim, destination_dim)
+        data = self._store.read_coefficients(source_dim, destination_dim, digest)
         return data
 
     def write_coefficients(self, source_dim: str, destination_dim: str, data: np.ndarray):
@@ -613,7 +632,7 @@ class DataHandle(object):
             Dimension name
         destination_dim: str
             Dimension name
-        data : numpy.ndarray
+        data : numpy.ndarray or scipy.sparse.csr_matrix
         """
         data = self._store.write_coefficients(source_dim, destination_dim, data)
         return data
@@ -1404,7 +1404,7 @@ class DbDataStore(DataStore):
         raise NotImplementedError()
 
     def write_results(self, data_array, modelrun_name, model_name, timestep=None,
-                      decision_iteration=None):
+                      decision_iteration=None, checksum=None):
         raise NotImplementedError()
 
     def delete_results(self, model_run_name, model_name, output_name, timestep=None,
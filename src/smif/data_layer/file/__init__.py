@@ -6,10 +6,12 @@
 #         from smif.data_layer.file import YamlConfigStore`
 from smif.data_layer.file.file_config_store import YamlConfigStore
 from smif.data_layer.file.file_data_store import (CSVDataStore,
-                                                  ParquetDataStore)
+                                                  NpyDataStore,
+                                                  ParquetDataStore,
+                                                  partition_parquet_by_timestep)
 from smif.data_layer.file.file_metadata_store import FileMetadataStore
 
 # Define what should be imported as * ::
 #         from smif.data_layer.file import *
-__all__ = ['CSVDataStore', 'FileMetadataStore',
-           'ParquetDataStore', 'YamlConfigStore']
+__all__ = ['CSVDataStore', 'FileMetadataStore', 'NpyDataStore',
+           'ParquetDataStore', 'YamlConfigStore', 'partition_parquet_by_timestep']
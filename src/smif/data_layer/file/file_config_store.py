@@ -15,6 +15,10 @@ from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
 class YamlConfigStore(ConfigStore):
     """Config backend saving to YAML configuration files.
 
+    Parsed files are cached, and only parsed again if their modification time or size
+    changes, so repeatedly reading the same configuration (for example, once for each model
+    step) costs a file system check and a copy of the parsed data.
+
     Arguments
     ---------
     base_folder: str
@@ -45,10 +49,9 @@ class YamlConfigStore(ConfigStore):
 
             self.config_folders[folder] = dirname
 
-        # cache results of reading project_config (invalidate on write)
-        self._project_config_cache_invalid = True
-        # MUST ONLY access through self.read_project_config()
-        self._project_config_cache = None
+        # parsed config files, keyed by path, each stored with the file's (mtime, size) when
+        # it was read - MUST ONLY access through self._read_yaml and self._write_yaml
+        self._yaml_cache = {}
 
         # ensure project config file exists
         try:
@@ -57,6 +60,16 @@ class YamlConfigStore(ConfigStore):
             # write empty config if none found
             self._write_project_config({})
 
+    def __getstate__(self):
+        # loggers can only be pickled from Python 3.7
+        state = self.__dict__.copy()
+        del state['logger']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = getLogger(__name__)
+
     def read_project_config(self):
         """Read the project configuration
 
@@ -65,11 +78,7 @@ class YamlConfigStore(ConfigStore):
         dict
             The project configuration
         """
-        if self._project_config_cache_invalid:
-
-            self._project_config_cache = _read_yaml_file(self.base_folder, 'project')
-            self._project_config_cache_invalid = False
-        return copy.deepcopy(self._project_config_cache)
+        return self._read_yaml(self.base_folder, 'project')
 
     def _write_project_config(self, data):
         """Write the project configuration
@@ -79,9 +88,33 @@ class YamlConfigStore(ConfigStore):
         data: dict
             The project configuration
         """
-        self._project_config_cache_invalid = True
-        self._project_config_cache = None
-        _write_yaml_file(self.base_folder, 'project', data)
+        self._write_yaml(self.base_folder, 'project', data)
+
+    def _read_yaml(self, directory, name):
+        """Read yaml config file, parsing it only if it has changed since last read
+
+        Returns
+        -------
+        A copy of the parsed data, which the caller may modify
+        """
+        path = os.path.join(directory, "{}.yml".format(name))
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        try:
+            cached_version, data = self._yaml_cache[path]
+        except KeyError:
+            cached_version, data = None, None
+        if cached_version != version:
+            data = _copy_config(_read_yaml_file(directory, name))
+            self._yaml_cache[path] = (version, data)
+        return _copy_config(data)
+
+    def _write_yaml(self, directory, name, data):
+        """Write yaml config file
+        """
+        # files rewritten quickly may keep the same modification time, so always invalidate
+        self._yaml_cache.pop(os.path.join(directory, "{}.yml".format(name)), None)
+        _write_yaml_file(directory, name, data)
 
     def _read_config(self, config_type, config_name):
         """Read config item - used by decorators for existence/consistency checks
@@ -105,16 +138,16 @@ class YamlConfigStore(ConfigStore):
         return modelrun_config
 
     def _read_model_run(self, model_run_name):
-        return _read_yaml_file(self.config_folders['model_runs'], model_run_name)
+        return self._read_yaml(self.config_folders['model_runs'], model_run_name)
 
     def _overwrite_model_run(self, model_run_name, model_run):
-        _write_yaml_file(self.config_folders['model_runs'], model_run_name, model_run)
+        self._write_yaml(self.config_folders['model_runs'], model_run_name, model_run)
 
     def write_model_run(self, model_run):
         _assert_file_not_exists(self.config_folders, 'model_run', model_run['name'])
         config = copy.copy(model_run)
         config['strategies'] = []
-        _write_yaml_file(self.config_folders['model_runs'], config['name'], config)
+        self._write_yaml(self.config_folders['model_runs'], config['name'], config)
 
     def update_model_run(self, model_run_name, model_run):
         if model_run['name'] != model_run_name:
@@ -140,14 +173,14 @@ class YamlConfigStore(ConfigStore):
     def read_sos_model(self, sos_model_name):
         _assert_file_exists(self.config_folders, 'sos_model', sos_model_name)
 
-        data = _read_yaml_file(self.config_folders['sos_models'], sos_model_name)
+        data = self._read_yaml(self.config_folders['sos_models'], sos_model_name)
         if self.validation:
             validate_sos_model_format(data)
         return data
 
     def write_sos_model(self, sos_model):
         _assert_file_not_exists(self.config_folders, 'sos_model', sos_model['name'])
-        _write_yaml_file(self.config_folders['sos_models'], sos_model['name'], sos_model)
+        self._write_yaml(self.config_folders['sos_models'], sos_model['name'], sos_model)
 
     def update_sos_model(self, sos_model_name, sos_model):
         if sos_model['name'] != sos_model_name:
@@ -160,7 +193,7 @@ class YamlConfigStore(ConfigStore):
                 self.read_models(),
                 self.read_scenarios(),
             )
-        _write_yaml_file(self.config_folders['sos_models'], sos_model['name'], sos_model)
+        self._write_yaml(self.config_folders['sos_models'], sos_model['name'], sos_model)
 
     def delete_sos_model(self, sos_model_name):
         _assert_file_exists(self.config_folders, 'sos_model', sos_model_name)
@@ -176,7 +209,7 @@ class YamlConfigStore(ConfigStore):
     def read_model(self, model_name):
         _assert_file_exists(self.config_folders, 'sector_model', model_name)
 
-        model = _read_yaml_file(self.config_folders['sector_models'], model_name)
+        model = self._read_yaml(self.config_folders['sector_models'], model_name)
         return model
 
     def write_model(self, model):
@@ -187,7 +220,7 @@ class YamlConfigStore(ConfigStore):
             model['interventions'] = []
 
         model = _skip_coords(model, ('inputs', 'outputs', 'parameters'))
-        _write_yaml_file(self.config_folders['sector_models'], model['name'], model)
+        self._write_yaml(self.config_folders['sector_models'], model['name'], model)
 
     def update_model(self, model_name, model):
         if model['name'] != model_name:
@@ -199,7 +232,7 @@ class YamlConfigStore(ConfigStore):
         # ignore interventions and initial conditions which the app doesn't handle
         if model['interventions'] or model['initial_conditions']:
 
-            old_model = _read_yaml_file(self.config_folders['sector_models'], model['name'])
+            old_model = self._read_yaml(self.config_folders['sector_models'], model['name'])
 
         if model['interventions']:
             self.logger.warning("Ignoring interventions write")
@@ -211,7 +244,7 @@ class YamlConfigStore(ConfigStore):
 
         model = _skip_coords(model, ('inputs', 'outputs', 'parameters'))
 
-        _write_yaml_file(self.config_folders['sector_models'], model['name'], model)
+        self._write_yaml(self.config_folders['sector_models'], model['name'], model)
 
     def delete_model(self, model_name):
         _assert_file_exists(self.config_folders, 'sector_model', model_name)
@@ -227,18 +260,18 @@ class YamlConfigStore(ConfigStore):
     def read_scenario(self, scenario_name):
         _assert_file_exists(self.config_folders, 'scenario', scenario_name)
 
-        scenario = _read_yaml_file(self.config_folders['scenarios'], scenario_name)
+        scenario = self._read_yaml(self.config_folders['scenarios'], scenario_name)
         return scenario
 
     def write_scenario(self, scenario):
         _assert_file_not_exists(self.config_folders, 'scenario', scenario['name'])
         scenario = _skip_coords(scenario, ['provides'])
-        _write_yaml_file(self.config_folders['scenarios'], scenario['name'], scenario)
+        self._write_yaml(self.config_folders['scenarios'], scenario['name'], scenario)
 
     def update_scenario(self, scenario_name, scenario):
         _assert_file_exists(self.config_folders, 'scenario', scenario_name)
         scenario = _skip_coords(scenario, ['provides'])
-        _write_yaml_file(self.config_folders['scenarios'], scenario['name'], scenario)
+        self._write_yaml(self.config_folders['scenarios'], scenario['name'], scenario)
 
     def delete_scenario(self, scenario_name):
         _assert_file_exists(self.config_folders, 'scenario', scenario_name)
@@ -328,6 +361,17 @@ def _write_yaml_file(directory, name, data):
         return yaml.dump(data, file_handle)
 
 
+def _copy_config(data):
+    """Copy parsed config as plain dicts and lists - faster than copy.deepcopy for the
+    nested dicts, lists and simple values read from yaml
+    """
+    if isinstance(data, dict):
+        return {key: _copy_config(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_copy_config(value) for value in data]
+    return data
+
+
 def _assert_file_exists(file_dir, dtype, name):
     if not _file_exists(file_dir, dtype, name):
         raise SmifDataNotFoundError("%s '%s' not found" % (dtype.capitalize(), name))
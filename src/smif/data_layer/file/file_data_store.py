@@ -1,6 +1,8 @@
 """File-backed data store
 """
 import glob
+import hashlib
+import json
 import os
 from abc import abstractmethod
 from logging import getLogger
@@ -8,7 +10,12 @@ from logging import getLogger
 import numpy as np  # type: ignore
 import pandas  # type: ignore
 import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
 from smif.data_layer.abstract_data_store import DataStore
+from smif.data_layer.coefficients import (dump_sparse_coefficients, issparse,
+                                          load_sparse_coefficients)
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.file.results_manifest import ResultsManifest
 from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
 
 
@@ -46,6 +53,16 @@ class FileDataStore(DataStore):
                 raise SmifDataNotFoundError(msg.format(abs_path))
             self.data_folders[folder] = dirname
 
+    def __getstate__(self):
+        # loggers can only be pickled from Python 3.7
+        state = self.__dict__.copy()
+        del state['logger']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = getLogger(__name__)
+
     # region Abstract methods
     @abstractmethod
     def _read_data_array(self, path, spec, timestep=None):
@@ -244,6 +261,10 @@ class FileDataStore(DataStore):
 
     # region Conversion coefficients
     def read_coefficients(self, source_dim, destination_dim):
+        sparse_path = self._get_sparse_coefficients_path(source_dim, destination_dim)
+        if os.path.isfile(sparse_path):
+            return load_sparse_coefficients(sparse_path)
+
         results_path = self._get_coefficients_path(source_dim, destination_dim)
         try:
             return self._read_ndarray(results_path)
@@ -254,8 +275,17 @@ class FileDataStore(DataStore):
 
     def write_coefficients(self, source_dim, destination_dim, data):
         results_path = self._get_coefficients_path(source_dim, destination_dim)
-        header = "Conversion coefficients {}:{}".format(source_dim, destination_dim)
-        self._write_ndarray(results_path, data, header)
+        sparse_path = self._get_sparse_coefficients_path(source_dim, destination_dim)
+        if issparse(data):
+            dump_sparse_coefficients(sparse_path, data)
+            stale_path = results_path
+        else:
+            header = "Conversion coefficients {}:{}".format(source_dim, destination_dim)
+            self._write_ndarray(results_path, data, header)
+            stale_path = sparse_path
+        # remove coefficients previously written in the other format
+        if os.path.isfile(stale_path):
+            os.remove(stale_path)
 
     def _get_coefficients_path(self, source_dim, destination_dim):
         path = os.path.join(
@@ -267,6 +297,12 @@ class FileDataStore(DataStore):
             )
         )
         return path
+
+    def _get_sparse_coefficients_path(self, source_dim, destination_dim):
+        return os.path.join(
+            self.data_folders['coefficients'],
+            "{}.{}.npz".format(source_dim, destination_dim)
+        )
     # endregion
 
     # region Results
@@ -282,14 +318,14 @@ class FileDataStore(DataStore):
         )
 
         try:
-            return self._read_data_array(results_path, output_spec)
+            return self._read_results_array(results_path, output_spec)
         except FileNotFoundError:
             key = str([modelrun_id, model_name, output_spec.name, timestep,
                        decision_iteration])
             raise SmifDataNotFoundError("Could not find results for {}".format(key))
 
     def write_results(self, data_array, modelrun_id, model_name, timestep=None,
-                      decision_iteration=None):
+                      decision_iteration=None, checksum=None):
         if timestep is None:
             raise NotImplementedError()
 
@@ -302,8 +338,14 @@ class FileDataStore(DataStore):
             modelrun_id, model_name, data_array.name,
             timestep, decision_iteration
         )
+        manifest = self._get_results_manifest(modelrun_id)
         os.makedirs(os.path.dirname(results_path), exist_ok=True)
-        self._write_data_array(results_path, data_array)
+        self._write_results_array(results_path, data_array)
+        if checksum is None:
+            checksum = data_array.checksum()
+        manifest.record(
+            timestep, decision_iteration, model_name, data_array.name,
+            os.path.getsize(results_path), checksum)
 
     def delete_results(self, model_run_name, model_name, output_name, timestep=None,
                        decision_iteration=None):
@@ -324,10 +366,37 @@ class FileDataStore(DataStore):
         except OSError as ex:
             self.logger.info("Ignored error deleting results {} - {}".format(
                 ex.filename, ex.strerror))
+        self._get_results_manifest(model_run_name).remove(
+            timestep, decision_iteration, model_name, output_name)
+
+    @property
+    def results_ext(self):
+        """Extension for results files
+        """
+        return self.ext
+
+    def _read_results_array(self, path, spec):
+        """Read results DataArray from file - override to store results in another format
+        """
+        return self._read_data_array(path, spec)
+
+    def _write_results_array(self, path, data_array):
+        """Write results DataArray to file - override to store results in another format
+        """
+        self._write_data_array(path, data_array)
 
     def available_results(self, modelrun_name):
         """List available results for a given model run
 
+        Results are listed from the model run's results manifest (see
+        :class:`~smif.data_layer.file.results_manifest.ResultsManifest`). If there is no
+        manifest, any results already in the results folder are indexed to create one.
+        """
+        return self._get_results_manifest(modelrun_name).available_results()
+
+    def _index_results(self, modelrun_name, manifest):
+        """Record results found in the results folder in the results manifest
+
         See _get_results_path for path construction.
 
         On the pattern of:
@@ -336,16 +405,27 @@ class FileDataStore(DataStore):
             output_<output_name>_timestep_<timestep>.csv
         """
         paths = glob.glob(os.path.join(
-            self.results_folder, modelrun_name, "*", "*", "*.{}".format(self.ext)))
-        # (timestep, decision_iteration, model_name, output_name)
-        results_keys = []
+            self.results_folder, modelrun_name, "*", "*", "*.{}".format(self.results_ext)))
+        # (timestep, decision_iteration, model_name, output_name, size, checksum)
+        results = []
         for path in paths:
             timestep, decision_iteration, model_name, output_name = \
                 self._parse_results_path(path)
-            results_keys.append(
-                (timestep, decision_iteration, model_name, output_name)
-            )
-        return results_keys
+            results.append((timestep, decision_iteration, model_name, output_name,
+                            os.path.getsize(path), None))
+        if results:
+            self.logger.info("Indexed %s results for %s", len(results), modelrun_name)
+            manifest.record_many(results)
+
+    def _get_results_manifest(self, modelrun_name):
+        """Find the results manifest for a model run, first indexing any results already in
+        the results folder if there is no manifest
+        """
+        manifest = ResultsManifest(
+            os.path.join(self.results_folder, modelrun_name, 'results_manifest.sqlite'))
+        if not manifest.exists():
+            self._index_results(modelrun_name, manifest)
+        return manifest
 
     def _get_results_path(self, modelrun_id, model_name, output_name, timestep,
                           decision_iteration=None):
@@ -374,7 +454,7 @@ class FileDataStore(DataStore):
         path = os.path.join(
             self.results_folder, modelrun_id, model_name,
             "decision_{}".format(decision_iteration),
-            "output_{}_timestep_{}.{}".format(output_name, timestep, self.ext)
+            "output_{}_timestep_{}.{}".format(output_name, timestep, self.results_ext)
         )
         return path
 
@@ -397,11 +477,15 @@ class FileDataStore(DataStore):
         # split to last directories and filename
         model_name, decision_str, output_str = path.split(os.sep)[-3:]
         # trim "decision_"
-        decision_iteration = int(decision_str[9:])
+        decision_iteration = decision_str[9:]
+        if decision_iteration == 'none':
+            decision_iteration = None
+        else:
+            decision_iteration = int(decision_iteration)
         # trim "output_" [...]
         output_str_trimmed = output_str[7:]
         # trim extension
-        output_str_trimmed = output_str_trimmed.replace(".{}".format(self.ext), "")
+        output_str_trimmed = output_str_trimmed.replace(".{}".format(self.results_ext), "")
         # pick (str) output and (integer) timestep
         output_name, timestep_str = output_str_trimmed.split("_timestep_")
         timestep = int(timestep_str)
@@ -412,11 +496,16 @@ class FileDataStore(DataStore):
 
 class CSVDataStore(FileDataStore):
     """CSV text file data store
+
+    Conversion coefficients are written in binary numpy format, which is much faster to read
+    than text. Coefficients written as text by earlier versions can still be read.
     """
     def __init__(self, base_folder):
         super().__init__(base_folder)
         self.ext = 'csv'
-        self.coef_ext = 'txt.gz'
+        self.coef_ext = 'npy'
+        # extension for coefficients written as text
+        self.text_coef_ext = 'txt.gz'
 
     def _read_data_array(self, path, spec, timestep=None, timesteps=None):
         """Read DataArray from file
@@ -453,21 +542,30 @@ class CSVDataStore(FileDataStore):
         pandas.DataFrame.from_records(data).to_csv(path, index=False)
 
     def _read_ndarray(self, path):
-        """Read numpy.ndarray
+        """Read numpy.ndarray, falling back to a text file of the same name
         """
         try:
-            return np.loadtxt(path)
+            return np.load(path)
+        except OSError:
+            pass
+        text_path = path[:-len(self.coef_ext)] + self.text_coef_ext
+        try:
+            return np.loadtxt(text_path)
         except OSError:
             raise FileNotFoundError(path)
 
     def _write_ndarray(self, path, data, header=None):
         """Write numpy.ndarray
         """
-        np.savetxt(path, data, header=header)
+        np.save(path, data)
 
 
 class ParquetDataStore(FileDataStore):
     """Binary file data store
+
+    Data with a timestep dimension is written with one row group per timestep, so reading a
+    single timestep only decodes the rows for that timestep. Files written by other tools can
+    be rewritten in this layout using :py:func:`partition_parquet_by_timestep`.
     """
     def __init__(self, base_folder):
         super().__init__(base_folder)
@@ -477,22 +575,30 @@ class ParquetDataStore(FileDataStore):
     def _read_data_array(self, path, spec, timestep=None, timesteps=None):
         """Read DataArray from file
         """
+        if timestep is not None:
+            filters = [('timestep', '=', timestep)]
+        elif timesteps is not None:
+            filters = [('timestep', 'in', list(timesteps))]
+        else:
+            filters = None
+
         try:
-            dataframe = pandas.read_parquet(path, engine='pyarrow')
+            table = _read_parquet_table(path, filters)
         except (pa.lib.ArrowIOError, OSError) as ex:
             msg = "Could not find data for {} at {}"
             raise SmifDataNotFoundError(msg.format(spec.name, path)) from ex
 
-        dataframe, spec = DataStore.filter_on_timesteps(
-            dataframe, spec, path, timestep, timesteps)
-        data_array = DataStore.dataframe_to_data_array(dataframe, spec, path)
-        return data_array
+        table, spec = _filter_table_on_timesteps(table, spec, path, timestep, timesteps)
+        if not spec.dims and table.num_rows != 1:
+            msg = "Data for '{}' should contain a single value, instead got {} while " + \
+                    "reading from {}"
+            raise SmifDataMismatchError(msg.format(spec.name, table.num_rows, path))
+        return DataArray.from_arrow(spec, table)
 
     def _write_data_array(self, path, data_array):
         """Write DataArray to file
         """
-        dataframe = data_array.as_df()
-        dataframe.to_parquet(path, engine='pyarrow', compression='gzip')
+        _write_parquet(path, data_array.to_arrow())
 
     def _read_list_of_dicts(self, path):
         """Read file to list[dict]
@@ -525,6 +631,175 @@ class ParquetDataStore(FileDataStore):
         np.save(path, data)
 
 
+class NpyDataStore(ParquetDataStore):
+    """Binary file data store, with results as memory-mapped numpy arrays
+
+    Each result is written as a ``.npy`` array alongside a small JSON file describing its
+    dims, a hash of the coordinates of each dim, its dtype and its shape. Results are read
+    as read-only memory-mapped arrays, so reading a slice of a large result only loads that
+    slice from disk. Other data is stored as in :class:`ParquetDataStore`.
+    """
+    @property
+    def results_ext(self):
+        return 'npy'
+
+    def _read_results_array(self, path, spec):
+        """Read results DataArray from file, as a read-only memory-mapped array
+        """
+        try:
+            with open(_npy_metadata_path(path)) as file_handle:
+                metadata = json.load(file_handle)
+            data = np.load(path, mmap_mode='r')
+        except FileNotFoundError as ex:
+            msg = "Could not find data for {} at {}"
+            raise SmifDataNotFoundError(msg.format(spec.name, path)) from ex
+
+        expected = _npy_metadata(spec, data)
+        for key in ('dims', 'coords', 'shape'):
+            if metadata[key] != expected[key]:
+                msg = "Data for '{}' at {} has {} {}, which do not match the spec {}"
+                raise SmifDataMismatchError(msg.format(
+                    spec.name, path, key, metadata[key], expected[key]))
+        return DataArray(spec, data)
+
+    def _write_results_array(self, path, data_array):
+        """Write results DataArray to file, with its spec metadata
+        """
+        data = np.asarray(data_array.data)
+        if data.dtype.hasobject:
+            msg = "Data for '{}' has dtype {}, which cannot be written as a numpy array " + \
+                  "without pickling"
+            raise SmifDataMismatchError(msg.format(data_array.name, data.dtype))
+
+        # write alongside then move, so that any reader which has the previous file
+        # memory-mapped keeps a complete copy
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as file_handle:
+            np.save(file_handle, data)
+        metadata_path = _npy_metadata_path(path)
+        with open(metadata_path + '.tmp', 'w') as file_handle:
+            json.dump(_npy_metadata(data_array.spec, data), file_handle)
+        os.replace(tmp_path, path)
+        os.replace(metadata_path + '.tmp', metadata_path)
+
+    def delete_results(self, model_run_name, model_name, output_name, timestep=None,
+                       decision_iteration=None):
+        super().delete_results(
+            model_run_name, model_name, output_name, timestep, decision_iteration)
+        results_path = self._get_results_path(
+            model_run_name, model_name, output_name, timestep, decision_iteration)
+        try:
+            os.remove(_npy_metadata_path(results_path))
+        except OSError as ex:
+            self.logger.info("Ignored error deleting results {} - {}".format(
+                ex.filename, ex.strerror))
+
+
+def _npy_metadata_path(path):
+    return os.path.splitext(path)[0] + '.json'
+
+
+def _npy_metadata(spec, data):
+    """Describe the dims, coords, dtype and shape of results data
+    """
+    return {
+        'dims': spec.dims,
+        'coords': {
+            coords.name: hashlib.sha1(
+                json.dumps(coords.ids, default=str).encode()).hexdigest()
+            for coords in spec.coords
+        },
+        'dtype': data.dtype.str,
+        'shape': list(data.shape)
+    }
+
+
+def partition_parquet_by_timestep(path):
+    """Rewrite a parquet file with one row group per timestep, so that
+    :class:`ParquetDataStore` can read single timesteps without decoding the whole file
+
+    Parameters
+    ----------
+    path: str
+
+    Returns
+    -------
+    bool
+        False if the file has no timestep column, and so was left unchanged
+    """
+    table = pq.read_table(path)
+    if 'timestep' not in table.column_names:
+        return False
+    # write alongside then move, so an interrupted write does not lose data
+    tmp_path = path + '.tmp'
+    _write_parquet(tmp_path, table)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _read_parquet_table(path, filters=None):
+    """Read a parquet file to a pyarrow.Table, skipping any row groups excluded by `filters`
+    """
+    if filters is not None:
+        try:
+            return pq.read_table(path, filters=filters)
+        except pa.lib.ArrowInvalid:
+            # no column to filter on - read everything so the mismatch can be reported
+            pass
+    return pq.read_table(path)
+
+
+def _filter_table_on_timesteps(table, spec, path, timestep=None, timesteps=None):
+    """Filter a pyarrow.Table by timestep, as :py:meth:`DataStore.filter_on_timesteps` does
+    for a dataframe
+    """
+    has_timestep = 'timestep' in table.column_names
+    if (timestep is not None or timesteps is not None) and not has_timestep:
+        msg = "Data for '{name}' expected a column called 'timestep', instead got " + \
+              "columns {column_names} while reading from {path}"
+        raise SmifDataMismatchError(msg.format(
+            name=spec.name, column_names=table.column_names, path=path))
+
+    if timestep is not None:
+        table = table.filter(pa.array(table.column('timestep').to_numpy() == timestep))
+        if 'timestep' in spec.dims:
+            spec = DataStore._set_spec_timesteps(spec, [timestep])
+        else:
+            table = table.drop(['timestep'])
+    elif timesteps is not None:
+        table = table.filter(pa.array(
+            np.isin(table.column('timestep').to_numpy(), list(timesteps))))
+        spec = DataStore._set_spec_timesteps(spec, timesteps)
+    elif has_timestep:
+        spec = DataStore._set_spec_timesteps(
+            spec, sorted(table.column('timestep').unique().to_pylist()))
+
+    if not table.num_rows:
+        raise SmifDataNotFoundError(
+            "Data for '{}' not found for timestep {}".format(spec.name, timestep))
+    return table, spec
+
+
+def _write_parquet(path, table):
+    """Write a pyarrow.Table to a parquet file, sorted by timestep with one row group per
+    timestep if the table has a timestep column
+    """
+    if 'timestep' not in table.column_names or not table.num_rows:
+        pq.write_table(table, path, compression='gzip')
+        return
+
+    timesteps = table.column('timestep').to_numpy()
+    order = np.argsort(timesteps, kind='stable')
+    table = table.take(pa.array(order))
+    _, counts = np.unique(timesteps[order], return_counts=True)
+
+    with pq.ParquetWriter(path, table.schema, compression='gzip') as writer:
+        offset = 0
+        for count in counts:
+            writer.write_table(table.slice(offset, count), row_group_size=int(count))
+            offset += count
+
+
 def _nest_keys(intervention):
     nested = {}
     for key, value in intervention.items():
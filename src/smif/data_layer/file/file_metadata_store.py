@@ -31,6 +31,16 @@ class FileMetadataStore(MetadataStore):
         self.data_folder = os.path.join(base_folder, 'data', 'dimensions')
         self.config_folder = os.path.join(base_folder, 'config', 'dimensions')
 
+    def __getstate__(self):
+        # loggers can only be pickled from Python 3.7
+        state = self.__dict__.copy()
+        del state['logger']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = getLogger(__name__)
+
     # region Units
     def read_unit_definitions(self) -> List[str]:
         try:
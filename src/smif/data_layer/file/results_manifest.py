@@ -0,0 +1,146 @@
+"""Keep an index of the results written in a model run
+
+Listing results by searching the results folder means reading every directory and parsing
+every filename, which is slow for model runs with many results, particularly on network
+storage. Instead, each result written or deleted through a
+:class:`~smif.data_layer.file.file_data_store.FileDataStore` is recorded in a manifest, an
+SQLite database in the model run results folder, with its size, a checksum of its data and
+the time it was written.
+
+A model run with results but no manifest (for example, results written by an earlier
+version of smif) is indexed from the results folder when its results are first listed.
+Deleting the manifest has the same effect, if the results folder has been changed by hand.
+"""
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+# seconds to wait for other processes writing to the manifest
+TIMEOUT = 60
+
+
+class ResultsManifest(object):
+    """Index of results in a model run
+
+    Connections are opened for each operation rather than held open, so the manifest can be
+    passed to other processes and written by several processes at once.
+
+    Parameters
+    ----------
+    path: str
+        Path to the manifest database, created on the first write
+    """
+    def __init__(self, path):
+        self.path = str(path)
+
+    def exists(self):
+        """Check whether the manifest has been created
+
+        Returns
+        -------
+        bool
+        """
+        return os.path.exists(self.path)
+
+    def record(self, timestep, decision_iteration, model_name, output_name, size=None,
+               checksum=None):
+        """Record that a result has been written, replacing any previous record of it
+
+        Parameters
+        ----------
+        timestep: int
+        decision_iteration: int or None
+        model_name: str
+        output_name: str
+        size: int, optional
+            Size of the results file in bytes
+        checksum: str, optional
+            Checksum of the results data
+        """
+        self.record_many([
+            (timestep, decision_iteration, model_name, output_name, size, checksum)
+        ])
+
+    def record_many(self, results):
+        """Record that several results have been written
+
+        Parameters
+        ----------
+        results: list[tuple]
+            Each tuple is (timestep, decision_iteration, model_name, output_name, size,
+            checksum)
+        """
+        written = time.time()
+        with closing(self._connect()) as connection, connection:
+            for timestep, decision_iteration, model_name, output_name, size, checksum \
+                    in results:
+                self._delete(connection, timestep, decision_iteration, model_name,
+                             output_name)
+                connection.execute(
+                    "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (timestep, decision_iteration, model_name, output_name, size, checksum,
+                     written))
+
+    def remove(self, timestep, decision_iteration, model_name, output_name):
+        """Remove the record of a result, if any
+
+        Parameters
+        ----------
+        timestep: int
+        decision_iteration: int or None
+        model_name: str
+        output_name: str
+        """
+        if not self.exists():
+            return
+        with closing(self._connect()) as connection, connection:
+            self._delete(connection, timestep, decision_iteration, model_name, output_name)
+
+    def available_results(self):
+        """List recorded results
+
+        Returns
+        -------
+        list[tuple]
+             Each tuple is (timestep, decision_iteration, model_name, output_name)
+        """
+        return [row[:4] for row in self.details()]
+
+    def details(self):
+        """List recorded results with their size, checksum and write time
+
+        Returns
+        -------
+        list[tuple]
+             Each tuple is (timestep, decision_iteration, model_name, output_name, size,
+             checksum, written)
+        """
+        if not self.exists():
+            return []
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT timestep, decision_iteration, model_name, output_name, size, "
+                "checksum, written FROM results "
+                "ORDER BY timestep, decision_iteration, model_name, output_name"
+            ).fetchall()
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=TIMEOUT)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "timestep INTEGER, decision_iteration INTEGER, model_name TEXT, "
+            "output_name TEXT, size INTEGER, checksum TEXT, written REAL)")
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_key "
+            "ON results (timestep, decision_iteration, model_name, output_name)")
+        return connection
+
+    @staticmethod
+    def _delete(connection, timestep, decision_iteration, model_name, output_name):
+        # IS rather than = so that a decision iteration of None matches NULL
+        connection.execute(
+            "DELETE FROM results WHERE timestep IS ? AND decision_iteration IS ? "
+            "AND model_name = ? AND output_name = ?",
+            (timestep, decision_iteration, model_name, output_name))
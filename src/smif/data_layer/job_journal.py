@@ -0,0 +1,131 @@
+"""Record when each job in a model run starts and finishes
+
+The journal is an append-only file with one JSON object per line, for example::
+
+    {"event": "started", "job": "energy_central_simulate_2010_0_energy_demand", ...}
+    {"event": "finished", "job": "energy_central_simulate_2010_0_energy_demand", ...,
+     "checksums": {"gas_demand": "0a1b..."}}
+
+A warm start can read the journal to find exactly which jobs finished, rather than listing
+and checking all the results written so far. Lines are flushed as they are written, so the
+journal is complete up to the last job to start or finish before a run stopped. A partly
+written last line is ignored.
+"""
+import json
+import os
+import time
+from logging import getLogger
+
+
+class JobJournal(object):
+    """Append-only record of job events in a model run
+
+    Parameters
+    ----------
+    path: str
+        Path to the journal file, created on the first event
+    """
+    def __init__(self, path):
+        self.logger = getLogger(__name__)
+        self.path = str(path)
+
+    def exists(self):
+        """Check whether any events have been recorded
+
+        Returns
+        -------
+        bool
+        """
+        return os.path.exists(self.path)
+
+    def clear(self):
+        """Remove all recorded events
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def started(self, job_id, job):
+        """Record that a job has started
+
+        Parameters
+        ----------
+        job_id: str
+        job: dict
+            Job graph node attributes
+        """
+        self._append('started', job_id, job)
+
+    def finished(self, job_id, job, checksums=None):
+        """Record that a job has finished
+
+        Parameters
+        ----------
+        job_id: str
+        job: dict
+            Job graph node attributes
+        checksums: dict, optional
+            Checksums of the results written by the job, keyed by output name
+        """
+        self._append('finished', job_id, job, checksums)
+
+    def finished_jobs(self):
+        """List finished simulate jobs
+
+        Returns
+        -------
+        list[tuple]
+             Each tuple is (timestep, decision_iteration, model_name)
+        """
+        finished = {}
+        for event in self._read():
+            if event['operation'] != 'simulate':
+                continue
+            key = (event['timestep'], event['decision_iteration'], event['model'])
+            finished[key] = event['event'] == 'finished'
+        return [key for key, is_finished in finished.items() if is_finished]
+
+    def latest_timestep(self):
+        """Find the latest timestep for which any simulate job has started
+
+        Returns
+        -------
+        int or None
+        """
+        timesteps = [
+            event['timestep'] for event in self._read() if event['operation'] == 'simulate'
+        ]
+        if timesteps:
+            return max(timesteps)
+        return None
+
+    def _append(self, event, job_id, job, checksums=None):
+        model = job.get('model')
+        record = {
+            'event': event,
+            'job': job_id,
+            'operation': job['operation'].value,
+            'model': None if model is None else model.name,
+            'timestep': job.get('current_timestep'),
+            'decision_iteration': job.get('decision_iteration'),
+            'time': time.time()
+        }
+        if checksums is not None:
+            record['checksums'] = checksums
+
+        dirname = os.path.dirname(self.path)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname, exist_ok=True)
+        with open(self.path, 'a') as file_handle:
+            file_handle.write(json.dumps(record, sort_keys=True) + '\n')
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return []
+        events = []
+        with open(self.path, 'r') as file_handle:
+            for line in file_handle:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    self.logger.warning("Ignored incomplete line in job journal %s", self.path)
+        return events
@@ -396,7 +396,7 @@ class MemoryDataStore(DataStore):
         return DataArray(output_spec, results)
 
     def write_results(self, data_array, modelrun_name, model_name, timestep=None,
-                      decision_iteration=None):
+                      decision_iteration=None, checksum=None):
         key = (modelrun_name, model_name, data_array.spec.name, timestep, decision_iteration)
         self._results[key] = data_array.as_ndarray()
 
@@ -14,8 +14,8 @@ class Results:
     ----------
     store: Store or dict
         pre-created Store object or dictionary of the form {'interface': <interface>,
-        'dir': <dir>} where <interface> is either 'local_csv' or 'local_parquet', and <dir> is
-        the model base directory
+        'dir': <dir>} where <interface> is one of 'local_csv', 'local_parquet', 'local_npy' or
+        'local_sqlite', and <dir> is the model base directory
     """
 
     def __init__(self, store: Union[Store, dict]):
@@ -145,6 +145,8 @@ class Results:
             timesteps: list = None,
             decisions: list = None,
             time_decision_tuples: list = None,
+            progress=None,
+            cancel=None
     ):
         """Return results from the store as a formatted pandas data frame. There are a number
         of ways of requesting specific timesteps/decisions. You can specify either:
@@ -182,6 +184,11 @@ class Results:
             the requested decision iterations
         time_decision_tuples: list
             a list of requested (timestep, decision) tuples
+        progress: callable, optional
+            called as ``progress(done, total)`` after each result is read, to report progress
+            through large requests
+        cancel: threading.Event, optional
+            set (for example from another thread) to stop reading results
 
         Raises
         ------
@@ -193,6 +200,8 @@ class Results:
         SmifDataReadError
             When unable to read data e.g. unable to handle file type or connect
             to database
+        SmifDataError
+            If cancelled before all results are read
 
         Returns
         -------
@@ -207,7 +216,9 @@ class Results:
             output_names,
             timesteps,
             decisions,
-            time_decision_tuples
+            time_decision_tuples,
+            progress,
+            cancel
         )
 
         # Keep tabs on the units for each output
@@ -0,0 +1,150 @@
+"""Write results in background threads, so models do not wait for results to be written
+
+Serialising and compressing results can take longer than running a model which sets many
+large outputs. A :class:`ResultsWriter` on the :class:`~smif.data_layer.store.Store` can
+write results from a pool of background threads instead, so that
+:py:meth:`~smif.data_layer.data_handle.DataHandle.set_results` returns as soon as the data is
+copied.
+
+Reading results waits for any pending write of the same results, so results are always read
+as written. Each model step waits for all its results to be written before finishing (see
+:py:meth:`~smif.data_layer.store.Store.flush_results`), so models which depend on its results
+do not start until they are written, and any error in writing is raised from the step.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from logging import getLogger
+
+from smif.data_layer.data_array import DataArray
+from smif.exception import SmifDataError
+
+
+class ResultsWriter(object):
+    """Write results to a data store from a pool of background threads
+
+    Parameters
+    ----------
+    max_workers: int, default=0
+        Number of threads writing results. Zero writes results straight away, without
+        threads.
+    max_pending: int, optional
+        Number of results which may wait to be written before further writes block, to
+        limit the memory held by copies of pending results, defaults to twice `max_workers`
+    """
+    def __init__(self, max_workers=0, max_pending=None):
+        self.logger = getLogger(__name__)
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._slots = None
+        # pending writes, keyed by (model_run_name, model_name, output_name, timestep,
+        # decision_iteration)
+        self._pending = {}
+        # writes submitted since the last flush, checked for errors by the next flush
+        self._unflushed = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # start with no threads or pending writes in other processes
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def write(self, data_store, data_array, model_run_name, model_name, timestep=None,
+              decision_iteration=None, checksum=None):
+        """Write results, in the background if there are writer threads
+
+        Blocks while `max_pending` results are waiting to be written.
+
+        Parameters
+        ----------
+        data_store: ~smif.data_layer.abstract_data_store.DataStore
+        data_array: ~smif.data_layer.data_array.DataArray
+        model_run_name: str
+        model_name: str
+        timestep: int, optional
+        decision_iteration: int, optional
+        checksum: str, optional
+            Checksum of the data, if already computed
+        """
+        if not self.max_workers:
+            data_store.write_results(
+                data_array, model_run_name, model_name, timestep, decision_iteration, checksum)
+            return
+
+        key = (model_run_name, model_name, data_array.name, timestep, decision_iteration)
+        # copy, so that the model can reuse its array while the copy is written
+        data_array = DataArray(data_array.spec, data_array.data.copy())
+        # write results for the same key in the order they were set
+        self.wait(key)
+
+        executor = self._get_executor()
+        self._slots.acquire()
+        future = executor.submit(
+            self._write, data_store, data_array, model_run_name, model_name, timestep,
+            decision_iteration, checksum)
+        with self._lock:
+            self._pending[key] = future
+            self._unflushed.append(future)
+        future.add_done_callback(lambda done: self._finish(key, done))
+
+    def wait(self, key):
+        """Wait for any pending write of results
+
+        Parameters
+        ----------
+        key: tuple
+            (model_run_name, model_name, output_name, timestep, decision_iteration)
+        """
+        with self._lock:
+            future = self._pending.get(key)
+        if future is not None:
+            wait([future])
+
+    def flush(self):
+        """Wait for all pending writes
+
+        Raises
+        ------
+        SmifDataError
+            If any results could not be written since the last flush
+        """
+        # check the futures themselves, as wait may return before their done callbacks run
+        with self._lock:
+            futures, self._unflushed = self._unflushed, []
+        wait(futures)
+        errors = [
+            future.exception() for future in futures if future.exception() is not None
+        ]
+        if errors:
+            msg = "Failed to write {} results:\n{}".format(
+                len(errors), "\n".join(str(error) for error in errors))
+            raise SmifDataError(msg) from errors[0]
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+                max_pending = self.max_pending or 2 * self.max_workers
+                self._slots = threading.BoundedSemaphore(max_pending)
+            return self._executor
+
+    def _write(self, data_store, data_array, model_run_name, model_name, timestep,
+               decision_iteration, checksum):
+        try:
+            data_store.write_results(
+                data_array, model_run_name, model_name, timestep, decision_iteration, checksum)
+        finally:
+            self._slots.release()
+
+    def _finish(self, key, future):
+        with self._lock:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+        error = future.exception()
+        if error is not None:
+            self.logger.error("Failed to write results %s: %s", key, error)
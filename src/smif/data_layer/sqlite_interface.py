@@ -0,0 +1,443 @@
+"""SQLite-backed data store implementation
+
+All data is kept in a single database file, rather than a file per scenario variant, narrative
+variant, model parameter, state and result, which avoids creating and searching through many
+small files on shared filesystems.
+
+Arrays are stored as BLOBs in ``.npy`` format, or as JSON for arrays of Python objects (such
+as strings). Data with a timestep dimension is stored with a row per timestep, so reading a
+single timestep only loads the data for that timestep. Lists of dicts (interventions, initial
+conditions and state) are stored as JSON.
+
+The database is opened in write-ahead-log mode, so that models running in other processes can
+read while results are written. Write-ahead logging needs shared memory between processes,
+so the database should be on a local filesystem or one which supports it.
+"""
+import io
+import json
+import os
+import sqlite3
+import threading
+from logging import getLogger
+
+import numpy as np  # type: ignore
+from smif.data_layer.abstract_data_store import DataStore
+from smif.data_layer.coefficients import (dump_sparse_coefficients, issparse,
+                                          load_sparse_coefficients)
+from smif.data_layer.data_array import DataArray
+from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
+from smif.metadata import Spec
+
+# seconds to wait for other processes writing to the database
+TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS data_arrays (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    timestep INTEGER,
+    spec TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS data_arrays_key ON data_arrays (kind, key, timestep);
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE TABLE IF NOT EXISTS coefficients (
+    source_dim TEXT NOT NULL,
+    destination_dim TEXT NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (source_dim, destination_dim)
+);
+CREATE TABLE IF NOT EXISTS results (
+    model_run TEXT NOT NULL,
+    model TEXT NOT NULL,
+    output TEXT NOT NULL,
+    timestep INTEGER,
+    decision_iteration INTEGER,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_key
+    ON results (model_run, model, output, timestep, decision_iteration);
+"""
+
+
+class SqliteDataStore(DataStore):
+    """Store data in a single SQLite database file
+
+    Parameters
+    ----------
+    path: str
+        Path to the database file, created if it does not exist
+    """
+    def __init__(self, path):
+        super().__init__()
+        self.logger = getLogger(__name__)
+        self.path = str(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # connections cannot be shared between processes, so reconnect in each process
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def _connection(self):
+        """Connect to the database, once per thread
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            dirname = os.path.dirname(self.path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=TIMEOUT)
+            connection.execute("PRAGMA journal_mode=WAL")
+            with self._lock, connection:
+                connection.executescript(SCHEMA)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    # region Data Array
+    def read_scenario_variant_data(self, key, spec, timestep=None, timesteps=None):
+        data = self._read_data_array('scenario', key, spec, timestep, timesteps)
+        try:
+            data.validate_as_full()
+        except SmifDataMismatchError as ex:
+            self.logger.warning(str(ex))
+        return data
+
+    def write_scenario_variant_data(self, key, data):
+        self._write_data_array('scenario', key, data)
+
+    def scenario_variant_data_exists(self, key):
+        return self._data_array_exists('scenario', key)
+
+    def read_narrative_variant_data(self, key, spec, timestep=None):
+        return self._read_data_array('narrative', key, spec, timestep)
+
+    def write_narrative_variant_data(self, key, data):
+        self._write_data_array('narrative', key, data)
+
+    def narrative_variant_data_exists(self, key):
+        return self._data_array_exists('narrative', key)
+
+    def read_model_parameter_default(self, key, spec):
+        data = self._read_data_array('parameter', key, spec)
+        data.validate_as_full()
+        return data
+
+    def write_model_parameter_default(self, key, data):
+        self._write_data_array('parameter', key, data)
+
+    def model_parameter_default_data_exists(self, key):
+        return self._data_array_exists('parameter', key)
+
+    def _read_data_array(self, kind, key, spec, timestep=None, timesteps=None):
+        """Read DataArray, following the same rules for the timestep dimension as
+        :py:meth:`DataStore.filter_on_timesteps`
+        """
+        rows = self._connection().execute(
+            "SELECT timestep, spec, data FROM data_arrays WHERE kind = ? AND key = ? "
+            "ORDER BY timestep", (kind, key)).fetchall()
+        if not rows:
+            raise SmifDataNotFoundError(
+                "Data for {} not found at {} {}".format(spec.name, kind, key))
+
+        has_timestep = rows[0][0] is not None
+        if (timestep is not None or timesteps is not None) and not has_timestep:
+            msg = "Data for '{name}' expected a timestep dimension, instead got dims " + \
+                  "{dims} while reading from {kind} {key}"
+            raise SmifDataMismatchError(msg.format(
+                name=spec.name, dims=json.loads(rows[0][1])['dims'], kind=kind, key=key))
+
+        rows, spec = _filter_rows_on_timesteps(rows, spec, timestep, timesteps)
+        if not rows:
+            raise SmifDataNotFoundError(
+                "Data for '{}' not found for timestep {}".format(spec.name, timestep))
+
+        stored_spec = Spec.from_dict(dict(json.loads(rows[0][1]), name=spec.name))
+        data = [_load_array(row[2]) for row in rows]
+        if has_timestep and 'timestep' in spec.dims:
+            stored_spec = DataStore._set_spec_timesteps(stored_spec, [row[0] for row in rows])
+            data = np.stack(data)
+        elif len(data) == 1:
+            data = data[0]
+        else:
+            msg = "Data for '{}' should contain a single timestep, instead got {} while " + \
+                  "reading from {} {}"
+            raise SmifDataMismatchError(msg.format(spec.name, len(data), kind, key))
+
+        if _same_layout(stored_spec, spec):
+            return DataArray(spec, data)
+        # reorder, or fill in missing values, to match the spec
+        return DataArray.from_arrow(spec, DataArray(stored_spec, data).to_arrow())
+
+    def _write_data_array(self, kind, key, data_array):
+        """Write DataArray, with a row per timestep if it has a timestep dimension
+        """
+        spec = data_array.spec
+        if 'timestep' in spec.dims:
+            axis = spec.dims.index('timestep')
+            row_spec = _dump_spec(spec, [dim for dim in spec.dims if dim != 'timestep'])
+            rows = [
+                (kind, key, int(timestep), row_spec,
+                 _dump_array(np.take(data_array.data, i, axis=axis)))
+                for i, timestep in enumerate(spec.dim_coords('timestep').ids)
+            ]
+        else:
+            rows = [(kind, key, None, _dump_spec(spec, spec.dims),
+                     _dump_array(data_array.data))]
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "DELETE FROM data_arrays WHERE kind = ? AND key = ?", (kind, key))
+            connection.executemany(
+                "INSERT INTO data_arrays VALUES (?, ?, ?, ?, ?)", rows)
+
+    def _data_array_exists(self, kind, key):
+        return self._connection().execute(
+            "SELECT 1 FROM data_arrays WHERE kind = ? AND key = ? LIMIT 1",
+            (kind, key)).fetchone() is not None
+    # endregion
+
+    # region Interventions
+    def read_interventions(self, keys):
+        all_interventions = {}
+        dups = set()
+        for key in keys:
+            for intervention in self._read_records('interventions', key):
+                name = intervention['name']
+                if name in all_interventions:
+                    dups.add(name)
+                all_interventions[name] = intervention
+
+        if dups:
+            name = dups.pop()
+            msg = "An entry for intervention {} already exists. Also found duplicates for {}"
+            raise ValueError(msg.format(name, dups))
+
+        return all_interventions
+
+    def write_interventions(self, key, interventions):
+        self._write_records('interventions', key, list(interventions.values()))
+
+    def interventions_data_exists(self, key):
+        return self._records_exist('interventions', key)
+
+    def read_strategy_interventions(self, strategy):
+        return self._read_records('strategies', strategy['filename'])
+
+    def write_strategy_interventions(self, strategy, data):
+        self._write_records('strategies', strategy['filename'], data)
+
+    def strategy_data_exists(self, strategy):
+        return self._records_exist('strategies', strategy['filename'])
+
+    def read_initial_conditions(self, keys):
+        conditions = []
+        for key in keys:
+            conditions.extend(self._read_records('initial_conditions', key))
+        return conditions
+
+    def write_initial_conditions(self, key, initial_conditions):
+        self._write_records('initial_conditions', key, initial_conditions)
+
+    def initial_conditions_data_exists(self, key):
+        return self._records_exist('initial_conditions', key)
+    # endregion
+
+    # region State
+    def read_state(self, modelrun_name, timestep, decision_iteration=None):
+        key = json.dumps([modelrun_name, timestep, decision_iteration])
+        try:
+            return self._read_records('state', key)
+        except SmifDataNotFoundError:
+            msg = "Decision state not found for timestep {}, decision {}"
+            raise SmifDataNotFoundError(msg.format(timestep, decision_iteration))
+
+    def write_state(self, state, modelrun_name, timestep=None, decision_iteration=None):
+        key = json.dumps([modelrun_name, timestep, decision_iteration])
+        self._write_records('state', key, state)
+    # endregion
+
+    # region Records
+    def _read_records(self, kind, key):
+        row = self._connection().execute(
+            "SELECT data FROM records WHERE kind = ? AND key = ?", (kind, key)).fetchone()
+        if row is None:
+            raise SmifDataNotFoundError("Could not find {} data for {}".format(kind, key))
+        return json.loads(row[0])
+
+    def _write_records(self, kind, key, data):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO records VALUES (?, ?, ?)",
+                (kind, key, json.dumps(data, default=_json_default)))
+
+    def _records_exist(self, kind, key):
+        return self._connection().execute(
+            "SELECT 1 FROM records WHERE kind = ? AND key = ?",
+            (kind, key)).fetchone() is not None
+    # endregion
+
+    # region Conversion coefficients
+    def read_coefficients(self, source_dim, destination_dim):
+        row = self._connection().execute(
+            "SELECT data FROM coefficients WHERE source_dim = ? AND destination_dim = ?",
+            (source_dim, destination_dim)).fetchone()
+        if row is None:
+            msg = "Could not find coefficients for conversion from {}>{}"
+            raise SmifDataNotFoundError(msg.format(source_dim, destination_dim))
+        return _load_coefficients(row[0])
+
+    def write_coefficients(self, source_dim, destination_dim, data):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO coefficients VALUES (?, ?, ?)",
+                (source_dim, destination_dim, _dump_coefficients(data)))
+    # endregion
+
+    # region Results
+    def read_results(self, modelrun_name, model_name, output_spec, timestep=None,
+                     decision_iteration=None):
+        if timestep is None:
+            raise ValueError("You must pass a timestep argument")
+
+        row = self._connection().execute(
+            "SELECT data FROM results WHERE model_run = ? AND model = ? AND output = ? "
+            "AND timestep IS ? AND decision_iteration IS ?",
+            (modelrun_name, model_name, output_spec.name, timestep, decision_iteration)
+        ).fetchone()
+        if row is None:
+            key = str([modelrun_name, model_name, output_spec.name, timestep,
+                       decision_iteration])
+            raise SmifDataNotFoundError("Could not find results for {}".format(key))
+        return DataArray(output_spec, _load_array(row[0]))
+
+    def write_results(self, data_array, modelrun_name, model_name, timestep=None,
+                      decision_iteration=None, checksum=None):
+        if timestep is None:
+            raise NotImplementedError()
+
+        connection = self._connection()
+        with connection:
+            self._delete_results(connection, modelrun_name, model_name, data_array.name,
+                                 timestep, decision_iteration)
+            connection.execute(
+                "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?)",
+                (modelrun_name, model_name, data_array.name, timestep, decision_iteration,
+                 _dump_array(data_array.data)))
+
+    def delete_results(self, model_run_name, model_name, output_name, timestep=None,
+                       decision_iteration=None):
+        if timestep is None:
+            raise NotImplementedError()
+
+        connection = self._connection()
+        with connection:
+            self._delete_results(connection, model_run_name, model_name, output_name,
+                                 timestep, decision_iteration)
+
+    def available_results(self, modelrun_name):
+        return [
+            tuple(row) for row in self._connection().execute(
+                "SELECT timestep, decision_iteration, model, output FROM results "
+                "WHERE model_run = ?", (modelrun_name,))
+        ]
+
+    @staticmethod
+    def _delete_results(connection, model_run_name, model_name, output_name, timestep,
+                        decision_iteration):
+        # IS rather than = so that a decision iteration of None matches NULL
+        connection.execute(
+            "DELETE FROM results WHERE model_run = ? AND model = ? AND output = ? "
+            "AND timestep IS ? AND decision_iteration IS ?",
+            (model_run_name, model_name, output_name, timestep, decision_iteration))
+    # endregion
+
+
+def _filter_rows_on_timesteps(rows, spec, timestep, timesteps):
+    """Select rows of (timestep, spec, data) for the timesteps requested, and set the timesteps
+    of the spec to match
+    """
+    if timestep is not None:
+        rows = [row for row in rows if row[0] == timestep]
+        if 'timestep' in spec.dims:
+            spec = DataStore._set_spec_timesteps(spec, [timestep])
+    elif timesteps is not None:
+        rows = [row for row in rows if row[0] in timesteps]
+        spec = DataStore._set_spec_timesteps(spec, timesteps)
+    elif rows[0][0] is not None:
+        spec = DataStore._set_spec_timesteps(spec, [row[0] for row in rows])
+    return rows, spec
+
+
+def _dump_array(data):
+    """Serialise an array to bytes - as JSON for arrays of Python objects, which cannot be
+    written in npy format without pickling, otherwise in npy format
+    """
+    data = np.asarray(data)
+    if data.dtype.hasobject:
+        return json.dumps(
+            {'shape': data.shape, 'data': data.ravel().tolist()}, default=_json_default
+        ).encode()
+    buffer = io.BytesIO()
+    np.save(buffer, data, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _load_array(blob):
+    if blob[:1] == b'{':
+        loaded = json.loads(blob.decode())
+        data = np.empty(len(loaded['data']), dtype='object')
+        data[:] = loaded['data']
+        return data.reshape(loaded['shape'])
+    return np.load(io.BytesIO(blob), allow_pickle=False)
+
+
+def _dump_coefficients(data):
+    """Serialise coefficients to bytes - in npz format if sparse, otherwise in npy format
+    """
+    if issparse(data):
+        buffer = io.BytesIO()
+        dump_sparse_coefficients(buffer, data)
+        return buffer.getvalue()
+    return _dump_array(data)
+
+
+def _load_coefficients(blob):
+    # npz is a zip archive
+    if blob[:2] == b'PK':
+        return load_sparse_coefficients(io.BytesIO(blob))
+    return _load_array(blob)
+
+
+def _json_default(value):
+    # numpy scalars in records or object arrays
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError("Object of type {} is not JSON serializable".format(type(value)))
+
+
+def _dump_spec(spec, dims):
+    """Serialise the dims, coords and dtype of a spec, for the given dims only
+    """
+    return json.dumps({
+        'dims': dims,
+        'coords': {dim: spec.dim_names(dim) for dim in dims},
+        'dtype': spec.dtype
+    }, default=_json_default)
+
+
+def _same_layout(stored_spec, spec):
+    return stored_spec.dims == spec.dims and all(
+        stored_spec.dim_names(dim) == spec.dim_names(dim) for dim in spec.dims)
@@ -17,7 +17,9 @@ SmifDataReadError
 import itertools
 import logging
 import os
+import threading
 from collections import OrderedDict, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from copy import deepcopy
 from operator import itemgetter
 from os.path import splitext
@@ -27,13 +29,23 @@ import numpy as np  # type: ignore
 from smif.data_layer import DataArray
 from smif.data_layer.abstract_data_store import DataStore
 from smif.data_layer.abstract_metadata_store import MetadataStore
+from smif.data_layer.data_cache import (DEFAULT_COEFFICIENT_CACHE_SIZE,
+                                        DEFAULT_DATA_CACHE_SIZE, CoefficientCache,
+                                        DataCache)
 from smif.data_layer.file import (CSVDataStore, FileMetadataStore,
-                                  ParquetDataStore, YamlConfigStore)
+                                  NpyDataStore, ParquetDataStore,
+                                  YamlConfigStore)
+from smif.data_layer.job_journal import JobJournal
+from smif.data_layer.results_writer import ResultsWriter
+from smif.data_layer.sqlite_interface import SqliteDataStore
 from smif.data_layer.validate import (validate_sos_model_config,
                                       validate_sos_model_format)
 from smif.exception import SmifDataError, SmifDataNotFoundError
 from smif.metadata.spec import Spec
 
+# default number of threads reading results
+DEFAULT_RESULTS_READERS = 4
+
 
 class Store():
     """Common interface to data store, composed of config, metadata and data store
@@ -44,17 +56,50 @@ class Store():
     config_store: ~smif.data_layer.abstract_config_store.ConfigStore
     metadata_store: ~smif.data_layer.abstract_metadata_store.MetadataStore
     data_store: ~smif.data_layer.abstract_data_store.DataStore
+    model_base_folder: str, default='.'
+    data_cache_size: int, optional
+        Size limit in bytes for scenario and narrative data kept in memory after reading,
+        defaults to 256MiB, zero to disable (see
+        :class:`~smif.data_layer.data_cache.DataCache`)
+    results_writers: int, default=0
+        Number of background threads writing results, zero to write results before returning
+        from :py:meth:`write_results` (see
+        :class:`~smif.data_layer.results_writer.ResultsWriter`)
+    results_readers: int, optional
+        Number of threads reading results for :py:meth:`get_results` and
+        :py:meth:`get_result_darray`, defaults to 4, one to read results in turn
+    coefficient_cache_size: int, optional
+        Size limit in bytes for conversion coefficients kept in memory after reading, defaults
+        to 512MiB, zero to disable (see
+        :class:`~smif.data_layer.data_cache.CoefficientCache`)
     """
 
     def __init__(self, config_store, metadata_store: MetadataStore,
-                 data_store: DataStore, model_base_folder="."):
+                 data_store: DataStore, model_base_folder=".",
+                 data_cache_size=DEFAULT_DATA_CACHE_SIZE, results_writers=0,
+                 results_readers=DEFAULT_RESULTS_READERS,
+                 coefficient_cache_size=DEFAULT_COEFFICIENT_CACHE_SIZE):
         self.logger = logging.getLogger(__name__)
         self.config_store = config_store
         self.metadata_store = metadata_store
         self.data_store = data_store
+        self.data_cache = DataCache(data_cache_size)
+        self.coefficient_cache = CoefficientCache(coefficient_cache_size)
+        self.results_writer = ResultsWriter(results_writers)
+        self.results_readers = results_readers
         # base folder for any relative paths to models
         self.model_base_folder = str(model_base_folder)
 
+    def __getstate__(self):
+        # loggers can only be pickled from Python 3.7, so get the logger again when unpickled
+        state = self.__dict__.copy()
+        del state['logger']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.logger = logging.getLogger(__name__)
+
     @classmethod
     def from_dict(cls, config):
         """Create Store from configuration dict
@@ -80,10 +125,14 @@ class Store():
             data_store = CSVDataStore(directory)
         elif interface == 'local_parquet':
             data_store = ParquetDataStore(directory)
+        elif interface == 'local_npy':
+            data_store = NpyDataStore(directory)
+        elif interface == 'local_sqlite':
+            data_store = SqliteDataStore(os.path.join(directory, 'data', 'smif.sqlite'))
         else:
             raise ValueError(
-                'Unsupported interface "{}". Supply local_csv or local_parquet'.format(
-                    interface))
+                'Unsupported interface "{}". Supply local_csv, local_parquet, local_npy or '
+                'local_sqlite'.format(interface))
 
         return cls(
             config_store=YamlConfigStore(directory),
@@ -195,6 +244,7 @@ class Store():
         validate_sos_model_config(sos_model, models, scenarios)
 
         self.config_store.update_sos_model(sos_model_name, sos_model)
+        self.data_cache.invalidate(('narrative', sos_model_name))
 
     def delete_sos_model(self, sos_model_name):
         """Delete a system-of-system model
@@ -204,6 +254,7 @@ class Store():
         sos_model_name : str
         """
         self.config_store.delete_sos_model(sos_model_name)
+        self.data_cache.invalidate(('narrative', sos_model_name))
 
     # endregion
 
@@ -257,6 +308,8 @@ class Store():
         model : ~smif.model.model.Model
         """
         self.config_store.update_model(model_name, model)
+        # narrative data is read using model parameter specs
+        self.data_cache.invalidate(('narrative',))
 
     def delete_model(self, model_name):
         """Delete a model
@@ -319,6 +372,7 @@ class Store():
         scenario : ~smif.model.ScenarioModel
         """
         self.config_store.update_scenario(scenario_name, scenario)
+        self.data_cache.invalidate(('scenario', scenario_name))
 
     def delete_scenario(self, scenario_name):
         """Delete scenario from project configuration
@@ -328,6 +382,7 @@ class Store():
         scenario_name : str
         """
         self.config_store.delete_scenario(scenario_name)
+        self.data_cache.invalidate(('scenario', scenario_name))
 
     def prepare_scenario(self, scenario_name, list_of_variants):
         """ Modify {scenario_name} config file to include multiple
@@ -459,6 +514,7 @@ class Store():
         variant : dict
         """
         self.config_store.update_scenario_variant(scenario_name, variant_name, variant)
+        self.data_cache.invalidate(('scenario', scenario_name, variant_name))
 
     def delete_scenario_variant(self, scenario_name, variant_name):
         """Delete scenario from project configuration
@@ -469,6 +525,7 @@ class Store():
         variant_name : str
         """
         self.config_store.delete_scenario_variant(scenario_name, variant_name)
+        self.data_cache.invalidate(('scenario', scenario_name, variant_name))
 
     # endregion
 
@@ -643,6 +700,13 @@ class Store():
         -------
         data : ~smif.data_layer.data_array.DataArray
         """
+        if not assert_exists:
+            cache_key = ('scenario', scenario_name, variant_name, variable, timestep,
+                         None if timesteps is None else tuple(timesteps))
+            data = self.data_cache.get(cache_key)
+            if data is not None:
+                return data
+
         variant = self.read_scenario_variant(scenario_name, variant_name)
         key = self._key_from_data(variant['data'][variable], scenario_name, variant_name,
                                   variable)
@@ -652,7 +716,9 @@ class Store():
         if assert_exists:
             return self.data_store.scenario_variant_data_exists(key)
         else:
-            return self.data_store.read_scenario_variant_data(key, spec, timestep, timesteps)
+            data = self.data_store.read_scenario_variant_data(key, spec, timestep, timesteps)
+            self.data_cache.put(cache_key, data)
+            return data
 
     def write_scenario_variant_data(self, scenario_name, variant_name, data):
         """Write scenario data file
@@ -667,6 +733,7 @@ class Store():
         key = self._key_from_data(variant['data'][data.spec.name], scenario_name, variant_name,
                                   data.spec.name)
         self.data_store.write_scenario_variant_data(key, data)
+        self.data_cache.invalidate(('scenario', scenario_name, variant_name, data.spec.name))
 
     def convert_scenario_data(self, model_run_name, tgt_store, noclobber=False):
         model_run = self.read_model_run(model_run_name)
@@ -701,6 +768,13 @@ class Store():
         -------
         ~smif.data_layer.data_array.DataArray
         """
+        if not assert_exists:
+            cache_key = ('narrative', sos_model_name, narrative_name, variant_name,
+                         parameter_name, timestep)
+            data = self.data_cache.get(cache_key)
+            if data is not None:
+                return data
+
         sos_model = self.read_sos_model(sos_model_name)
 
         narrative = _pick_from_list(sos_model['narratives'], narrative_name)
@@ -734,7 +808,9 @@ class Store():
                     parameter_name, sos_model['sector_models']))
             spec = Spec.from_dict(spec_dict)
 
-            return self.data_store.read_narrative_variant_data(key, spec, timestep)
+            data = self.data_store.read_narrative_variant_data(key, spec, timestep)
+            self.data_cache.put(cache_key, data)
+            return data
 
     def write_narrative_variant_data(self, sos_model_name, narrative_name, variant_name, data):
         """Read narrative data file
@@ -752,6 +828,8 @@ class Store():
         key = self._key_from_data(
             variant['data'][data.spec.name], narrative_name, variant_name, data.spec.name)
         self.data_store.write_narrative_variant_data(key, data)
+        # the same narrative data may be read through several sos models
+        self.data_cache.invalidate(('narrative',))
 
     def convert_narrative_data(self, sos_model_name, tgt_store, noclobber=False):
         sos_model = self.read_sos_model(sos_model_name)
@@ -1023,29 +1101,41 @@ class Store():
     # endregion
 
     # region Conversion coefficients
-    def read_coefficients(self, source_dim: str, destination_dim: str) -> np.ndarray:
+    def read_coefficients(self, source_dim: str, destination_dim: str,
+                          digest: str = None) -> np.ndarray:
         """Reads coefficients from the store
 
         Coefficients are uniquely identified by their source/destination dimensions.
         This method and `write_coefficients` implement caching of conversion
         coefficients between dimensions.
 
+        Coefficients are kept in memory once read, and shared between all callers, so must not
+        be modified.
+
         Parameters
         ----------
         source_dim : str
             Dimension name
         destination_dim : str
             Dimension name
+        digest : str, optional
+            Identifies the elements of both dimensions, so that coefficients kept in memory
+            are not used for dimensions which have since changed
 
         Returns
         -------
-        numpy.ndarray
+        numpy.ndarray or scipy.sparse.csr_matrix
 
         Notes
         -----
         To be called from :class:`~smif.convert.adaptor.Adaptor` implementations.
         """
-        return self.data_store.read_coefficients(source_dim, destination_dim)
+        cache_key = (source_dim, destination_dim, digest)
+        data = self.coefficient_cache.get(cache_key)
+        if data is None:
+            data = self.data_store.read_coefficients(source_dim, destination_dim)
+            self.coefficient_cache.put(cache_key, data)
+        return data
 
     def write_coefficients(self, source_dim: str, destination_dim: str, data: np.ndarray):
         """Writes coefficients to the store
@@ -1060,12 +1150,13 @@ class Store():
             Dimension name
         destination_dim : str
             Dimension name
-        data : numpy.ndarray
+        data : numpy.ndarray or scipy.sparse.csr_matrix
 
         Notes
         -----
         To be called from :class:`~smif.convert.adaptor.Adaptor` implementations.
         """
+        self.coefficient_cache.invalidate((source_dim, destination_dim))
         self.data_store.write_coefficients(source_dim, destination_dim, data)
 
     # endregion
@@ -1091,11 +1182,13 @@ class Store():
         -------
         ~smif.data_layer.data_array.DataArray
         """
+        self.results_writer.wait(
+            (model_run_name, model_name, output_spec.name, timestep, decision_iteration))
         return self.data_store.read_results(
             model_run_name, model_name, output_spec, timestep, decision_iteration)
 
     def write_results(self, data_array, model_run_name, model_name, timestep=None,
-                      decision_iteration=None):
+                      decision_iteration=None, checksum=None):
         """Write results of a `model_name` in `model_run_name` for a given `output_name`
 
         Parameters
@@ -1105,9 +1198,23 @@ class Store():
         model_name : str
         timestep : int, optional
         decision_iteration : int, optional
+        checksum : str, optional
+            Checksum of the data, if already computed (see
+            :py:meth:`~smif.data_layer.data_array.DataArray.checksum`)
         """
-        self.data_store.write_results(
-            data_array, model_run_name, model_name, timestep, decision_iteration)
+        self.results_writer.write(
+            self.data_store, data_array, model_run_name, model_name, timestep,
+            decision_iteration, checksum)
+
+    def flush_results(self):
+        """Wait for any results still being written in the background
+
+        Raises
+        ------
+        SmifDataError
+            If any results could not be written
+        """
+        self.results_writer.flush()
 
     def delete_results(self, model_run_name, model_name, output_name, timestep=None,
                        decision_iteration=None):
@@ -1121,6 +1228,8 @@ class Store():
         timestep : int, default=None
         decision_iteration : int, default=None
         """
+        self.results_writer.wait(
+            (model_run_name, model_name, output_name, timestep, decision_iteration))
         self.data_store.delete_results(
             model_run_name, model_name, output_name, timestep, decision_iteration)
 
@@ -1135,6 +1244,9 @@ class Store():
         for timestep, decision_iteration, model_name, output_name in available:
             self.data_store.delete_results(
                 model_run_name, model_name, output_name, timestep, decision_iteration)
+        journal = self.job_journal(model_run_name)
+        if journal is not None:
+            journal.clear()
 
     def available_results(self, model_run_name):
         """List available results from a model run
@@ -1148,11 +1260,34 @@ class Store():
         list[tuple]
              Each tuple is (timestep, decision_iteration, model_name, output_name)
         """
+        self.results_writer.flush()
         return self.data_store.available_results(model_run_name)
 
+    def job_journal(self, model_run_name):
+        """Get the journal of jobs started and finished in a model run
+
+        Only data stores which keep results in a folder (see
+        :class:`~smif.data_layer.file.file_data_store.FileDataStore`) keep a journal.
+
+        Parameters
+        ----------
+        model_run_name : str
+
+        Returns
+        -------
+        ~smif.data_layer.job_journal.JobJournal or None
+        """
+        results_folder = getattr(self.data_store, 'results_folder', None)
+        if results_folder is None:
+            return None
+        return JobJournal(os.path.join(results_folder, model_run_name, 'job_journal.jsonl'))
+
     def completed_jobs(self, model_run_name):
         """List completed jobs from a model run
 
+        Reads the job journal if there is one, otherwise checks which jobs have written all
+        their expected results.
+
         Parameters
         ----------
         model_run_name : str
@@ -1162,6 +1297,10 @@ class Store():
         list[tuple]
              Each tuple is (timestep, decision_iteration, model_name)
         """
+        journal = self.job_journal(model_run_name)
+        if journal is not None and journal.exists():
+            return journal.finished_jobs()
+
         available_results = self.available_results(model_run_name)  # {(t, d, model, output)}
         model_outputs = self.expected_model_outputs(model_run_name)  # [(model, output)]
         completed_jobs = self.filter_complete_available_results(
@@ -1242,6 +1381,10 @@ class Store():
         -----
         Called from smif.controller.execute
         """
+        journal = self.job_journal(model_run_name)
+        if journal is not None and journal.exists():
+            return journal.latest_timestep()
+
         available_results = self.available_results(model_run_name)
         if available_results:
             max_timestep = max(
@@ -1349,7 +1492,7 @@ class Store():
             model_run_name) - self.canonical_available_results(model_run_name)
 
     def _get_result_darray_internal(self, model_run_name, model_name, output_name,
-                                    time_decision_tuples):
+                                    time_decision_tuples, progress=None, cancel=None):
         """Internal implementation for `get_result_darray`, after the unique list of
         (timestep, decision) tuples has been generated and validated.
 
@@ -1357,8 +1500,8 @@ class Store():
         and output_name and expands the spec to include an additional dimension for the list of
         tuples.
 
-        Then, for each tuple, the data array from the corresponding read_results call is
-        stacked, and together with the new spec this information is returned as a new
+        Then the data array from the read_results call for each tuple is read into the
+        stacked data, and together with the new spec this information is returned as a new
         DataArray.
 
         Parameters
@@ -1367,12 +1510,20 @@ class Store():
         model_name : str
         output_name : str
         time_decision_tuples : list of unique (timestep, decision) tuples
+        progress : callable, optional
+            Called as ``progress(done, total)`` after each result is read
+        cancel : threading.Event, optional
+            Set to stop reading results
 
         Returns
         -------
         DataArray with expanded spec and data for each (timestep, decision) tuple
         """
+        output_spec = self._read_output_spec(model_name, output_name)
+        request = (model_run_name, model_name, output_spec, time_decision_tuples)
+        return self._read_stacked_results([request], progress, cancel)[0]
 
+    def _read_output_spec(self, model_name, output_name):
         # Get the output spec given the name of the sector model and output
         output_spec = None
         model = self.read_model(model_name)
@@ -1386,28 +1537,103 @@ class Store():
             output_spec = Spec.from_dict(output)
 
         assert output_spec, "Output name was not found in model outputs"
+        return output_spec
 
-        # Read the results for each (timestep, decision) tuple and stack them
-        list_of_numpy_arrays = []
+    def _read_stacked_results(self, requests, progress=None, cancel=None):
+        """Read results for lists of (timestep, decision) tuples, stacking each list of
+        results into a DataArray with an extra timestep_decision dimension.
 
-        for t, d in time_decision_tuples:
-            d_array = self.read_results(model_run_name, model_name, output_spec, t, d)
-            list_of_numpy_arrays.append(d_array.data)
+        Results are read by up to `results_readers` threads, and each result is copied into
+        an array allocated once for the stacked data, so results are not held twice.
 
-        stacked_data = np.vstack(list_of_numpy_arrays)
-
-        # Add new dimensions to the data spec
-        output_dict = output_spec.as_dict()
-        output_dict['dims'] = ['timestep_decision'] + output_dict['dims']
-        output_dict['coords']['timestep_decision'] = time_decision_tuples
-
-        output_spec = Spec.from_dict(output_dict)
+        Parameters
+        ----------
+        requests : list of (model_run_name, model_name, output_spec, time_decision_tuples)
+        progress : callable, optional
+            Called as ``progress(done, total)`` after each result is read
+        cancel : threading.Event, optional
+            Set to stop reading results
 
-        # Create a new DataArray from the modified spec and stacked data
-        return DataArray(output_spec, np.reshape(stacked_data, output_spec.shape))
+        Returns
+        -------
+        list of DataArray, one for each request
+
+        Raises
+        ------
+        SmifDataNotFoundError
+            If any request has no (timestep, decision) tuples
+        SmifDataError
+            If cancelled before all results are read
+        """
+        specs = []
+        arrays = []
+        reads = []
+        for index, request in enumerate(requests):
+            model_run_name, model_name, output_spec, time_decision_tuples = request
+            if not time_decision_tuples:
+                msg = "No results requested for output '{}' of model '{}' in model run '{}'"
+                raise SmifDataNotFoundError(
+                    msg.format(output_spec.name, model_name, model_run_name))
+            specs.append(_stacked_spec(output_spec, time_decision_tuples))
+            arrays.append(None)
+            for row, (t, d) in enumerate(time_decision_tuples):
+                reads.append((index, row, model_run_name, model_name, output_spec, t, d))
+
+        lock = threading.Lock()
+
+        def read(index, row, model_run_name, model_name, output_spec, timestep, decision):
+            data = self.read_results(
+                model_run_name, model_name, output_spec, timestep, decision).data
+            with lock:
+                # allocate on the first read, and upcast if a later read has a wider dtype, so
+                # the stacked dtype is the result type of all reads (as np.vstack gives),
+                # whichever order reads finish in
+                if arrays[index] is None:
+                    arrays[index] = np.empty(specs[index].shape, dtype=data.dtype)
+                elif not np.can_cast(data.dtype, arrays[index].dtype):
+                    arrays[index] = arrays[index].astype(
+                        np.result_type(arrays[index].dtype, data.dtype))
+                arrays[index][row] = data
+
+        self._run_results_reads(read, reads, progress, cancel)
+        return [DataArray(spec, data) for spec, data in zip(specs, arrays)]
+
+    def _run_results_reads(self, read, reads, progress=None, cancel=None):
+        """Call `read` with each tuple of arguments in `reads`, from a pool of threads if
+        `results_readers` allows
+        """
+        total = len(reads)
+        max_workers = min(self.results_readers, total)
+
+        if max_workers <= 1:
+            for done, args in enumerate(reads, 1):
+                _check_cancelled(cancel)
+                read(*args)
+                if progress is not None:
+                    progress(done, total)
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set(executor.submit(read, *args) for args in reads)
+            done = 0
+            try:
+                while pending:
+                    # time out to check for cancellation while reads are slow
+                    finished, pending = wait(
+                        pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        future.result()
+                        done += 1
+                        if progress is not None:
+                            progress(done, total)
+                    _check_cancelled(cancel)
+            finally:
+                for future in pending:
+                    future.cancel()
 
     def get_result_darray(self, model_run_name, model_name, output_name, timesteps=None,
-                          decision_iterations=None, time_decision_tuples=None):
+                          decision_iterations=None, time_decision_tuples=None,
+                          progress=None, cancel=None):
         """Return data for multiple timesteps and decision iterations for a given output from
         a given sector model in a specific model run.
 
@@ -1443,55 +1669,21 @@ class Store():
         timesteps : optional list of timesteps
         decision_iterations : optional list of decision iterations
         time_decision_tuples : optional list of unique (timestep, decision) tuples
+        progress : callable, optional
+            Called as ``progress(done, total)`` after each result is read
+        cancel : threading.Event, optional
+            Set to stop reading results, raising SmifDataError
 
         Returns
         -------
         DataArray with expanded spec and the data requested
         """
-        available = self.available_results(model_run_name)
-
-        # Build up the necessary list of tuples
-        if not timesteps and not decision_iterations and not time_decision_tuples:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name
-            ]
-
-        elif timesteps and not decision_iterations and not time_decision_tuples:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and t in timesteps
-            ]
-
-        elif decision_iterations and not timesteps and not time_decision_tuples:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and d in decision_iterations
-            ]
-
-        elif time_decision_tuples and not timesteps and not decision_iterations:
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and (t, d) in time_decision_tuples
-            ]
-
-        elif timesteps and decision_iterations and not time_decision_tuples:
-            t_d = list(itertools.product(timesteps, decision_iterations))
-            list_of_tuples = [
-                (t, d) for t, d, m, out in available
-                if m == model_name and out == output_name and (t, d) in t_d
-            ]
-
-        else:
-            msg = "Expected either timesteps, or decisions, or (timestep, decision) " + \
-                  "tuples, or timesteps and decisions, or none of the above."
-            raise ValueError(msg)
-
-        if not list_of_tuples:
-            raise SmifDataNotFoundError("None of the requested data is available.")
+        list_of_tuples = _list_time_decision_tuples(
+            self.available_results(model_run_name), model_name, output_name, timesteps,
+            decision_iterations, time_decision_tuples)
 
         return self._get_result_darray_internal(
-            model_run_name, model_name, output_name, sorted(list_of_tuples)
+            model_run_name, model_name, output_name, list_of_tuples, progress, cancel
         )
 
     def get_results(self,
@@ -1501,10 +1693,15 @@ class Store():
                     timesteps: list = None,
                     decisions: list = None,
                     time_decision_tuples: list = None,
+                    progress=None,
+                    cancel=None
                     ):
         """Return data for multiple timesteps and decision iterations for a given output from
         a given sector model for multiple model runs.
 
+        Results for all model runs and outputs are read together, by up to `results_readers`
+        threads.
+
         Parameters
         ----------
         model_run_names: list[str]
@@ -1519,6 +1716,10 @@ class Store():
             the requested decision iterations
         time_decision_tuples: list[tuple]
             a list of requested (timestep, decision) tuples
+        progress: callable, optional
+            called as ``progress(done, total)`` after each result is read
+        cancel: threading.Event, optional
+            set to stop reading results, raising SmifDataError
 
         Returns
         -------
@@ -1544,19 +1745,25 @@ class Store():
             if coord != coords[0]:
                 raise ValueError('Different outputs must have the same coordinates')
 
+        # List the requested results for every model run and output, to read them together
+        output_specs = {output['name']: Spec.from_dict(output) for output in outputs}
+        requests = []
+        for model_run_name in model_run_names:
+            available = self.available_results(model_run_name)
+            for output_name in output_names:
+                list_of_tuples = _list_time_decision_tuples(
+                    available, model_name, output_name, timesteps, decisions,
+                    time_decision_tuples)
+                requests.append(
+                    (model_run_name, model_name, output_specs[output_name], list_of_tuples))
+
         # Now actually obtain the requested results
+        stacked = iter(self._read_stacked_results(requests, progress, cancel))
         results_dict = OrderedDict()  # type: OrderedDict
         for model_run_name in model_run_names:
             results_dict[model_run_name] = OrderedDict()
             for output_name in output_names:
-                results_dict[model_run_name][output_name] = self.get_result_darray(
-                    model_run_name,
-                    model_name,
-                    output_name,
-                    timesteps,
-                    decisions,
-                    time_decision_tuples
-                )
+                results_dict[model_run_name][output_name] = next(stacked)
         return results_dict
 
     # endregion
@@ -1565,7 +1772,7 @@ class Store():
     def _key_from_data(self, path, *args):
         """Return path or generate a unique key for a given set of args
         """
-        if isinstance(self.data_store, (CSVDataStore, ParquetDataStore)):
+        if isinstance(self.data_store, (CSVDataStore, ParquetDataStore, SqliteDataStore)):
             return path
         else:
             return tuple(args)
@@ -1577,3 +1784,55 @@ def _pick_from_list(list_of_dicts, name):
         if 'name' in item and item['name'] == name:
             return item
     return None
+
+
+def _list_time_decision_tuples(available, model_name, output_name, timesteps=None,
+                               decision_iterations=None, time_decision_tuples=None):
+    """List the sorted (timestep, decision) tuples of available results which match a
+    request, as described in :py:meth:`Store.get_result_darray`
+    """
+    results = [
+        (t, d) for t, d, m, out in available
+        if m == model_name and out == output_name
+    ]
+
+    # Build up the necessary list of tuples
+    if not timesteps and not decision_iterations and not time_decision_tuples:
+        list_of_tuples = results
+
+    elif timesteps and not decision_iterations and not time_decision_tuples:
+        list_of_tuples = [(t, d) for t, d in results if t in timesteps]
+
+    elif decision_iterations and not timesteps and not time_decision_tuples:
+        list_of_tuples = [(t, d) for t, d in results if d in decision_iterations]
+
+    elif time_decision_tuples and not timesteps and not decision_iterations:
+        list_of_tuples = [(t, d) for t, d in results if (t, d) in time_decision_tuples]
+
+    elif timesteps and decision_iterations and not time_decision_tuples:
+        t_d = list(itertools.product(timesteps, decision_iterations))
+        list_of_tuples = [(t, d) for t, d in results if (t, d) in t_d]
+
+    else:
+        msg = "Expected either timesteps, or decisions, or (timestep, decision) " + \
+              "tuples, or timesteps and decisions, or none of the above."
+        raise ValueError(msg)
+
+    if not list_of_tuples:
+        raise SmifDataNotFoundError("None of the requested data is available.")
+
+    return sorted(list_of_tuples)
+
+
+def _stacked_spec(output_spec, time_decision_tuples):
+    """Add a timestep_decision dimension to an output spec
+    """
+    output_dict = output_spec.as_dict()
+    output_dict['dims'] = ['timestep_decision'] + output_dict['dims']
+    output_dict['coords']['timestep_decision'] = time_decision_tuples
+    return Spec.from_dict(output_dict)
+
+
+def _check_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise SmifDataError("Cancelled reading results")
@@ -142,7 +142,7 @@ class DecisionManager(object):
             msg = ""
             raise SmifDataNotFoundError(msg.format(value))
 
-    def decision_loop(self):
+    def decision_loop(self, save_decisions=True):
         """Generate bundles of simulation steps to run
 
         Each call to this method returns a dict:
@@ -175,6 +175,14 @@ class DecisionManager(object):
 
         Decision links are only required if the bundle timesteps do not start from the first
         timestep of the model horizon.
+
+        Arguments
+        ---------
+        save_decisions : bool, default=True
+            If False, decisions are not made and saved for each bundle before it is returned,
+            and the caller must call :py:meth:`get_and_save_decisions` for each decision
+            iteration and timestep in the bundle (in order, as decision modules may keep
+            track of state between calls) before simulating it.
     """
         self.logger.debug("Calling decision loop")
         if self._decision_module:
@@ -183,14 +191,16 @@ class DecisionManager(object):
                 if bundle is None:
                     break
                 self.logger.debug("Bundle returned: %s", bundle)
-                self._get_and_save_bundle_decisions(bundle)
+                if save_decisions:
+                    self._get_and_save_bundle_decisions(bundle)
                 yield bundle
         else:
             bundle = {
                 'decision_iterations': [0],
                 'timesteps': [x for x in self._timesteps]
             }
-            self._get_and_save_bundle_decisions(bundle)
+            if save_decisions:
+                self._get_and_save_bundle_decisions(bundle)
             yield bundle
 
     def _get_and_save_bundle_decisions(self, bundle):
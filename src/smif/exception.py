@@ -9,6 +9,8 @@ Exception
               +-- SmifDataReadError
               +-- SmifDataInputError
         +-- SmifModelRunError
+              +-- SmifTimeoutError
+              +-- SmifTransientError
         +-- SmifValidationError
 """
 
@@ -76,6 +78,19 @@ class SmifModelRunError(SmifException):
     pass
 
 
+class SmifTimeoutError(SmifModelRunError):
+    """Raise when a model takes longer to run than its configured timeout
+    """
+    pass
+
+
+class SmifTransientError(SmifModelRunError):
+    """Raise when a model fails for a reason which may not recur, for example while waiting on
+    a licence server, so that the step is retried if the model has retries configured
+    """
+    pass
+
+
 class SmifValidationError(SmifException):
     """Custom exception to use for parsing validation.
     """
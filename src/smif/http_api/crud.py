@@ -104,7 +104,8 @@ class ModelRunAPI(MethodView):
                 args = {
                     'verbosity': data['args']['verbosity'],
                     'warm_start': data['args']['warm_start'],
-                    'output_format': data['args']['output_format']
+                    'output_format': data['args']['output_format'],
+                    'priority': data['args'].get('priority', 0)
                 }
                 if hasattr(data_interface, 'model_base_folder'):
                     args['directory'] = data_interface.model_base_folder
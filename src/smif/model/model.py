@@ -12,6 +12,8 @@ class ModelOperation(Enum):
     """
     BEFORE_MODEL_RUN = 'before_model_run'
     SIMULATE = 'simulate'
+    # make and save decisions for a timestep and decision iteration, before models simulate
+    DECIDE = 'decide'
 
 
 class Model():
@@ -32,6 +34,15 @@ class Model():
         self._parameters = {}
         self._outputs = {}
 
+        # seconds after which to stop each step, or None to wait indefinitely
+        self.timeout = None
+        # number of times to retry a step which failed with a transient error, waiting
+        # retry_delay seconds before the first retry and twice as long before each subsequent
+        # retry, and whether to retry steps which timed out
+        self.retries = 0
+        self.retry_delay = 1
+        self.retry_timeouts = False
+
     def __repr__(self):
         return "<{} name='{}'>".format(self.__class__.__name__, self.name)
 
@@ -47,6 +58,10 @@ class Model():
             model.add_output(Spec.from_dict(output))
         for param in config['parameters']:
             model.add_parameter(Spec.from_dict(param))
+        model.timeout = config.get('timeout')
+        model.retries = config.get('retries', 0)
+        model.retry_delay = config.get('retry_delay', 1)
+        model.retry_timeouts = config.get('retry_timeouts', False)
         return model
 
     def as_dict(self):
@@ -65,6 +80,13 @@ class Model():
             'outputs': [out.as_dict() for out in self.outputs.values()],
             'parameters': [param.as_dict() for param in self.parameters.values()]
         }
+        if self.timeout is not None:
+            config['timeout'] = self.timeout
+        if self.retries:
+            config['retries'] = self.retries
+            config['retry_delay'] = self.retry_delay
+        if self.retry_timeouts:
+            config['retry_timeouts'] = self.retry_timeouts
         return config
 
     @property
@@ -1,17 +1,26 @@
 """Test command line interface
 """
 
+import json
 import os
+import socket
 import sys
 from distutils.dir_util import copy_tree, remove_tree
 from itertools import product
+from multiprocessing import Process
 from tempfile import TemporaryDirectory
 from time import sleep
 from unittest.mock import call, patch
 
+import pandas
+import pyarrow.parquet
 import smif
 from pytest import fixture, raises
 from smif.cli import confirm, main, parse_arguments, setup_project_folder
+from smif.controller.build import get_model_run_definition
+from smif.controller.execute_run import _run_model_run, _warm_caches
+from smif.controller.job import SerialJobScheduler
+from smif.data_layer import Store
 from smif.exception import SmifDataNotFoundError
 
 
@@ -90,6 +99,78 @@ def test_fixture_single_run_warm(capsys, tmp_sample_project):
     assert output.err.count("Job energy_central_simulate_2010_1_energy_demand") == 1
 
 
+def test_fixture_single_run_warm_from_journal(capsys, tmp_sample_project):
+    """Test each job is recorded in the job journal, which warm start reads instead of
+    listing results
+    """
+    main(["run", "-d", tmp_sample_project, "energy_central"])
+    journal = os.path.join(
+        tmp_sample_project, 'results', 'energy_central', 'job_journal.jsonl')
+    with open(journal) as file_handle:
+        events = [json.loads(line) for line in file_handle]
+
+    started = [event['job'] for event in events if event['event'] == 'started']
+    finished = [event['job'] for event in events if event['event'] == 'finished']
+    assert started == finished
+    assert "energy_central_simulate_2010_1_energy_demand" in finished
+    simulated = [event for event in events
+                 if event['event'] == 'finished' and event['operation'] == 'simulate']
+    assert all(sorted(event['checksums']) == ['cost', 'water_demand']
+               for event in simulated)
+
+    with patch.object(Store, 'available_results', side_effect=AssertionError):
+        main(["run", "-w", "-d", tmp_sample_project, "energy_central"])
+    output = capsys.readouterr()
+    assert "Model run 'energy_central' complete" in output.out
+
+
+def test_fixture_single_run_parallel(capsys, tmp_sample_project):
+    """Test running the single_run fixture with jobs run in parallel
+    """
+    main(["run", "-v", "--workers", "2", "-d", tmp_sample_project, "energy_central"])
+    output = capsys.readouterr()
+    print(output.out)
+    print(output.err, file=sys.stderr)
+    assert "Job energy_central_simulate_2010_1_energy_demand" in output.err
+    assert "Model run 'energy_central' complete" in output.out
+
+    main(["list", "-c", "-d", tmp_sample_project])
+    output = capsys.readouterr()
+    assert "energy_central *" in output.out
+
+    assert os.path.exists(os.path.join(tmp_sample_project, 'results', 'job_runtimes.json'))
+
+
+def test_fixture_single_run_distributed(capsys, tmp_sample_project):
+    """Test running the single_run fixture with jobs run by workers on localhost
+    """
+    with socket.socket() as sock:
+        sock.bind(('localhost', 0))
+        port = str(sock.getsockname()[1])
+
+    workers = [
+        Process(target=main, args=(
+            ["worker", "-d", tmp_sample_project, "--port", port, "--authkey", "test"],))
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+
+    main(["serve-jobs", "-d", tmp_sample_project, "--port", port, "--authkey", "test",
+          "energy_central"])
+    output = capsys.readouterr()
+    assert "Waiting for workers on 127.0.0.1:" + port in output.out
+    assert "Model run 'energy_central' complete" in output.out
+
+    for worker in workers:
+        worker.join(timeout=10)
+        assert worker.exitcode == 0
+
+    main(["list", "-c", "-d", tmp_sample_project])
+    output = capsys.readouterr()
+    assert "energy_central *" in output.out
+
+
 def test_fixture_run_step_no_decision(capsys, tmp_sample_project):
     """Test running model at single timestep
 
@@ -172,6 +253,40 @@ def test_fixture_batch_run(capsys, tmp_sample_project):
     assert "Model run 'energy_central' complete" in output.out
 
 
+def test_fixture_batch_run_concurrent(capsys, tmp_sample_project):
+    """Test running multiple modelruns from a batchfile in concurrent processes
+    """
+    main(["run", "-b", "--jobs", "2", "-d", tmp_sample_project,
+          os.path.join(tmp_sample_project, "batchfile")])
+    output = capsys.readouterr()
+
+    assert "Model run summary:" in output.out
+    summary = output.out.split("Model run summary:")[1].splitlines()
+    assert sorted(line.split()[:2] for line in summary[1:]) == [
+        ["energy_central", "complete"],
+        ["energy_water_cp_cr", "complete"]
+    ]
+
+    main(["list", "-c", "-d", tmp_sample_project])
+    output = capsys.readouterr()
+    assert "energy_water_cp_cr *" in output.out
+    assert "energy_central *" in output.out
+
+
+def test_warm_caches(tmp_sample_project):
+    """Test that data read by a model run is cached before running model runs concurrently
+    """
+    store = Store.from_dict({'interface': 'local_csv', 'dir': tmp_sample_project})
+    _warm_caches(store, get_model_run_definition(store, 'energy_central'))
+    assert len(store.data_cache) > 0
+    misses = store.data_cache.misses
+
+    model_run_config = get_model_run_definition(store, 'energy_central')
+    _run_model_run(model_run_config, store, SerialJobScheduler(store=store), False, False)
+    assert store.data_cache.misses == misses
+    assert store.data_cache.hits > 0
+
+
 def test_fixture_list_runs(capsys, tmp_sample_project):
     """Test running the filesystem-based single_run fixture
     """
@@ -366,6 +481,19 @@ def test_prepare_convert(tmp_sample_project):
             assert (os.path.getmtime(path) > 2)
 
 
+def test_prepare_partition(capsys, tmp_sample_project):
+    csv_path = os.path.join(tmp_sample_project, 'data', 'scenarios', 'population_low.csv')
+    main(["csv2parquet", csv_path])
+    parquet_path = csv_path.replace('.csv', '.parquet')
+
+    main(["prepare-partition", "-d", tmp_sample_project])
+    output = capsys.readouterr()
+    assert "Partitioned {}".format(parquet_path) in output.out
+
+    timesteps = pandas.read_csv(csv_path).timestep.unique()
+    assert pyarrow.parquet.ParquetFile(parquet_path).num_row_groups == len(timesteps)
+
+
 @patch('builtins.input', return_value='y')
 def test_confirm_yes(input):
     assert confirm()
@@ -0,0 +1,60 @@
+"""Test executing single steps
+"""
+from copy import copy
+
+import smif
+from pytest import fixture
+from smif.controller import execute_step
+
+
+@fixture
+def store(empty_store):
+    model = {
+        'name': 'a',
+        'description': '',
+        'inputs': [],
+        'outputs': [],
+        'parameters': [],
+        'path': smif.model.__file__,
+        'classname': 'Model',
+    }
+    empty_store.write_model(model)
+    return empty_store
+
+
+@fixture
+def model_cache(monkeypatch):
+    """Enable the model cache for a single test
+    """
+    monkeypatch.setattr(execute_step, '_MODEL_CACHE', None)
+    execute_step.enable_model_cache()
+    return execute_step._MODEL_CACHE
+
+
+class TestLoadModel():
+    def test_load_without_cache(self, store):
+        first = execute_step._load_model(store, 'a')
+        second = execute_step._load_model(store, 'a')
+
+        assert first.name == 'a'
+        assert first is not second
+
+    def test_load_with_cache(self, store, model_cache):
+        first = execute_step._load_model(store, 'a')
+        second = execute_step._load_model(store, 'a')
+
+        assert first.name == 'a'
+        assert first is second
+        assert len(model_cache) == 1
+
+    def test_reload_on_config_change(self, store, model_cache):
+        first = execute_step._load_model(store, 'a')
+
+        model = copy(store.read_model('a'))
+        model['description'] = 'changed'
+        store.update_model('a', model)
+        second = execute_step._load_model(store, 'a')
+
+        assert first is not second
+        assert second.description == 'changed'
+        assert len(model_cache) == 2
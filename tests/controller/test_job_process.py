@@ -0,0 +1,110 @@
+"""Test running single jobs with timeouts and retries
+"""
+import os
+import threading
+import time
+from unittest.mock import Mock
+
+from pytest import raises
+from smif.controller.job.job_process import JobProcess, run_with_retries
+from smif.exception import (SmifDataNotFoundError, SmifModelRunError,
+                            SmifTimeoutError, SmifTransientError)
+
+
+def add(a, b):
+    return a + b
+
+
+def fail():
+    raise ValueError("Failed in job process")
+
+
+def fail_transient():
+    raise OSError("Failed to read from shared filesystem")
+
+
+def exit_process():
+    os._exit(1)
+
+
+class TestJobProcess():
+    def test_run(self):
+        assert JobProcess(add, 1, 2).run(timeout=10) == 3
+
+    def test_error(self):
+        with raises(SmifModelRunError) as ex:
+            JobProcess(fail).run()
+        assert 'Failed in job process' in str(ex.value)
+        assert not isinstance(ex.value, SmifTransientError)
+
+    def test_transient_error(self):
+        with raises(SmifTransientError) as ex:
+            JobProcess(fail_transient).run()
+        assert 'shared filesystem' in str(ex.value)
+
+    def test_exit(self):
+        with raises(SmifTransientError):
+            JobProcess(exit_process).run()
+
+    def test_timeout(self):
+        process = JobProcess(time.sleep, 30)
+        with raises(SmifTimeoutError):
+            process.run(timeout=0.1)
+
+    def test_kill(self):
+        process = JobProcess(time.sleep, 30)
+        threading.Timer(0.5, process.kill).start()
+        with raises(SmifModelRunError) as ex:
+            process.run()
+        assert 'stopped' in str(ex.value)
+
+
+class TestRunWithRetries():
+    def model(self, retries, retry_timeouts=False):
+        return Mock(retries=retries, retry_delay=0, retry_timeouts=retry_timeouts)
+
+    def test_no_retries(self):
+        run_once = Mock(side_effect=OSError)
+        with raises(OSError):
+            run_with_retries(run_once, self.model(0), threading.Event(), Mock(), 'job')
+        assert run_once.call_count == 1
+
+    def test_retry_succeeds(self):
+        run_once = Mock(side_effect=[OSError, SmifTransientError, 'result'])
+        actual = run_with_retries(run_once, self.model(2), threading.Event(), Mock(), 'job')
+        assert actual == 'result'
+        assert run_once.call_count == 3
+
+    def test_retries_exhausted(self):
+        run_once = Mock(side_effect=OSError)
+        with raises(OSError):
+            run_with_retries(run_once, self.model(2), threading.Event(), Mock(), 'job')
+        assert run_once.call_count == 3
+
+    def test_no_retry_when_stopped(self):
+        run_once = Mock(side_effect=OSError)
+        stopped = threading.Event()
+        stopped.set()
+        with raises(OSError):
+            run_with_retries(run_once, self.model(2), stopped, Mock(), 'job')
+        assert run_once.call_count == 1
+
+    def test_no_retry_non_transient(self):
+        for error in (ValueError, SmifDataNotFoundError, SmifModelRunError):
+            run_once = Mock(side_effect=error)
+            with raises(error):
+                run_with_retries(run_once, self.model(2), threading.Event(), Mock(), 'job')
+            assert run_once.call_count == 1
+
+    def test_no_retry_timeout(self):
+        run_once = Mock(side_effect=SmifTimeoutError)
+        with raises(SmifTimeoutError):
+            run_with_retries(run_once, self.model(2), threading.Event(), Mock(), 'job')
+        assert run_once.call_count == 1
+
+    def test_retry_timeout(self):
+        run_once = Mock(side_effect=[SmifTimeoutError, 'result'])
+        actual = run_with_retries(
+            run_once, self.model(2, retry_timeouts=True), threading.Event(), Mock(), 'job')
+        assert actual == 'result'
+        assert run_once.call_count == 2
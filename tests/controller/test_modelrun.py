@@ -5,7 +5,7 @@ from pytest import fixture, raises
 from smif.controller.modelrun import ModelRun, ModelRunner
 from smif.exception import SmifModelRunError
 from smif.metadata import RelativeTimestep, Spec
-from smif.model import ScenarioModel, SectorModel, SosModel
+from smif.model import ModelOperation, ScenarioModel, SectorModel, SosModel
 
 
 class EmptySectorModel(SectorModel):
@@ -148,6 +148,15 @@ class TestModelRun:
         """
         model_run.run(mock_store, mock_scheduler)
 
+    def test_run_adds_decide_jobs(self, model_run, mock_store, mock_scheduler):
+        """Decisions are made by jobs in the job graph, not up front
+        """
+        model_run.run(mock_store, mock_scheduler)
+
+        mock_store.write_state.assert_not_called()
+        job_graph = mock_scheduler.add.call_args[0][0]
+        assert 'unique_model_run_name_decide_2010_0' in job_graph.nodes
+
     def test_run_timesteps(self, config_data):
         """should error that timesteps are empty
         """
@@ -395,6 +404,108 @@ class TestModelRunnerJobGraphs():
         expected = []
         assert actual == expected
 
+    def test_jobgraph_with_decisions(self, mock_model_run):
+        """
+        d=0,t=1 ---> d=0,t=2 ---> d=1,t=1 ---> d=1,t=2 [decide]
+        |            |            |            |
+        v            v            v            v
+        a[sim]       a[sim]       a[sim]       a[sim]
+        """
+        model_a = EmptySectorModel('model_a')
+        mock_model_run.sos_model.add_model(model_a)
+        mock_model_run.model_horizon = [1, 2]
+        mock_model_run.initialised = True
+        decision_manager = Mock()
+
+        runner = ModelRunner()
+        bundle = {
+            'decision_iterations': [0, 1],
+            'timesteps': [1, 2]
+        }
+        job_graph = runner.build_job_graph(mock_model_run, bundle, decision_manager)
+
+        job = job_graph.nodes['test_decide_2_1']
+        assert job['operation'] == ModelOperation.DECIDE
+        assert job['decision_manager'] == decision_manager
+        assert job['current_timestep'] == 2
+        assert job['decision_iteration'] == 1
+
+        actual = list(job_graph.predecessors('test_decide_1_0'))
+        expected = []
+        assert actual == expected
+
+        actual = list(job_graph.successors('test_decide_1_0'))
+        expected = ['test_decide_2_0', 'test_simulate_1_0_model_a']
+        assert sorted(actual) == expected
+
+        actual = list(job_graph.predecessors('test_decide_1_1'))
+        expected = ['test_decide_2_0']
+        assert actual == expected
+
+        actual = list(job_graph.predecessors('test_simulate_2_1_model_a'))
+        expected = ['test_decide_2_1']
+        assert actual == expected
+
+    def test_timestep_parallel_models(self, mock_model_run):
+        """
+        a[sim]   a[sim]
+        t=1      t=2
+        |        |
+        v        v
+        b[sim]   b[sim]
+        t=1 ---> t=2
+        |
+        c[sim]   c[sim]
+        t=1      t=2
+        """
+        model_a = EmptySectorModel('model_a')
+        model_a.add_output(Spec('a', dtype='float'))
+
+        model_b = EmptySectorModel('model_b')
+        model_b.add_input(Spec('a', dtype='float'))
+        model_b.add_input(Spec('b_previous', dtype='float'))
+        model_b.add_output(Spec('b', dtype='float'))
+
+        model_c = EmptySectorModel('model_c')
+        model_c.add_input(Spec('b', dtype='float'))
+
+        mock_model_run.sos_model.add_model(model_a)
+        mock_model_run.sos_model.add_model(model_b)
+        mock_model_run.sos_model.add_model(model_c)
+
+        mock_model_run.sos_model.add_dependency(model_a, 'a', model_b, 'a')
+        mock_model_run.sos_model.add_dependency(
+            model_b, 'b', model_b, 'b_previous', RelativeTimestep.PREVIOUS)
+        mock_model_run.sos_model.add_dependency(model_b, 'b', model_c, 'b')
+
+        mock_model_run.model_horizon = [1, 2]
+
+        runner = ModelRunner()
+        bundle = {
+            'decision_iterations': [0, 1],
+            'timesteps': [1, 2]
+        }
+        job_graph = runner.build_job_graph(mock_model_run, bundle, Mock())
+
+        actual = runner.find_timestep_parallel_models(job_graph)
+        expected = ['model_a']
+        assert actual == expected
+
+    def test_timestep_parallel_models_single_timestep(self, mock_model_run):
+        model_a = EmptySectorModel('model_a')
+        mock_model_run.sos_model.add_model(model_a)
+
+        runner = ModelRunner()
+        bundle = {
+            'decision_iterations': [0],
+            'timesteps': [1]
+        }
+        job_graph = runner.build_job_graph(mock_model_run, bundle)
+
+        actual = runner.find_timestep_parallel_models(job_graph)
+        expected = ['model_a']
+        assert actual == expected
+
     def test_filter_jobgraph(self, mock_model_run):
         """
         Filter completed jobs (here: a[sim], t=1]) out of job graph
@@ -1,13 +1,29 @@
-"""Test SubProcessRunScheduler and SerialJobScheduler
+"""Test SubProcessRunScheduler, SerialJobScheduler, ParallelJobScheduler and
+DistributedJobScheduler
 """
+import json
+import os
+import sys
+import threading
+import time
 from copy import copy
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import AuthenticationError, Process
+from multiprocessing.connection import Client
 from unittest.mock import Mock, patch
 
 import networkx
 import smif
-from pytest import fixture, raises
-from smif.controller.job import SerialJobScheduler
+from pytest import fixture, mark, raises
+from smif.controller.job import (DistributedJobScheduler, JobRuntimeHistory,
+                                 ParallelJobScheduler, SerialJobScheduler,
+                                 run_worker)
+from smif.controller.job.job_process import JobProcess, job_args
+from smif.controller.job.parallel_job_scheduler import (_execute_job,
+                                                        _execute_job_in_worker)
 from smif.controller.run import SubProcessRunScheduler
+from smif.exception import SmifTimeoutError
 from smif.model import ModelOperation, SectorModel
 
 
@@ -16,9 +32,55 @@ class EmptySectorModel(SectorModel):
         return data
 
 
+def slow_job(*args):
+    time.sleep(30)
+
+
+def slow_job_process(fn, *args):
+    return JobProcess(slow_job)
+
+
+def slow_job_in_worker(store, cache_models, operation, modelrun_name, model_name, *args):
+    if model_name == 'slow':
+        time.sleep(30)
+    return _execute_job_in_worker(
+        store, cache_models, operation, modelrun_name, model_name, *args)
+
+
+class PreCancelFuturesExecutor(ProcessPoolExecutor):
+    """ProcessPoolExecutor without cancel_futures, as before Python 3.9
+    """
+    def shutdown(self, wait=True):
+        super().shutdown(wait)
+
+
+def mock_process(poll=None, output=b"this is a stdout\n"):
+    return Mock(**{
+        'poll.return_value': poll,
+        'stdout': BytesIO(output),
+        'pid': 1
+    })
+
+
+def run_args(priority=0):
+    return {
+        'directory': 'mock/dir',
+        'verbosity': 0,
+        'warm_start': False,
+        'output_format': 'local_csv',
+        'priority': priority
+    }
+
+
+def join_readers(scheduler):
+    for reader in scheduler._readers.values():
+        reader.join(timeout=5)
+
+
 class TestSubProcessRunScheduler():
     @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
     def test_single_modelrun(self, mock_popen):
+        mock_popen.return_value = mock_process()
         my_scheduler = SubProcessRunScheduler()
         my_scheduler.add('my_model_run', {
             'directory': 'mock/dir',
@@ -40,168 +102,364 @@ class TestSubProcessRunScheduler():
 
     @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
     def test_status_model_started(self, mock_popen):
-        attrs = {
-            'poll.return_value': None,
-            'communicate.return_value': (
-                "this is a stdout".encode('utf-8'),
-            ),
-            'returncode': None
-        }
-        process_mock = Mock(**attrs)
-        mock_popen.return_value = process_mock
+        mock_popen.return_value = mock_process(poll=None)
 
         my_scheduler = SubProcessRunScheduler()
-        my_scheduler.add('my_model_run', {
-            'directory': 'mock/dir',
-            'verbosity': 0,
-            'warm_start': False,
-            'output_format': 'local_csv'
-        })
-        my_scheduler.lock = True
+        my_scheduler.add('my_model_run', run_args())
+        join_readers(my_scheduler)
         status = my_scheduler.get_status('my_model_run')
         assert status['status'] == 'running'
+        assert status['output'].endswith('this is a stdout\n')
 
     @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
     def test_status_model_done(self, mock_popen):
-        attrs = {
-            'poll.return_value': 0,
-            'communicate.return_value': (
-                "this is a stdout".encode('utf-8')
-            )
-        }
-        process_mock = Mock(**attrs)
-        mock_popen.return_value = process_mock
+        mock_popen.return_value = mock_process(poll=0)
 
         my_scheduler = SubProcessRunScheduler()
-        my_scheduler.add('my_model_run', {
-            'directory': 'mock/dir',
-            'verbosity': 0,
-            'warm_start': False,
-            'output_format': 'local_csv'
-        })
-        my_scheduler.lock = True
+        my_scheduler.add('my_model_run', run_args())
+        join_readers(my_scheduler)
         response = my_scheduler.get_status('my_model_run')
 
         assert response['status'] == 'done'
 
     @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
     def test_status_model_failed(self, mock_popen):
-        attrs = {
-            'poll.return_value': 1,
-            'communicate.return_value': (
-                "this is a stdout".encode('utf-8'),
-            )
-        }
-        process_mock = Mock(**attrs)
-        mock_popen.return_value = process_mock
+        mock_popen.return_value = mock_process(poll=1)
 
         my_scheduler = SubProcessRunScheduler()
-        my_scheduler.add('my_model_run', {
-            'directory': 'mock/dir',
-            'verbosity': 0,
-            'warm_start': False,
-            'output_format':
-            'local_csv'
-        })
-        my_scheduler.lock = True
+        my_scheduler.add('my_model_run', run_args())
+        join_readers(my_scheduler)
         response = my_scheduler.get_status('my_model_run')
 
         assert response['status'] == 'failed'
 
     @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
     def test_status_model_stopped(self, mock_popen):
-        attrs = {
-            'poll.return_value': None,
-            'communicate.return_value': (
-                "this is a stdout".encode('utf-8'),
-            )
-        }
-        process_mock = Mock(**attrs)
-        mock_popen.return_value = process_mock
+        mock_popen.return_value = mock_process(poll=None)
 
         my_scheduler = SubProcessRunScheduler()
-        my_scheduler.add('my_model_run', {
-            'directory': 'mock/dir',
-            'verbosity': 0,
-            'warm_start': False,
-            'output_format':
-            'local_csv'
-        })
-        my_scheduler.lock = True
+        my_scheduler.add('my_model_run', run_args())
         my_scheduler.kill('my_model_run')
         response = my_scheduler.get_status('my_model_run')
 
         assert response['status'] == 'stopped'
 
+    @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
+    def test_add_running(self, mock_popen):
+        mock_popen.return_value = mock_process(poll=None)
+
+        my_scheduler = SubProcessRunScheduler()
+        my_scheduler.add('my_model_run', run_args())
+        with raises(Exception) as ex:
+            my_scheduler.add('my_model_run', run_args())
+        assert 'already running' in str(ex.value)
+
+    def test_invalid_max_concurrent(self):
+        with raises(ValueError):
+            SubProcessRunScheduler(max_concurrent=0)
+
+    @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
+    def test_queue(self, mock_popen):
+        first = mock_process(poll=None)
+        mock_popen.side_effect = [first, mock_process(poll=None), mock_process(poll=None)]
+
+        my_scheduler = SubProcessRunScheduler(max_concurrent=1)
+        my_scheduler.add('first', run_args())
+        my_scheduler.add('low', run_args(priority=0))
+        my_scheduler.add('high', run_args(priority=1))
+
+        assert mock_popen.call_count == 1
+        assert my_scheduler.get_status('first')['status'] == 'running'
+        assert my_scheduler.get_status('low')['status'] == 'queing'
+        assert my_scheduler.get_status('high')['status'] == 'queing'
+
+        # first run finishes, highest priority queued run starts
+        first.poll.return_value = 0
+        assert my_scheduler.get_status('first')['status'] == 'done'
+        assert my_scheduler.get_status('high')['status'] == 'running'
+        assert my_scheduler.get_status('low')['status'] == 'queing'
+
+        # killing the running model run starts the next
+        my_scheduler.kill('high')
+        assert my_scheduler.get_status('low')['status'] == 'running'
+        assert mock_popen.call_count == 3
+
+    @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
+    def test_kill_queued(self, mock_popen):
+        mock_popen.return_value = mock_process(poll=None)
+
+        my_scheduler = SubProcessRunScheduler(max_concurrent=1)
+        my_scheduler.add('first', run_args())
+        my_scheduler.add('second', run_args())
+        my_scheduler.kill('second')
+
+        assert my_scheduler.get_status('second')['status'] == 'stopped'
+        my_scheduler.kill('first')
+        assert mock_popen.call_count == 1
+
+    @patch('smif.controller.run.subprocess_run_scheduler.subprocess.Popen')
+    def test_output_limit(self, mock_popen):
+        output = b''.join('line {}\n'.format(i).encode() for i in range(10))
+        mock_popen.return_value = mock_process(poll=0, output=output)
+
+        my_scheduler = SubProcessRunScheduler(max_output_lines=3)
+        my_scheduler.add('my_model_run', run_args())
+        join_readers(my_scheduler)
+        response = my_scheduler.get_status('my_model_run')
+
+        assert response['status'] == 'done'
+        assert response['output'].endswith(
+            '[7 earlier lines not shown]\nline 7\nline 8\nline 9\n')
+
+
+@fixture
+def job_graph():
+    G = networkx.DiGraph()
+    a_model = EmptySectorModel('a')
+
+    G.add_node(
+        'a',
+        model=a_model,
+        operation=ModelOperation.BEFORE_MODEL_RUN,
+        modelrun_name='test',
+        current_timestep=1,
+        timesteps=[1],
+        decision_iteration=0
+    )
+    b_model = EmptySectorModel('b')
+    G.add_node(
+        'b',
+        model=b_model,
+        operation=ModelOperation.SIMULATE,
+        modelrun_name='test',
+        current_timestep=1,
+        timesteps=[1],
+        decision_iteration=0
+    )
+    G.add_edge('a', 'b')
+    return G
+
+
+@fixture
+def scheduler_store(empty_store):
+    empty_store.write_model_run({
+        'name': 'test',
+        'narratives': {},
+        'scenarios': {},
+        'sos_model': 'test_sos_model',
+        'timesteps': []
+    })
+    empty_store.write_sos_model({
+        'name': 'test_sos_model',
+        'scenario_dependencies': [],
+        'model_dependencies': []
+    })
+    model = {
+        'description': '',
+        'inputs': [],
+        'outputs': [],
+        'parameters': [],
+        'path': smif.model.__file__,
+        'classname': 'Model',
+    }
+    for name in ['a', 'b', 'c']:
+        m = copy(model)
+        m['name'] = name
+        empty_store.write_model(m)
+    return empty_store
+
 
 class TestSerialJobScheduler():
     @fixture
-    def job_graph(self):
-        G = networkx.DiGraph()
-        a_model = EmptySectorModel('a')
+    def scheduler(self, scheduler_store):
+        return SerialJobScheduler(scheduler_store)
 
-        G.add_node(
-            'a',
-            model=a_model,
-            operation=ModelOperation.BEFORE_MODEL_RUN,
+    def test_add(self, job_graph, scheduler):
+        job_id, err = scheduler.add(job_graph)
+
+        print(err)
+        assert err is None
+        assert scheduler.get_status(job_id)['status'] == 'done'
+
+    def test_default_status(self):
+        scheduler = SerialJobScheduler()
+        assert scheduler.get_status(0)['status'] == 'unstarted'
+
+    def test_add_cyclic(self, job_graph, scheduler):
+        job_graph.add_edge('b', 'a')
+        job_id, err = scheduler.add(job_graph)
+
+        assert isinstance(err, NotImplementedError)
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_kill_finished(self, job_graph, scheduler):
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        scheduler.kill(job_id)
+        assert scheduler.get_status(job_id)['status'] == 'done'
+
+    def test_kill(self, job_graph, scheduler):
+        job_graph.nodes['b']['model'].timeout = 30
+        threading.Timer(0.5, scheduler.kill, args=(0,)).start()
+        with patch('smif.controller.job.serial_job_scheduler.JobProcess', slow_job_process):
+            job_id, err = scheduler.add(job_graph)
+
+        assert err is not None
+        assert scheduler.get_status(job_id)['status'] == 'stopped'
+
+    def test_timeout(self, job_graph, scheduler):
+        job_graph.nodes['b']['model'].timeout = 0.5
+        with patch('smif.controller.job.serial_job_scheduler.JobProcess', slow_job_process):
+            job_id, err = scheduler.add(job_graph)
+
+        assert isinstance(err, SmifTimeoutError)
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_retry(self, job_graph, scheduler):
+        job_graph.nodes['b']['model'].retries = 1
+        job_graph.nodes['b']['model'].retry_delay = 0
+        execute_job = Mock(side_effect=[None, OSError("Failed"), {}])
+        with patch('smif.controller.job.serial_job_scheduler.execute_job', execute_job):
+            job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        assert execute_job.call_count == 3
+        assert scheduler.get_status(job_id)['status'] == 'done'
+
+    def test_no_retry_non_transient(self, job_graph, scheduler):
+        job_graph.nodes['b']['model'].retries = 1
+        job_graph.nodes['b']['model'].retry_delay = 0
+        execute_job = Mock(side_effect=[None, smif.exception.SmifDataNotFoundError("Missing")])
+        with patch('smif.controller.job.serial_job_scheduler.execute_job', execute_job):
+            job_id, err = scheduler.add(job_graph)
+
+        assert isinstance(err, smif.exception.SmifDataNotFoundError)
+        assert execute_job.call_count == 2
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_decide(self, job_graph, scheduler):
+        decision_manager = Mock()
+        job_graph.add_node(
+            'decide',
+            model=None,
+            decision_manager=decision_manager,
+            operation=ModelOperation.DECIDE,
             modelrun_name='test',
             current_timestep=1,
             timesteps=[1],
             decision_iteration=0
         )
-        b_model = EmptySectorModel('b')
-        G.add_node(
-            'b',
-            model=b_model,
-            operation=ModelOperation.SIMULATE,
+        job_graph.add_edge('decide', 'b')
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        decision_manager.get_and_save_decisions.assert_called_once_with(0, 1)
+
+    def test_unknown_operation(self, job_graph, scheduler):
+        model = EmptySectorModel('c')
+
+        job_graph.add_node(
+            'c',
+            model=model,
+            operation='unknown_operation',
             modelrun_name='test',
             current_timestep=1,
             timesteps=[1],
             decision_iteration=0
         )
-        G.add_edge('a', 'b')
-        return G
+        job_id, err = scheduler.add(job_graph)
+
+        assert isinstance(err, ValueError)
+        assert scheduler.get_status(job_id)['status'] == 'failed'
 
+
+class TestParallelJobScheduler():
     @fixture
-    def scheduler(self, empty_store):
-        empty_store.write_model_run({
-            'name': 'test',
-            'narratives': {},
-            'scenarios': {},
-            'sos_model': 'test_sos_model',
-            'timesteps': []
-        })
-        empty_store.write_sos_model({
-            'name': 'test_sos_model',
-            'scenario_dependencies': [],
-            'model_dependencies': []
-        })
-        model = {
-            'description': '',
-            'inputs': [],
-            'outputs': [],
-            'parameters': [],
-            'path': smif.model.__file__,
-            'classname': 'Model',
-        }
-        for name in ['a', 'b', 'c']:
-            m = copy(model)
-            m['name'] = name
-            empty_store.write_model(m)
-
-        scheduler = SerialJobScheduler(empty_store)
-        return scheduler
+    def scheduler(self, scheduler_store):
+        return ParallelJobScheduler(scheduler_store, max_workers=2)
 
     def test_add(self, job_graph, scheduler):
         job_id, err = scheduler.add(job_graph)
 
-        print(err)
         assert err is None
         assert scheduler.get_status(job_id)['status'] == 'done'
 
-    def test_default_status(self):
-        scheduler = SerialJobScheduler()
-        assert scheduler.get_status(0)['status'] == 'unstarted'
+    def test_add_independent(self, job_graph, scheduler):
+        model = EmptySectorModel('c')
+        job_graph.add_node(
+            'c',
+            model=model,
+            operation=ModelOperation.SIMULATE,
+            modelrun_name='test',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        assert scheduler.get_status(job_id)['status'] == 'done'
+
+    def test_add_with_cached_models(self, job_graph, scheduler_store):
+        scheduler = ParallelJobScheduler(scheduler_store, max_workers=2, cache_models=True)
+        for _ in range(2):
+            job_id, err = scheduler.add(job_graph)
+            assert err is None
+            assert scheduler.get_status(job_id)['status'] == 'done'
+
+        # workers are kept between job graphs until shut down
+        assert scheduler._executor is not None
+        scheduler.shutdown()
+        assert scheduler._executor is None
+
+    def test_add_with_runtime_history(self, job_graph, scheduler_store, tmpdir):
+        path = os.path.join(str(tmpdir), 'results', 'job_runtimes.json')
+        scheduler = ParallelJobScheduler(scheduler_store, max_workers=2, runtime_history=path)
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        with open(path) as file_handle:
+            runtimes = json.load(file_handle)
+        assert sorted(runtimes) == ['a', 'b']
+        assert runtimes['b']['model'] == 'b'
+        assert runtimes['b']['operation'] == 'simulate'
+        assert runtimes['b']['seconds'] >= 0
+
+    def test_critical_path_priority(self, tmpdir):
+        """
+        a (1s) -> b (10s)
+        c (5s)
+        d (2s)
+        """
+        graph = networkx.DiGraph()
+        for name in 'abcd':
+            graph.add_node(name, model=EmptySectorModel(name),
+                           operation=ModelOperation.SIMULATE)
+        graph.add_edge('a', 'b')
+
+        history = JobRuntimeHistory(os.path.join(str(tmpdir), 'runtimes.json'))
+        for name, seconds in zip('abcd', (1, 10, 5, 2)):
+            history.record(name, graph.nodes[name], seconds)
+
+        scheduler = ParallelJobScheduler(max_workers=1)
+        priority = scheduler._critical_path_priority(graph, history)
+        assert priority == {'a': 11, 'b': 10, 'c': 5, 'd': 2}
+
+        scheduler._priority = priority
+        assert scheduler._next_ready(['d', 'c', 'a'], graph) == 'a'
+
+    def test_next_ready_without_history(self, job_graph):
+        scheduler = ParallelJobScheduler(max_workers=1)
+        assert scheduler._next_ready(['b', 'a'], job_graph) == 'b'
+
+    def test_default_workers(self):
+        scheduler = ParallelJobScheduler()
+        assert scheduler.max_workers >= 1
+
+    def test_invalid_workers(self):
+        with raises(ValueError):
+            ParallelJobScheduler(max_workers=0)
 
     def test_add_cyclic(self, job_graph, scheduler):
         job_graph.add_edge('b', 'a')
@@ -210,12 +468,23 @@ class TestSerialJobScheduler():
         assert isinstance(err, NotImplementedError)
         assert scheduler.get_status(job_id)['status'] == 'failed'
 
-    def test_kill_fails(self, job_graph, scheduler):
+    def test_decide(self, job_graph, scheduler):
+        decision_manager = Mock()
+        job_graph.add_node(
+            'decide',
+            model=None,
+            decision_manager=decision_manager,
+            operation=ModelOperation.DECIDE,
+            modelrun_name='test',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        job_graph.add_edge('decide', 'b')
         job_id, err = scheduler.add(job_graph)
 
         assert err is None
-        with raises(NotImplementedError):
-            scheduler.kill(job_id)
+        decision_manager.get_and_save_decisions.assert_called_once_with(0, 1)
 
     def test_unknown_operation(self, job_graph, scheduler):
         model = EmptySectorModel('c')
@@ -233,3 +502,346 @@ class TestSerialJobScheduler():
 
         assert isinstance(err, ValueError)
         assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_job_failure(self, job_graph, scheduler):
+        model = EmptySectorModel('missing')
+        job_graph.add_node(
+            'missing',
+            model=model,
+            operation=ModelOperation.SIMULATE,
+            modelrun_name='test',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        job_graph.add_edge('b', 'missing')
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is not None
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_dry_run(self, job_graph, scheduler, capsys):
+        job_id, err = scheduler.add(job_graph, dry_run=True)
+
+        assert err is None
+        out, _ = capsys.readouterr()
+        assert out.index("smif before_step test --model a") < \
+            out.index("smif step test --model b --timestep 1 --decision 0")
+
+    def test_timeout(self, job_graph, scheduler):
+        job_graph.nodes['b']['model'].timeout = 0.5
+        with patch('smif.controller.job.parallel_job_scheduler.JobProcess', slow_job_process):
+            job_id, err = scheduler.add(job_graph)
+
+        assert isinstance(err, SmifTimeoutError)
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_retry(self, job_graph, scheduler):
+        job_graph.nodes['b']['model'].retries = 2
+        job_graph.nodes['b']['model'].retry_delay = 0
+        job_id, err = scheduler.add(job_graph)
+
+        assert err is None
+        assert scheduler.get_status(job_id)['status'] == 'done'
+
+    def test_failure_stops_running_jobs(self, job_graph, scheduler):
+        """A failed job stops independent jobs which are still running
+        """
+        job_graph.add_node(
+            'c',
+            model=EmptySectorModel('c'),
+            operation=ModelOperation.SIMULATE,
+            modelrun_name='test',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        job_graph.nodes['c']['model'].timeout = 30
+        job_graph.add_node(
+            'missing',
+            model=EmptySectorModel('missing'),
+            operation=ModelOperation.SIMULATE,
+            modelrun_name='test',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        start = time.time()
+        with patch('smif.controller.job.parallel_job_scheduler.JobProcess', slow_job_process):
+            job_id, err = scheduler.add(job_graph)
+
+        assert err is not None
+        assert time.time() - start < 30
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    @mark.skipif(sys.version_info < (3, 7),
+                 reason="pool workers are only stopped from Python 3.7")
+    def test_failure_stops_running_pool_jobs(self, job_graph, scheduler):
+        """A failed job stops jobs still running in the worker pool
+        """
+        for node_id in ('slow', 'missing'):
+            job_graph.add_node(
+                node_id,
+                model=EmptySectorModel(node_id),
+                operation=ModelOperation.SIMULATE,
+                modelrun_name='test',
+                current_timestep=1,
+                timesteps=[1],
+                decision_iteration=0
+            )
+        start = time.time()
+        with patch('smif.controller.job.parallel_job_scheduler._execute_job_in_worker',
+                   slow_job_in_worker), \
+                patch('smif.controller.job.parallel_job_scheduler.ProcessPoolExecutor',
+                      PreCancelFuturesExecutor):
+            job_id, err = scheduler.add(job_graph)
+
+        assert err is not None
+        assert 'missing' in str(err)
+        assert time.time() - start < 30
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+
+class TestDistributedJobScheduler():
+    @fixture
+    def scheduler(self, scheduler_store):
+        scheduler = DistributedJobScheduler(
+            scheduler_store, address=('localhost', 0), authkey=b'test', heartbeat_timeout=1)
+        yield scheduler
+        scheduler.shutdown()
+
+    def start_workers(self, scheduler, scheduler_store, count):
+        workers = [
+            Process(target=run_worker, args=(scheduler_store, scheduler.address, b'test'),
+                    kwargs={'heartbeat_interval': 0.1})
+            for _ in range(count)
+        ]
+        for worker in workers:
+            worker.start()
+        return workers
+
+    def test_add(self, job_graph, scheduler, scheduler_store):
+        model = EmptySectorModel('c')
+        job_graph.add_node(
+            'c',
+            model=model,
+            operation=ModelOperation.SIMULATE,
+            modelrun_name='test',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        workers = self.start_workers(scheduler, scheduler_store, 2)
+
+        for _ in range(2):
+            job_id, err = scheduler.add(job_graph)
+            assert err is None
+            assert scheduler.get_status(job_id)['status'] == 'done'
+
+        # workers stop once the coordinator shuts down
+        scheduler.shutdown()
+        for worker in workers:
+            worker.join(timeout=10)
+            assert worker.exitcode == 0
+
+    def test_job_failure(self, scheduler, scheduler_store):
+        graph = networkx.DiGraph()
+        graph.add_node(
+            'a',
+            model=EmptySectorModel('not_in_store'),
+            operation=ModelOperation.SIMULATE,
+            modelrun_name='test',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        self.start_workers(scheduler, scheduler_store, 1)
+        job_id, err = scheduler.add(graph)
+
+        assert isinstance(err, smif.exception.SmifModelRunError)
+        assert not isinstance(err, smif.exception.SmifTransientError)
+        assert 'not_in_store' in str(err)
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+    def test_missing_model_run(self, scheduler, scheduler_store):
+        graph = networkx.DiGraph()
+        graph.add_node(
+            'a',
+            model=EmptySectorModel('a'),
+            operation=ModelOperation.SIMULATE,
+            modelrun_name='not_a_model_run',
+            current_timestep=1,
+            timesteps=[1],
+            decision_iteration=0
+        )
+        workers = self.start_workers(scheduler, scheduler_store, 1)
+        job_id, err = scheduler.add(graph)
+
+        assert isinstance(err, smif.exception.SmifModelRunError)
+        assert 'SystemExit' in str(err)
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+        # the worker reports the failure rather than exiting
+        scheduler.shutdown()
+        workers[0].join(timeout=10)
+        assert workers[0].exitcode == 0
+
+    def test_lost_worker(self, job_graph, scheduler):
+        coordinator = scheduler._get_executor()
+        future = coordinator.submit(_execute_job, *job_args(job_graph.nodes['a']))
+
+        # take a job, then never report back
+        lost = Client(scheduler.address, authkey=b'test')
+        lost.send(('get', 'lost'))
+        kind, job_key, _ = lost.recv()
+        assert kind == 'job'
+
+        # job is published again after the heartbeat timeout
+        other = Client(scheduler.address, authkey=b'test')
+        other.send(('get', 'other'))
+        reply = other.recv()
+        while reply[0] == 'wait':
+            other.send(('get', 'other'))
+            reply = other.recv()
+        assert reply[:2] == ('job', job_key)
+
+        other.send(('done', 'other', job_key, None, False, {'output': 'checksum'}))
+        assert other.recv() == ('ok',)
+        assert future.result(timeout=1) == {'output': 'checksum'}
+
+        # late report from the lost worker is ignored
+        lost.send(('done', 'lost', job_key, 'error', False, None))
+        assert lost.recv() == ('ok',)
+        assert future.result() == {'output': 'checksum'}
+        lost.close()
+        other.close()
+
+    def test_transient_failure(self, job_graph, scheduler):
+        coordinator = scheduler._get_executor()
+        future = coordinator.submit(_execute_job, *job_args(job_graph.nodes['a']))
+
+        worker = Client(scheduler.address, authkey=b'test')
+        worker.send(('get', 'worker'))
+        kind, job_key, _ = worker.recv()
+        assert kind == 'job'
+
+        worker.send(('done', 'worker', job_key, 'OSError', True, None))
+        assert worker.recv() == ('ok',)
+        with raises(smif.exception.SmifTransientError):
+            future.result(timeout=1)
+        worker.close()
+
+    def test_timeout(self, job_graph, scheduler):
+        job_graph.nodes['a']['model'].timeout = 0.5
+        job_id, err = scheduler.add(job_graph)
+
+        assert isinstance(err, SmifTimeoutError)
+        assert scheduler.get_status(job_id)['status'] == 'failed'
+
+        # abandoned job is not published to workers which connect later
+        worker = Client(scheduler.address, authkey=b'test')
+        worker.send(('get', 'late'))
+        assert worker.recv() == ('wait',)
+        worker.close()
+
+    def test_wrong_authkey(self, scheduler):
+        with raises(AuthenticationError):
+            Client(scheduler.address, authkey=b'wrong')
+
+    @mark.parametrize('host', ['0.0.0.0', '', 'example.com'])
+    def test_no_authkey_non_loopback(self, scheduler_store, host):
+        with raises(ValueError) as ex:
+            DistributedJobScheduler(scheduler_store, address=(host, 0))
+        assert 'authkey is required' in str(ex.value)
+
+    def test_no_authkey_loopback(self, scheduler_store):
+        schedulers = [
+            DistributedJobScheduler(scheduler_store, address=(host, 0))
+            for host in ('127.0.0.1', 'localhost')
+        ]
+        try:
+            assert len(schedulers[0].authkey) == 32
+            assert schedulers[0].authkey != schedulers[1].authkey
+            Client(schedulers[0].address, authkey=schedulers[0].authkey).close()
+        finally:
+            for scheduler in schedulers:
+                scheduler.shutdown()
+
+    def test_worker_no_authkey(self, scheduler, scheduler_store):
+        with raises(ValueError):
+            run_worker(scheduler_store, scheduler.address)
+
+    def test_shut_down(self, job_graph, scheduler):
+        scheduler.shutdown()
+        job_id, err = scheduler.add(job_graph)
+        assert isinstance(err, smif.exception.SmifModelRunError)
+
+
+class TestJobRuntimeHistory():
+    @fixture
+    def job(self):
+        return {'model': EmptySectorModel('a'), 'operation': ModelOperation.SIMULATE}
+
+    def test_estimate_empty(self, job, tmpdir):
+        history = JobRuntimeHistory(os.path.join(str(tmpdir), 'runtimes.json'))
+        assert history.estimate('run_simulate_1_0_a', job) == 1.0
+
+    def test_estimate_same_job(self, job, tmpdir):
+        history = JobRuntimeHistory(os.path.join(str(tmpdir), 'runtimes.json'))
+        history.record('run_simulate_1_0_a', job, 3.0)
+        history.record('run_simulate_2_0_a', job, 5.0)
+        assert history.estimate('run_simulate_1_0_a', job) == 3.0
+
+    def test_estimate_same_model(self, job, tmpdir):
+        history = JobRuntimeHistory(os.path.join(str(tmpdir), 'runtimes.json'))
+        history.record('run_simulate_1_0_a', job, 3.0)
+        history.record('run_simulate_2_0_a', job, 5.0)
+        history.record('run_simulate_1_0_b', {
+            'model': EmptySectorModel('b'), 'operation': ModelOperation.SIMULATE}, 100.0)
+        assert history.estimate('other_run_simulate_1_0_a', job) == 4.0
+
+    def test_estimate_any_model(self, job, tmpdir):
+        history = JobRuntimeHistory(os.path.join(str(tmpdir), 'runtimes.json'))
+        history.record('run_simulate_1_0_b', {
+            'model': EmptySectorModel('b'), 'operation': ModelOperation.SIMULATE}, 100.0)
+        assert history.estimate('run_simulate_1_0_a', job) == 100.0
+
+    def test_save_and_load(self, job, tmpdir):
+        path = os.path.join(str(tmpdir), 'results', 'runtimes.json')
+        history = JobRuntimeHistory(path)
+        history.record('run_simulate_1_0_a', job, 3.0)
+        history.save()
+
+        history = JobRuntimeHistory(path)
+        assert history.estimate('run_simulate_1_0_a', job) == 3.0
+
+    def test_save_keeps_other_runtimes(self, job, tmpdir):
+        path = os.path.join(str(tmpdir), 'runtimes.json')
+        first = JobRuntimeHistory(path)
+        second = JobRuntimeHistory(path)
+        first.record('run_simulate_1_0_a', job, 3.0)
+        second.record('run_simulate_2_0_a', job, 5.0)
+        first.save()
+        second.save()
+
+        history = JobRuntimeHistory(path)
+        assert history.estimate('run_simulate_1_0_a', job) == 3.0
+        assert history.estimate('run_simulate_2_0_a', job) == 5.0
+        assert os.listdir(str(tmpdir)) == ['runtimes.json']
+
+    def test_save_failure_is_logged(self, job, tmpdir):
+        # a directory in place of the file cannot be replaced
+        path = os.path.join(str(tmpdir), 'runtimes.json')
+        os.makedirs(os.path.join(path, 'not_a_file'))
+        history = JobRuntimeHistory(path)
+        history.record('run_simulate_1_0_a', job, 3.0)
+        history.save()
+        assert os.listdir(str(tmpdir)) == ['runtimes.json']
+
+    def test_load_invalid(self, job, tmpdir):
+        path = os.path.join(str(tmpdir), 'runtimes.json')
+        with open(path, 'w') as file_handle:
+            file_handle.write('not json')
+
+        history = JobRuntimeHistory(path)
+        assert history.estimate('run_simulate_1_0_a', job) == 1.0
@@ -1,9 +1,12 @@
 """Tests functionality of NDimensionalRegister class that computes coefficients for
 different operations
 """
+from unittest.mock import Mock
+
 import numpy as np
-from pytest import mark
+from pytest import importorskip, mark
 from smif.convert.adaptor import Adaptor
+from smif.metadata import Spec
 
 
 class TestPerformConversion:
@@ -113,3 +116,47 @@ class TestPerformConversion:
         )
         actual = Adaptor.convert_with_coefficients(actual, coefficients, 2)
         np.testing.assert_allclose(actual, expected)
+
+    def test_sparse_operation(self):
+        """Sparse coefficients convert as dense coefficients do
+        """
+        sparse = importorskip('scipy.sparse')
+        data = np.arange(24, dtype='float').reshape((2, 3, 4))
+        coefficients = np.array([
+            [1.0, 0.0],
+            [0.0, 0.5],
+            [0.0, 0.5]
+        ])
+        expected = Adaptor.convert_with_coefficients(data, coefficients, 1)
+
+        actual = Adaptor.convert_with_coefficients(
+            data, sparse.csr_matrix(coefficients), 1)
+        assert actual.shape == (2, 2, 4)
+        np.testing.assert_allclose(actual, expected)
+
+
+class IdentityAdaptor(Adaptor):
+    def generate_coefficients(self, from_spec, to_spec):
+        return np.eye(len(from_spec.dim_coords(from_spec.dims[0]).ids))
+
+
+class TestGetCoefficients:
+    """Coefficients are read with a digest of the dimensions they convert between
+    """
+    def test_digest(self):
+        adaptor = IdentityAdaptor('convert')
+        data_handle = Mock()
+        from_spec = Spec(name='a', dims=['lad'], coords={'lad': ['a', 'b']}, dtype='float')
+        to_spec = Spec(name='a', dims=['region'], coords={'region': ['x', 'y']},
+                       dtype='float')
+        changed_spec = Spec(name='a', dims=['region'], coords={'region': ['x', 'z']},
+                            dtype='float')
+
+        adaptor.get_coefficients(data_handle, from_spec, to_spec)
+        adaptor.get_coefficients(data_handle, from_spec, to_spec)
+        adaptor.get_coefficients(data_handle, from_spec, changed_spec)
+
+        first, second, changed = data_handle.read_coefficients.call_args_list
+        assert first == second
+        assert first[0][:2] == ('lad', 'region')
+        assert first[0][2] != changed[0][2]
@@ -5,7 +5,8 @@ from unittest.mock import Mock
 import numpy as np
 from numpy.testing import assert_equal
 from pytest import raises
-from smif.convert.interval import Interval, IntervalAdaptor, IntervalSet
+from smif.convert.interval import (Interval, IntervalAdaptor, IntervalSet,
+                                   _convert_to_hours)
 from smif.convert.register import NDimensionalRegister
 from smif.data_layer.data_array import DataArray
 from smif.exception import SmifDataNotFoundError
@@ -606,6 +607,15 @@ class TestInterval:
         actual = repr(interval)
         assert actual == "Interval('test', [('P2M', 'P3M')], base_year=2011)"
 
+    def test_parse_once(self):
+        Interval('first', ('P2M', 'P3M'))
+        hits = _convert_to_hours.cache_info().hits
+
+        interval = Interval('second', ('P2M', 'P3M'))
+        assert interval.bounds == [(1416, 2160)]
+        assert str(interval) == "Interval 'second' maps to:\n  hour 1416 to hour 2160\n"
+        assert _convert_to_hours.cache_info().hits == hits + 2
+
     def test_load_remap_timeslices(self):
         interval = Interval('1', [('P2M', 'P3M'),
                                   ('P3M', 'P4M'),
@@ -730,6 +740,27 @@ class TestTimeRegisterCoefficients:
         expected = month_to_season_coefficients
         assert np.allclose(actual, expected, rtol=1e-05, atol=1e-08)
 
+    def test_proportions_match_pairwise(self, months, seasons, remap_months):
+        """Proportions for all pairs at once should match proportions found pair by pair
+        """
+        register = NDimensionalRegister()
+        interval_sets = [
+            IntervalSet('months', months),
+            IntervalSet('seasons', seasons),
+            IntervalSet('remap_months', remap_months)
+        ]
+        for from_set in interval_sets:
+            for to_set in interval_sets:
+                rows, cols, values = from_set.get_proportions(to_set)
+                actual = np.zeros((len(from_set), len(to_set)))
+                actual[rows, cols] = values
+
+                rows, cols, values = register._get_pairwise_proportions(from_set, to_set)
+                expected = np.zeros((len(from_set), len(to_set)))
+                expected[rows, cols] = values
+
+                np.testing.assert_allclose(actual, expected)
+
 
 class TestValidation:
 
@@ -751,6 +782,16 @@ class TestValidation:
             IntervalSet('remap_months', data)
         assert "Duplicate entry for hour 0 in interval set remap_months." in str(ex.value)
 
+    def test_validate_intervals_overlap_later_start(self):
+        data = [
+            {'name': 'first', 'interval': [('PT0H', 'PT10H')]},
+            {'name': 'second', 'interval': [('PT20H', 'PT30H'), ('PT4H', 'PT5H')]},
+            {'name': 'third', 'interval': [('PT10H', 'PT12H')]}
+        ]
+        with raises(ValueError) as ex:
+            IntervalSet('overlapping', data)
+        assert "Duplicate entry for hour 4 in interval set overlapping." in str(ex.value)
+
     def test_time_interval_start_before_end(self):
         with raises(ValueError) as ex:
             Interval('backwards', ('P1Y', 'P3M'))
@@ -760,6 +801,7 @@ class TestValidation:
         with raises(ValueError) as ex:
             interval.interval = ('P2M', 'P1M')
         assert "A time interval must not end before it starts" in str(ex.value)
+        assert interval.bounds == [(0, 744)]
 
 
 class TestIntersection:
@@ -4,7 +4,8 @@ from copy import copy
 from unittest.mock import Mock
 
 import numpy as np
-from pytest import fixture, raises
+from pytest import fixture, mark, raises
+from smif.convert import region
 from smif.convert.region import RegionAdaptor, RegionSet
 from smif.convert.register import NDimensionalRegister
 from smif.data_layer.data_array import DataArray
@@ -336,3 +337,61 @@ class TestGetCoefficients:
         expected = np.array([[1, 0],
                              [0, 1]])
         np.testing.assert_equal(actual, expected)
+
+
+class TestGetProportions:
+    """Proportions for all pairs of regions at once should match proportions found pair by
+    pair
+    """
+    @fixture
+    def region_sets(self, regions, regions_half_triangles, regions_half_squares, regions_rect):
+        return [
+            RegionSet('regions', regions),
+            RegionSet('half_triangles', regions_half_triangles),
+            RegionSet('half_squares', regions_half_squares),
+            RegionSet('rect', regions_rect)
+        ]
+
+    def check_proportions(self, region_sets):
+        register = NDimensionalRegister()
+        for from_set in region_sets:
+            for to_set in region_sets:
+                rows, cols, values = from_set.get_proportions(to_set)
+                actual = np.zeros((len(from_set), len(to_set)))
+                actual[rows, cols] = values
+
+                rows, cols, values = register._get_pairwise_proportions(from_set, to_set)
+                expected = np.zeros((len(from_set), len(to_set)))
+                expected[rows, cols] = values
+
+                np.testing.assert_allclose(actual, expected)
+
+    def test_proportions(self, region_sets):
+        self.check_proportions(region_sets)
+
+    def test_proportions_prepared(self, region_sets, monkeypatch):
+        monkeypatch.setattr(region, 'HAS_VECTORISED_SHAPELY', False)
+        self.check_proportions(region_sets)
+
+    @mark.skipif(not region.HAS_VECTORISED_SHAPELY, reason="Requires shapely>=2.0")
+    def test_proportions_in_process_pool(self, region_sets, monkeypatch):
+        monkeypatch.setattr(region, 'PROCESS_POOL_MIN_PAIRS', 1)
+        monkeypatch.setattr(region, 'PROCESS_POOL_CHUNK_SIZE', 2)
+        for region_set in region_sets:
+            region_set.max_workers = 2
+        self.check_proportions(region_sets)
+
+    def test_invalid_shape(self, regions_rect):
+        bowtie = {
+            'feature': {
+                'type': 'Feature',
+                'properties': {'name': 'bowtie'},
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [[[0, 0], [1, 1], [1, 0], [0, 1]]]
+                }
+            }
+        }
+        with raises(RuntimeError) as ex:
+            RegionSet('bowtie', [bowtie]).get_proportions(RegionSet('rect', regions_rect))
+        assert "Shape bowtie from bowtie is not valid" in str(ex.value)
@@ -0,0 +1,32 @@
+"""Test dense and sparse conversion coefficients
+"""
+import numpy as np
+from pytest import importorskip
+from smif.data_layer import coefficients
+from smif.data_layer.coefficients import build_coefficients, issparse, to_dense
+
+
+class TestBuildCoefficients():
+    def test_small_dense(self):
+        actual = build_coefficients([0, 2], [1, 0], [0.5, 1.0], (3, 2))
+        assert not issparse(actual)
+        np.testing.assert_equal(actual, [[0, 0.5], [0, 0], [1.0, 0]])
+
+    def test_large_sparse(self):
+        importorskip('scipy.sparse')
+        actual = build_coefficients([0, 999], [1, 50], [0.5, 1.0], (1000, 100))
+        assert issparse(actual)
+        assert actual.nnz == 2
+        assert to_dense(actual)[999, 50] == 1.0
+
+    def test_large_dense_without_scipy(self, monkeypatch):
+        monkeypatch.setattr(coefficients, 'HAS_SCIPY', False)
+        actual = build_coefficients([0, 999], [1, 50], [0.5, 1.0], (1000, 100))
+        assert isinstance(actual, np.ndarray)
+        assert actual.shape == (1000, 100)
+        assert actual.sum() == 1.5
+
+    def test_large_mostly_non_zero_dense(self):
+        rows, cols = np.nonzero(np.ones((200, 100)))
+        actual = build_coefficients(rows, cols, np.ones(len(rows)), (200, 100))
+        assert isinstance(actual, np.ndarray)
@@ -1,7 +1,12 @@
 """Test YAML config store
 """
+import os
+from unittest.mock import patch
+
 from pytest import fixture, raises
-from smif.data_layer.file.file_config_store import YamlConfigStore
+from smif.data_layer.file.file_config_store import (YamlConfigStore,
+                                                    _read_yaml_file,
+                                                    _write_yaml_file)
 from smif.exception import (SmifDataExistsError, SmifDataMismatchError,
                             SmifDataNotFoundError)
 
@@ -375,3 +380,43 @@ class TestScenarios:
         with raises(SmifDataNotFoundError) as ex:
             config_handler.read_scenario('missing')
         assert "Scenario 'missing' not found" in str(ex.value)
+
+
+class TestCache:
+    """Parsed config should be reused until the file changes
+    """
+    def test_read_parses_once(self, config_handler, sample_scenarios):
+        name = sample_scenarios[0]['name']
+        with patch('smif.data_layer.file.file_config_store._read_yaml_file',
+                   wraps=_read_yaml_file) as read_yaml_file:
+            first = config_handler.read_scenario(name)
+            second = config_handler.read_scenario(name)
+        assert read_yaml_file.call_count == 1
+        assert first == second
+
+    def test_read_returns_copy(self, config_handler, sample_scenarios):
+        expected = sample_scenarios[0]
+        scenario = config_handler.read_scenario(expected['name'])
+        scenario['variants'].append({'name': 'extra'})
+        scenario['description'] = 'changed'
+
+        assert config_handler.read_scenario(expected['name']) == expected
+
+    def test_external_change(self, config_handler, setup_folder_structure, sample_scenarios):
+        scenario = config_handler.read_scenario(sample_scenarios[0]['name'])
+        scenario['description'] = 'edited outside smif, with a longer description'
+        folder = os.path.join(str(setup_folder_structure), 'config', 'scenarios')
+        _write_yaml_file(folder, scenario['name'], scenario)
+
+        actual = config_handler.read_scenario(scenario['name'])
+        assert actual['description'] == scenario['description']
+
+    def test_write_invalidates(self, config_handler, sample_scenarios):
+        scenario = config_handler.read_scenario(sample_scenarios[0]['name'])
+        scenario['description'] = 'same length'
+        config_handler.update_scenario(scenario['name'], scenario)
+        scenario['description'] = 'same_length'
+        config_handler.update_scenario(scenario['name'], scenario)
+
+        actual = config_handler.read_scenario(scenario['name'])
+        assert actual['description'] == 'same_length'
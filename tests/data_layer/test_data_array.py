@@ -3,6 +3,7 @@
 # pylint: disable=redefined-outer-name
 import numpy
 import pandas as pd
+import pyarrow as pa
 import xarray as xr
 from numpy.testing import assert_array_equal
 from pytest import fixture, raises
@@ -93,6 +94,18 @@ class TestDataArray():
         numpy.testing.assert_equal(da.data, data)
         assert spec == da.spec
 
+    def test_checksum(self, spec, data):
+        """Should hash the data values, whatever the memory layout
+        """
+        da = DataArray(spec, data)
+        assert len(da.checksum()) == 40
+        assert da.checksum() == DataArray(spec, data.copy()).checksum()
+
+        fortran_ordered = DataArray(spec, numpy.asfortranarray(data))
+        assert fortran_ordered.checksum() == da.checksum()
+
+        assert DataArray(spec, data + 1).checksum() != da.checksum()
+
     def test_rename(self, small_da):
         """Allow setting a Spec name
         """
@@ -445,6 +458,138 @@ class TestDataFrameInterop():
         msg_alt = "Data for 'test' contains duplicate values at [{'b': 4, 'a': 2}]"
         assert msg in str(ex.value) or msg_alt in str(ex.value)
 
+    def test_error_unexpected_coords_in_columns(self):
+        spec = Spec(
+            name='test',
+            dims=['a'],
+            coords={'a': [1, 2]},
+            dtype='int'
+        )
+        df = pd.DataFrame([{'a': 1, 'test': 0}, {'a': 3, 'test': 1}])
+
+        with raises(SmifDataMismatchError) as ex:
+            DataArray.from_df(spec, df)
+
+        msg = "Data for 'test' contained unexpected values in the set of coordinates " + \
+              "for dimension 'a': [3]"
+        assert msg in str(ex.value)
+
+    def test_partial_int_promoted(self):
+        spec = Spec(
+            name='test',
+            dims=['a'],
+            coords={'a': [1, 2]},
+            dtype='int'
+        )
+        df = pd.DataFrame([{'a': 2, 'test': 4}])
+
+        actual = DataArray.from_df(spec, df)
+        assert_array_equal(actual.data, [numpy.nan, 4.0])
+
+    def test_full_keeps_dtype(self):
+        spec = Spec(
+            name='test',
+            dims=['a'],
+            coords={'a': [1, 2]},
+            dtype='int'
+        )
+        df = pd.DataFrame([{'a': 2, 'test': 4}, {'a': 1, 'test': 3}])
+
+        actual = DataArray.from_df(spec, df)
+        assert actual.data.dtype == df.test.dtype
+        assert_array_equal(actual.data, [3, 4])
+
+    def test_shuffled_partial(self):
+        """Should place values by coordinates, whatever the order of rows and index levels
+        """
+        spec = Spec(
+            name='test',
+            dims=['a', 'b', 'c'],
+            coords={'a': list(range(10)), 'b': list('pqrstu'), 'c': [2010, 2015, 2020]},
+            dtype='float'
+        )
+        rng = numpy.random.RandomState(0)
+        full = DataArray(spec, rng.rand(*spec.shape))
+        df = full.as_df() \
+            .sample(frac=0.8, random_state=rng) \
+            .reorder_levels(['c', 'a', 'b'])
+
+        actual = DataArray.from_df(spec, df)
+
+        expected = full.as_df()
+        sampled = df.reorder_levels(['a', 'b', 'c']).index
+        expected[~expected.index.isin(sampled)] = numpy.nan
+        assert_array_equal(actual.as_df().values, expected.values)
+
+
+class TestArrowInterop():
+    def test_to_arrow(self, small_da, small_da_df):
+        """Should have dictionary-encoded dims, in the same row order as as_df
+        """
+        table = small_da.to_arrow()
+        assert table.column_names == ['a', 'b', 'c', 'test_data']
+        assert pa.types.is_dictionary(table.schema.field('a').type)
+        assert table.column('a').chunk(0).dictionary.to_pylist() == ['a1', 'a2']
+
+        expected = small_da_df.reset_index()
+        actual = table.to_pandas()
+        for column in ['a', 'b', 'c']:
+            actual[column] = actual[column].astype(str)
+        pd.testing.assert_frame_equal(actual, expected)
+
+    def test_round_trip(self, small_da):
+        table = small_da.to_arrow()
+        assert DataArray.from_arrow(small_da.spec, table) == small_da
+
+    def test_from_plain_columns(self, small_da, small_da_df):
+        """Should read columns which are not dictionary-encoded, in any order
+        """
+        table = pa.Table.from_pandas(
+            small_da_df.reset_index().sample(frac=1, random_state=0), preserve_index=False)
+        assert DataArray.from_arrow(small_da.spec, table) == small_da
+
+    def test_from_partial(self, small_da):
+        table = small_da.to_arrow().slice(1)
+        actual = DataArray.from_arrow(small_da.spec, table)
+        expected = small_da.data.copy()
+        expected[0, 0, 0] = numpy.nan
+        assert_array_equal(actual.data, expected)
+
+    def test_scalar(self):
+        spec = Spec(name='test', dims=[], coords={}, dtype='int')
+        da = DataArray(spec, numpy.array(3))
+        table = da.to_arrow()
+        assert table.to_pydict() == {'test': [3]}
+        assert DataArray.from_arrow(spec, table) == da
+
+    def test_error_missing_column(self, small_da):
+        table = small_da.to_arrow().drop(['b'])
+        msg = "Data for 'test_data' expected a data column called 'test_data' and " + \
+              "dimension columns ['a', 'b', 'c'], instead got columns ['a', 'c', 'test_data']"
+        with raises(SmifDataMismatchError) as ex:
+            DataArray.from_arrow(small_da.spec, table)
+        assert msg in str(ex.value)
+
+    def test_error_unexpected_coords(self, small_da):
+        table = pa.table({
+            'a': ['a1', 'a3'], 'b': ['b1', 'b1'], 'c': ['c1', 'c1'], 'test_data': [1.0, 2.0]
+        })
+        msg = "Data for 'test_data' contained unexpected values in the set of " + \
+              "coordinates for dimension 'a': ['a3']"
+        with raises(SmifDataMismatchError) as ex:
+            DataArray.from_arrow(small_da.spec, table)
+        assert msg in str(ex.value)
+
+    def test_error_duplicate_rows(self, small_da):
+        table = pa.table({
+            'a': ['a1', 'a1'], 'b': ['b1', 'b1'], 'c': ['c1', 'c1'], 'test_data': [1.0, 2.0]
+        })
+        msg = "Data for 'test_data' contains duplicate values at " + \
+              "[{'a': 'a1', 'b': 'b1', 'c': 'c1'}]"
+        with raises(SmifDataMismatchError) as ex:
+            DataArray.from_arrow(small_da.spec, table)
+        assert msg in str(ex.value)
+
 
 class TestMissingData:
 
@@ -0,0 +1,121 @@
+"""Test the in-memory data cache
+"""
+import pickle
+
+import numpy as np
+from pytest import fixture, importorskip, raises
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.data_cache import CoefficientCache, DataCache
+from smif.metadata import Spec
+
+
+@fixture
+def data_array():
+    spec = Spec(name='population', dims=['lad'], coords={'lad': ['a', 'b']}, dtype='float')
+    # 16 bytes
+    return DataArray(spec, np.array([1, 2], dtype='float'))
+
+
+class TestDataCache():
+    def test_get_put(self, data_array):
+        cache = DataCache()
+        assert cache.get(('scenario', 'a')) is None
+        cache.put(('scenario', 'a'), data_array)
+
+        actual = cache.get(('scenario', 'a'))
+        assert actual == data_array
+        assert actual is not data_array
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.size == 16
+
+    def test_copies(self, data_array):
+        cache = DataCache()
+        cache.put(('scenario', 'a'), data_array)
+        data_array.data[0] = -1
+
+        actual = cache.get(('scenario', 'a'))
+        actual.name = 'renamed'
+        actual.data[1] = -1
+
+        expected = np.array([1, 2], dtype='float')
+        np.testing.assert_array_equal(cache.get(('scenario', 'a')).data, expected)
+        assert cache.get(('scenario', 'a')).name == 'population'
+
+    def test_evict_least_recently_used(self, data_array):
+        cache = DataCache(max_bytes=32)
+        cache.put(('a',), data_array)
+        cache.put(('b',), data_array)
+        cache.get(('a',))
+        cache.put(('c',), data_array)
+
+        assert cache.get(('b',)) is None
+        assert cache.get(('a',)) is not None
+        assert cache.get(('c',)) is not None
+        assert cache.size == 32
+
+    def test_too_large(self, data_array):
+        cache = DataCache(max_bytes=8)
+        cache.put(('a',), data_array)
+        assert len(cache) == 0
+
+    def test_replace(self, data_array):
+        cache = DataCache()
+        cache.put(('a',), data_array)
+        cache.put(('a',), data_array)
+        assert len(cache) == 1
+        assert cache.size == 16
+
+    def test_invalidate_prefix(self, data_array):
+        cache = DataCache()
+        cache.put(('scenario', 'population', 'high', 2010), data_array)
+        cache.put(('scenario', 'population', 'low', 2010), data_array)
+        cache.put(('scenario', 'mortality', 'high', 2010), data_array)
+
+        cache.invalidate(('scenario', 'population', 'high'))
+        assert len(cache) == 2
+        cache.invalidate(('scenario', 'population'))
+        assert len(cache) == 1
+        cache.invalidate()
+        assert len(cache) == 0
+        assert cache.size == 0
+
+    def test_pickle_empty(self, data_array):
+        cache = DataCache(max_bytes=100)
+        cache.put(('a',), data_array)
+
+        actual = pickle.loads(pickle.dumps(cache))
+        assert actual.max_bytes == 100
+        assert len(actual) == 0
+
+
+class TestCoefficientCache():
+    def test_shared_read_only(self):
+        cache = CoefficientCache()
+        coefficients = np.eye(2)
+        cache.put(('lad', 'region', 'abc'), coefficients)
+
+        actual = cache.get(('lad', 'region', 'abc'))
+        assert actual is coefficients
+        assert cache.size == 32
+        with raises(ValueError):
+            actual[0, 0] = -1
+
+    def test_invalidate_dims(self):
+        cache = CoefficientCache()
+        cache.put(('lad', 'region', 'abc'), np.eye(2))
+        cache.put(('lad', 'region', 'def'), np.eye(2))
+        cache.put(('lad', 'grid', 'abc'), np.eye(2))
+
+        cache.invalidate(('lad', 'region'))
+        assert len(cache) == 1
+        assert cache.get(('lad', 'grid', 'abc')) is not None
+
+    def test_sparse_size(self):
+        sparse = importorskip('scipy.sparse')
+        cache = CoefficientCache()
+        coefficients = sparse.csr_matrix(np.eye(2))
+        cache.put(('lad', 'region', 'abc'), coefficients)
+
+        assert cache.get(('lad', 'region', 'abc')) is coefficients
+        # two float64 values, two int32 indices and three int32 index pointers
+        assert cache.size == 16 + 8 + 12
@@ -458,6 +458,22 @@ class TestDataHandle():
         np.testing.assert_equal(actual.as_ndarray(), data)
         assert actual == da
 
+    def test_results_checksums(self, mock_store, mock_model_with_conversion):
+        """should record a checksum of each output written
+        """
+        data_handle = DataHandle(mock_store, 1, 2015, [2015, 2020], mock_model_with_conversion)
+        assert data_handle.results_checksums == {}
+
+        data = np.array([[1.0], [4.0]])
+        data_handle.set_results("test", data)
+        first = data_handle.results_checksums
+        assert list(first) == ['test']
+        spec = mock_model_with_conversion.outputs['test']
+        assert first['test'] == DataArray(spec, data).checksum()
+
+        data_handle.set_results("test", np.array([[1.0], [5.0]]))
+        assert data_handle.results_checksums['test'] != first['test']
+
     def test_set_data_wrong_shape(self, mock_store, mock_model_with_conversion):
         """should allow write access to output data
         """
@@ -1,14 +1,21 @@
 """Test all DataStore implementations
 """
+import os
 from copy import deepcopy
 
 import numpy as np
-from pytest import fixture, mark, param, raises
+import pandas
+import pyarrow.parquet as pq
+from pytest import fixture, importorskip, mark, param, raises
 from smif.data_layer.data_array import DataArray
 from smif.data_layer.database_interface import DbDataStore
-from smif.data_layer.file.file_data_store import CSVDataStore, ParquetDataStore
+from smif.data_layer.file.file_data_store import (CSVDataStore,
+                                                  NpyDataStore,
+                                                  ParquetDataStore,
+                                                  partition_parquet_by_timestep)
 from smif.data_layer.memory_interface import MemoryDataStore
-from smif.exception import SmifDataNotFoundError
+from smif.data_layer.sqlite_interface import SqliteDataStore
+from smif.exception import SmifDataMismatchError, SmifDataNotFoundError
 from smif.metadata import Spec
 
 
@@ -17,6 +24,8 @@ from smif.metadata import Spec
         'memory',
         'file_csv',
         'file_parquet',
+        'file_npy',
+        'sqlite',
         param('database', marks=mark.skip)]
     )
 def handler(request, setup_empty_folder_structure):
@@ -28,6 +37,12 @@ def handler(request, setup_empty_folder_structure):
     elif request.param == 'file_parquet':
         base_folder = setup_empty_folder_structure
         handler = ParquetDataStore(base_folder)
+    elif request.param == 'file_npy':
+        base_folder = setup_empty_folder_structure
+        handler = NpyDataStore(base_folder)
+    elif request.param == 'sqlite':
+        base_folder = setup_empty_folder_structure
+        handler = SqliteDataStore(os.path.join(str(base_folder), 'data', 'smif.sqlite'))
     elif request.param == 'database':
         handler = DbDataStore()
         raise NotImplementedError
@@ -136,6 +151,71 @@ class TestDataArray():
         assert actual == expected
 
 
+class TestParquetTimesteps():
+    """Read single timesteps from Parquet files with a row group per timestep
+    """
+    @fixture
+    def handler(self, setup_empty_folder_structure):
+        return ParquetDataStore(setup_empty_folder_structure)
+
+    @fixture
+    def spec(self):
+        return Spec(
+            name='population',
+            dims=['timestep', 'lad'],
+            coords={'timestep': [2015, 2010, 2020], 'lad': ['a', 'b']},
+            dtype='float'
+        )
+
+    def test_row_group_per_timestep(self, handler, spec):
+        data = np.array([[3, 4], [1, 2], [5, 6]], dtype='float')
+        handler.write_scenario_variant_data('population', DataArray(spec, data))
+
+        path = os.path.join(handler.data_folders['scenarios'], 'population.parquet')
+        assert pq.ParquetFile(path).num_row_groups == 3
+
+        actual = handler.read_scenario_variant_data('population', spec, timestep=2015)
+        np.testing.assert_array_equal(actual.as_ndarray(), [[3, 4]])
+
+        actual = handler.read_scenario_variant_data(
+            'population', spec, timesteps=[2010, 2020])
+        np.testing.assert_array_equal(actual.as_ndarray(), [[1, 2], [5, 6]])
+
+    def test_partition_parquet_by_timestep(self, handler, spec):
+        path = os.path.join(handler.data_folders['scenarios'], 'population.parquet')
+        pandas.DataFrame({
+            'timestep': [2010, 2015, 2010, 2015],
+            'lad': ['a', 'a', 'b', 'b'],
+            'population': [1., 3., 2., 4.]
+        }).to_parquet(path, engine='pyarrow')
+        assert pq.ParquetFile(path).num_row_groups == 1
+
+        assert partition_parquet_by_timestep(path)
+        assert pq.ParquetFile(path).num_row_groups == 2
+
+        actual = handler.read_scenario_variant_data('population', spec, timestep=2015)
+        np.testing.assert_array_equal(actual.as_ndarray(), [[3, 4]])
+
+    def test_read_indexed_dataframe(self, handler, spec):
+        """Should read files written from a MultiIndexed dataframe, as in earlier versions
+        """
+        path = os.path.join(handler.data_folders['scenarios'], 'population.parquet')
+        index = pandas.MultiIndex.from_product(
+            [[2010, 2015], ['a', 'b']], names=['timestep', 'lad'])
+        pandas.DataFrame({'population': [1., 2., 3., 4.]}, index=index) \
+            .to_parquet(path, engine='pyarrow')
+
+        actual = handler.read_scenario_variant_data('population', spec)
+        np.testing.assert_array_equal(actual.as_ndarray(), [[1, 2], [3, 4]])
+        assert actual.spec.dim_coords('timestep').ids == [2010, 2015]
+
+    def test_partition_without_timestep(self, handler):
+        path = os.path.join(handler.data_folders['scenarios'], 'static.parquet')
+        pandas.DataFrame({'lad': ['a', 'b'], 'area': [1., 2.]}).to_parquet(path)
+
+        assert not partition_parquet_by_timestep(path)
+
+
 class TestInitialConditions():
     """Read and write initial conditions
     """
@@ -199,6 +279,21 @@ class TestCoefficients():
         actual = handler.read_coefficients('from_dim_name', 'to_dim_name')
         np.testing.assert_equal(actual, expected)
 
+    def test_read_write_sparse_coefficients(self, handler):
+        sparse = importorskip('scipy.sparse')
+        expected = sparse.csr_matrix(([0.5, 0.5, 1.0], ([0, 0, 2], [0, 3, 1])), shape=(3, 4))
+        handler.write_coefficients('from_dim_name', 'to_dim_name', expected)
+
+        actual = handler.read_coefficients('from_dim_name', 'to_dim_name')
+        assert sparse.issparse(actual)
+        np.testing.assert_equal(actual.toarray(), expected.toarray())
+
+        # overwrite with dense coefficients
+        handler.write_coefficients('from_dim_name', 'to_dim_name', expected.toarray())
+        actual = handler.read_coefficients('from_dim_name', 'to_dim_name')
+        assert not sparse.issparse(actual)
+        np.testing.assert_equal(actual, expected.toarray())
+
 
 class TestResults():
     """Read/write results and prepare warm start
@@ -255,6 +350,56 @@ class TestResults():
             handler.read_results(modelrun_name, model_name, output_spec, 2020)
 
 
+class TestNpyResults():
+    """Read results as memory-mapped arrays
+    """
+    @fixture
+    def handler(self, setup_empty_folder_structure):
+        return NpyDataStore(setup_empty_folder_structure)
+
+    @fixture
+    def results(self):
+        spec = Spec(
+            name='energy_use',
+            dims=['lad', 'hour'],
+            coords={'lad': ['a', 'b', 'c'], 'hour': [0, 1]},
+            dtype='float'
+        )
+        return DataArray(spec, np.arange(6, dtype='float').reshape((3, 2)))
+
+    def test_read_memory_mapped(self, handler, results):
+        handler.write_results(results, 'test_modelrun', 'energy', 2010)
+        actual = handler.read_results('test_modelrun', 'energy', results.spec, 2010)
+
+        assert isinstance(actual.data, np.memmap)
+        assert not actual.data.flags.writeable
+        assert actual == results
+        np.testing.assert_array_equal(actual.data[1:, 0], [2, 4])
+
+    def test_write_over_memory_mapped(self, handler, results):
+        handler.write_results(results, 'test_modelrun', 'energy', 2010)
+        previous = handler.read_results('test_modelrun', 'energy', results.spec, 2010)
+
+        data = results.data + 1
+        handler.write_results(DataArray(results.spec, data), 'test_modelrun', 'energy', 2010)
+        actual = handler.read_results('test_modelrun', 'energy', results.spec, 2010)
+
+        np.testing.assert_array_equal(actual.data, data)
+        np.testing.assert_array_equal(previous.data, results.data)
+
+    def test_read_mismatched_coords(self, handler, results):
+        handler.write_results(results, 'test_modelrun', 'energy', 2010)
+        spec = Spec(
+            name='energy_use',
+            dims=['lad', 'hour'],
+            coords={'lad': ['c', 'b', 'a'], 'hour': [0, 1]},
+            dtype='float'
+        )
+        with raises(SmifDataMismatchError) as ex:
+            handler.read_results('test_modelrun', 'energy', spec, 2010)
+        assert "has coords" in str(ex.value)
+
+
 class TestDataExists():
     """Check that model run data exists
     """
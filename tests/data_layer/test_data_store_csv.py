@@ -692,6 +692,22 @@ class TestCoefficients:
         with raises(SmifDataNotFoundError):
             handler.read_coefficients('wrong_dim_name', 'to_dim_name')
 
+    def test_read_text(self, config_handler):
+        """Coefficients written as text by earlier versions can be read
+        """
+        data = np.eye(10)
+        handler = config_handler
+        path = os.path.join(
+            handler.data_folders['coefficients'], 'from_dim_name.to_dim_name.txt.gz')
+        np.savetxt(path, data)
+        actual = handler.read_coefficients('from_dim_name', 'to_dim_name')
+        np.testing.assert_equal(actual, data)
+
+        # binary coefficients are read in preference
+        handler.write_coefficients('from_dim_name', 'to_dim_name', data * 2)
+        actual = handler.read_coefficients('from_dim_name', 'to_dim_name')
+        np.testing.assert_equal(actual, data * 2)
+
     def test_dfi_raises_if_folder_missing(self):
         """Ensure we can write files, even if project directory starts empty
         """
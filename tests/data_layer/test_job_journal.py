@@ -0,0 +1,80 @@
+"""Test the job journal
+"""
+import os
+
+from pytest import fixture
+from smif.data_layer.job_journal import JobJournal
+from smif.model import ModelOperation, SectorModel
+
+
+class EmptySectorModel(SectorModel):
+    def simulate(self, data):
+        return data
+
+
+def simulate_job(model_name, timestep, decision_iteration):
+    return {
+        'model': EmptySectorModel(model_name),
+        'operation': ModelOperation.SIMULATE,
+        'current_timestep': timestep,
+        'decision_iteration': decision_iteration
+    }
+
+
+@fixture
+def journal(tmpdir):
+    return JobJournal(os.path.join(str(tmpdir), 'results', 'model_run', 'job_journal.jsonl'))
+
+
+class TestJobJournal():
+    def test_empty(self, journal):
+        assert not journal.exists()
+        assert journal.finished_jobs() == []
+        assert journal.latest_timestep() is None
+
+    def test_finished_jobs(self, journal):
+        journal.started('a_2010', simulate_job('a', 2010, 0))
+        journal.finished('a_2010', simulate_job('a', 2010, 0), {'output': 'abc'})
+        journal.started('a_2015', simulate_job('a', 2015, 0))
+
+        assert journal.exists()
+        assert journal.finished_jobs() == [(2010, 0, 'a')]
+        assert journal.latest_timestep() == 2015
+
+    def test_restarted_job(self, journal):
+        journal.started('a_2010', simulate_job('a', 2010, 0))
+        journal.finished('a_2010', simulate_job('a', 2010, 0))
+        journal.started('a_2010', simulate_job('a', 2010, 0))
+
+        assert journal.finished_jobs() == []
+
+    def test_other_operations(self, journal):
+        journal.started('decide_2010', {
+            'model': None,
+            'operation': ModelOperation.DECIDE,
+            'current_timestep': 2010,
+            'decision_iteration': 0
+        })
+        journal.finished('before_a', {
+            'model': EmptySectorModel('a'),
+            'operation': ModelOperation.BEFORE_MODEL_RUN,
+            'current_timestep': None,
+            'decision_iteration': None
+        })
+
+        assert journal.finished_jobs() == []
+        assert journal.latest_timestep() is None
+
+    def test_incomplete_line(self, journal):
+        journal.finished('a_2010', simulate_job('a', 2010, 0))
+        with open(journal.path, 'a') as file_handle:
+            file_handle.write('{"event": "fini')
+
+        assert journal.finished_jobs() == [(2010, 0, 'a')]
+
+    def test_clear(self, journal):
+        journal.finished('a_2010', simulate_job('a', 2010, 0))
+        journal.clear()
+
+        assert not journal.exists()
+        assert journal.finished_jobs() == []
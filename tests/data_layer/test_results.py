@@ -2,13 +2,14 @@
 """
 
 import os
+import threading
 from collections import OrderedDict
 
 import numpy as np
 import pandas as pd
 from pytest import fixture, raises
 from smif.data_layer import DataArray, Results
-from smif.exception import SmifDataNotFoundError
+from smif.exception import SmifDataError, SmifDataNotFoundError
 from smif.metadata import Spec
 
 
@@ -156,6 +157,10 @@ class TestNoResults:
             Results(store={'interface': 'local_parquet', 'dir': '.'})
         assert 'Expected data folder' in str(ex.value)
 
+        with raises(SmifDataNotFoundError) as ex:
+            Results(store={'interface': 'local_npy', 'dir': '.'})
+        assert 'Expected data folder' in str(ex.value)
+
         # Interface left blank will default to local_csv
         with raises(SmifDataNotFoundError) as ex:
             Results(store={'dir': '.'})
@@ -339,6 +344,79 @@ class TestSomeResults:
 
         pd.testing.assert_frame_equal(results_data, expected)
 
+    def test_read_in_turn(self, results_with_results):
+        kwargs = {
+            'model_run_names': ['model_run_1', 'model_run_2'],
+            'model_names': ['b_model'],
+            'output_names': ['sample_output']
+        }
+        expected = results_with_results.read_results(**kwargs)
+
+        results_with_results._store.results_readers = 1
+        # read_results consumes output_names
+        kwargs['output_names'] = ['sample_output']
+        pd.testing.assert_frame_equal(results_with_results.read_results(**kwargs), expected)
+
+    def test_read_stacked_in_order(self, results_with_results):
+        store = results_with_results._store
+        spec = Spec.from_dict(store.read_model('a_model')['outputs'][0])
+        for timestep in (2015, 2020):
+            data = np.full(spec.shape, timestep, dtype=np.int32)
+            store.write_results(DataArray(spec, data), 'model_run_1', 'a_model', timestep, 1)
+
+        actual = store.get_result_darray(
+            'model_run_1', 'a_model', 'sample_output', decision_iterations=[0, 1])
+
+        assert actual.dims == ['timestep_decision', 'sample_dim', 'sample_dim_colour']
+        assert actual.spec.dim_coords('timestep_decision').ids == [
+            (2010, 0), (2015, 0), (2015, 1), (2020, 0), (2020, 1)]
+        assert actual.data.dtype == np.int32
+        np.testing.assert_array_equal(actual.data[2], np.full(spec.shape, 2015))
+        np.testing.assert_array_equal(actual.data[4], np.full(spec.shape, 2020))
+        np.testing.assert_array_equal(actual.data[3], [[1, 2, 3], [4, 5, 6]])
+
+    def test_read_stacked_mixed_dtypes(self, results_with_results):
+        store = results_with_results._store
+        spec = Spec.from_dict(store.read_model('a_model')['outputs'][0])
+        store.write_results(
+            DataArray(spec, np.full(spec.shape, 0.5)), 'model_run_1', 'a_model', 2020, 1)
+
+        actual = store.get_result_darray(
+            'model_run_1', 'a_model', 'sample_output', decision_iterations=[0, 1])
+
+        # int results are upcast to match the float results, rather than truncating them
+        assert actual.data.dtype == np.float64
+        np.testing.assert_array_equal(actual.data[-1], np.full(spec.shape, 0.5))
+        np.testing.assert_array_equal(actual.data[0], [[1, 2, 3], [4, 5, 6]])
+
+    def test_read_stacked_no_results(self, results_with_results):
+        store = results_with_results._store
+        spec = Spec.from_dict(store.read_model('a_model')['outputs'][0])
+        with raises(SmifDataNotFoundError):
+            store._read_stacked_results([('model_run_1', 'a_model', spec, [])])
+
+    def test_read_progress(self, results_with_results):
+        progress = []
+        results_with_results.read_results(
+            model_run_names=['model_run_1', 'model_run_2'],
+            model_names=['b_model'],
+            output_names=['sample_output'],
+            progress=lambda done, total: progress.append((done, total))
+        )
+        assert progress == [(done, 10) for done in range(1, 11)]
+
+    def test_read_cancelled(self, results_with_results):
+        cancel = threading.Event()
+        cancel.set()
+        with raises(SmifDataError) as ex:
+            results_with_results.read_results(
+                model_run_names=['model_run_1'],
+                model_names=['b_model'],
+                output_names=['sample_output'],
+                cancel=cancel
+            )
+        assert 'Cancelled' in str(ex.value)
+
 
 class TestReadScenarios:
 
@@ -0,0 +1,107 @@
+"""Test the results manifest
+"""
+import os
+
+import numpy as np
+from pytest import fixture
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.file import CSVDataStore
+from smif.data_layer.file.results_manifest import ResultsManifest
+from smif.metadata import Spec
+
+
+@fixture
+def manifest(tmpdir):
+    return ResultsManifest(
+        os.path.join(str(tmpdir), 'results', 'model_run', 'results_manifest.sqlite'))
+
+
+class TestResultsManifest():
+    def test_empty(self, manifest):
+        assert not manifest.exists()
+        assert manifest.available_results() == []
+        manifest.remove(2010, 0, 'energy', 'cost')
+        assert not manifest.exists()
+
+    def test_record(self, manifest):
+        manifest.record(2015, 0, 'energy', 'cost', 100, 'abc')
+        manifest.record(2010, 1, 'energy', 'cost')
+        manifest.record(2010, 0, 'water', 'cost')
+
+        assert manifest.exists()
+        assert manifest.available_results() == [
+            (2010, 0, 'water', 'cost'),
+            (2010, 1, 'energy', 'cost'),
+            (2015, 0, 'energy', 'cost')
+        ]
+        details = manifest.details()[-1]
+        assert details[:6] == (2015, 0, 'energy', 'cost', 100, 'abc')
+        assert details[6] > 0
+
+    def test_record_replaces(self, manifest):
+        manifest.record(2010, None, 'energy', 'cost', 100, 'abc')
+        manifest.record(2010, None, 'energy', 'cost', 200, 'def')
+
+        assert manifest.details()[0][:6] == (2010, None, 'energy', 'cost', 200, 'def')
+        assert len(manifest.details()) == 1
+
+    def test_remove(self, manifest):
+        manifest.record_many([
+            (2010, 0, 'energy', 'cost', 100, None),
+            (2015, 0, 'energy', 'cost', 100, None)
+        ])
+        manifest.remove(2010, 0, 'energy', 'cost')
+
+        assert manifest.available_results() == [(2015, 0, 'energy', 'cost')]
+
+
+class TestFileDataStoreManifest():
+    @fixture
+    def handler(self, setup_empty_folder_structure):
+        return CSVDataStore(setup_empty_folder_structure)
+
+    @fixture
+    def results(self):
+        spec = Spec(name='cost', dims=['lad'], coords={'lad': ['a', 'b']}, dtype='float')
+        return DataArray(spec, np.array([1., 2.]))
+
+    def test_write_results_recorded(self, handler, results):
+        handler.write_results(results, 'model_run', 'energy', 2010, 0)
+
+        manifest = handler._get_results_manifest('model_run')
+        timestep, decision, model, output, size, checksum, _ = manifest.details()[0]
+        assert (timestep, decision, model, output) == (2010, 0, 'energy', 'cost')
+        assert size == os.path.getsize(
+            handler._get_results_path('model_run', 'energy', 'cost', 2010, 0))
+        assert checksum == results.checksum()
+
+    def test_write_results_given_checksum(self, handler, results):
+        """Should record a checksum already computed by the caller
+        """
+        handler.write_results(results, 'model_run', 'energy', 2010, 0, 'a' * 40)
+
+        manifest = handler._get_results_manifest('model_run')
+        assert manifest.details()[0][5] == 'a' * 40
+
+    def test_list_without_glob(self, handler, results):
+        """Should list results from the manifest, not the results folder
+        """
+        handler.write_results(results, 'model_run', 'energy', 2010, 0)
+        os.remove(handler._get_results_path('model_run', 'energy', 'cost', 2010, 0))
+
+        assert handler.available_results('model_run') == [(2010, 0, 'energy', 'cost')]
+
+    def test_index_existing_results(self, handler, results):
+        """Should index results written without a manifest
+        """
+        handler.write_results(results, 'model_run', 'energy', 2010, 0)
+        handler.write_results(results, 'model_run', 'energy', 2015, None)
+        os.remove(handler._get_results_manifest('model_run').path)
+
+        handler.write_results(results, 'model_run', 'water', 2010, 0)
+
+        assert sorted(handler.available_results('model_run'), key=str) == [
+            (2010, 0, 'energy', 'cost'),
+            (2010, 0, 'water', 'cost'),
+            (2015, None, 'energy', 'cost')
+        ]
@@ -0,0 +1,83 @@
+"""Test writing results in the background
+"""
+import threading
+
+import numpy as np
+from pytest import fixture, raises
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.memory_interface import MemoryDataStore
+from smif.data_layer.results_writer import ResultsWriter
+from smif.exception import SmifDataError
+from smif.metadata import Spec
+
+
+class BlockingDataStore(MemoryDataStore):
+    """Wait to write results until released
+    """
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.fail = False
+
+    def write_results(self, data_array, *args):
+        self.release.wait(5)
+        if self.fail:
+            raise OSError("Disk full")
+        super().write_results(data_array, *args)
+
+
+@fixture
+def data_store():
+    return BlockingDataStore()
+
+
+@fixture
+def results():
+    spec = Spec(name='cost', dims=['lad'], coords={'lad': ['a', 'b']}, dtype='float')
+    return DataArray(spec, np.array([1., 2.]))
+
+
+class TestResultsWriter():
+    def test_write_without_threads(self, data_store, results):
+        writer = ResultsWriter()
+        data_store.release.set()
+        writer.write(data_store, results, 'model_run', 'model', 2010, 0)
+        assert data_store.available_results('model_run') == [(2010, 0, 'model', 'cost')]
+
+    def test_write_in_background(self, data_store, results):
+        writer = ResultsWriter(max_workers=1)
+        writer.write(data_store, results, 'model_run', 'model', 2010, 0)
+        # the model may reuse its array once results are set
+        results.data[:] = 0
+        assert data_store.available_results('model_run') == []
+
+        data_store.release.set()
+        writer.wait(('model_run', 'model', 'cost', 2010, 0))
+        actual = data_store.read_results('model_run', 'model', results.spec, 2010, 0)
+        np.testing.assert_array_equal(actual.data, [1., 2.])
+
+    def test_flush_raises(self, data_store, results):
+        writer = ResultsWriter(max_workers=2)
+        data_store.fail = True
+        writer.write(data_store, results, 'model_run', 'model', 2010, 0)
+        writer.write(data_store, results, 'model_run', 'model', 2015, 0)
+        data_store.release.set()
+
+        with raises(SmifDataError) as ex:
+            writer.flush()
+        assert "Failed to write 2 results" in str(ex.value)
+        assert "Disk full" in str(ex.value)
+        # errors are raised once
+        writer.flush()
+
+    def test_pickle_empty(self, data_store, results):
+        import pickle
+        writer = ResultsWriter(max_workers=1, max_pending=4)
+        writer.write(data_store, results, 'model_run', 'model', 2010, 0)
+
+        unpickled = pickle.loads(pickle.dumps(writer))
+        assert unpickled.max_workers == 1
+        assert unpickled.max_pending == 4
+        unpickled.flush()
+        data_store.release.set()
+        writer.flush()
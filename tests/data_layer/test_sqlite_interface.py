@@ -0,0 +1,76 @@
+"""Test the SQLite data store
+"""
+import os
+import pickle
+
+import numpy as np
+from pytest import fixture
+from smif.data_layer.data_array import DataArray
+from smif.data_layer.sqlite_interface import SqliteDataStore
+from smif.metadata import Spec
+
+
+@fixture
+def handler(tmpdir):
+    return SqliteDataStore(os.path.join(str(tmpdir), 'data', 'smif.sqlite'))
+
+
+@fixture
+def population():
+    spec = Spec(
+        name='population',
+        dims=['lad', 'timestep'],
+        coords={'lad': ['a', 'b', 'c'], 'timestep': [2010, 2015]},
+        dtype='float'
+    )
+    return DataArray(spec, np.arange(6, dtype='float').reshape((3, 2)))
+
+
+class TestSqliteDataStore():
+    def test_wal_mode(self, handler):
+        journal_mode = handler._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        assert journal_mode == 'wal'
+
+    def test_row_per_timestep(self, handler, population):
+        handler.write_scenario_variant_data('population', population)
+
+        rows = handler._connection().execute(
+            "SELECT timestep FROM data_arrays WHERE key = 'population'").fetchall()
+        assert sorted(rows) == [(2010,), (2015,)]
+
+        actual = handler.read_scenario_variant_data('population', population.spec)
+        assert actual == population
+
+        actual = handler.read_scenario_variant_data(
+            'population', population.spec, timestep=2015)
+        np.testing.assert_array_equal(actual.as_ndarray(), [[1], [3], [5]])
+
+    def test_read_missing_timesteps(self, handler, population):
+        handler.write_scenario_variant_data('population', population)
+
+        actual = handler.read_scenario_variant_data(
+            'population', population.spec, timesteps=[2015, 2020])
+        assert actual.dims == ['lad', 'timestep']
+        np.testing.assert_array_equal(
+            actual.as_ndarray(), [[1, np.nan], [3, np.nan], [5, np.nan]])
+
+    def test_read_reordered_coords(self, handler, population):
+        handler.write_narrative_variant_data('population', population)
+        spec = Spec(
+            name='population',
+            dims=['lad'],
+            coords={'lad': ['c', 'b', 'a']},
+            dtype='float'
+        )
+
+        actual = handler.read_narrative_variant_data('population', spec, timestep=2010)
+        np.testing.assert_array_equal(actual.as_ndarray(), [4, 2, 0])
+
+    def test_pickle_reconnects(self, handler, population):
+        handler.write_results(population, 'model_run', 'model', 2010, 0)
+
+        unpickled = pickle.loads(pickle.dumps(handler))
+
+        actual = unpickled.read_results('model_run', 'model', population.spec, 2010, 0)
+        assert actual == population
+        assert unpickled.available_results('model_run') == [(2010, 0, 'model', 'population')]
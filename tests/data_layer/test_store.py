@@ -4,6 +4,8 @@ Many methods simply proxy to config/metadata/data store implementations, but the
 cross-coordination and there are some convenience methods implemented at this layer.
 """
 import os
+import pickle
+from unittest.mock import Mock
 
 import numpy as np
 import numpy.testing
@@ -15,6 +17,7 @@ from smif.data_layer.memory_interface import (MemoryConfigStore,
                                               MemoryMetadataStore)
 from smif.exception import SmifDataError, SmifDataNotFoundError
 from smif.metadata import Spec
+from smif.model import ModelOperation
 
 
 @fixture
@@ -343,6 +346,29 @@ class TestStoreData():
         )
         assert (actual.data == scenario_variant_data.data[1]).all()
 
+    def test_scenario_variant_data_cached(self, store, setup):
+        key, scenario_variant_data = setup
+        scenario_name, variant_name, variable = key
+        store.data_store = Mock(wraps=store.data_store)
+
+        first = store.read_scenario_variant_data(scenario_name, variant_name, variable, 2015)
+        # callers may modify the data they are given
+        first.name = 'renamed'
+        first.data[:] = -1
+        second = store.read_scenario_variant_data(scenario_name, variant_name, variable, 2015)
+
+        assert store.data_store.read_scenario_variant_data.call_count == 1
+        assert (store.data_cache.hits, store.data_cache.misses) == (1, 1)
+        assert second.name == variable
+        assert (second.data == scenario_variant_data.data[0]).all()
+
+        # writing new data for the variant invalidates cached data
+        updated = DataArray(scenario_variant_data.spec, scenario_variant_data.data + 1)
+        store.write_scenario_variant_data(scenario_name, variant_name, updated)
+        actual = store.read_scenario_variant_data(scenario_name, variant_name, variable, 2015)
+        assert (actual.data == updated.data[0]).all()
+        assert store.data_store.read_scenario_variant_data.call_count == 2
+
     def test_convert_scenario_data(self, empty_store, store, sample_dimensions, scenario,
                                    sample_scenario_data, model_run):
         src_store = store
@@ -628,6 +654,25 @@ class TestStoreData():
             conversion_coefficients
         )
 
+    def test_conversion_coefficients_cached(self, store, conversion_coefficients):
+        store.write_coefficients('source_dim', 'sink_dim', conversion_coefficients)
+        store.data_store = Mock(wraps=store.data_store)
+
+        first = store.read_coefficients('source_dim', 'sink_dim', 'abc')
+        second = store.read_coefficients('source_dim', 'sink_dim', 'abc')
+        assert first is second
+        assert store.data_store.read_coefficients.call_count == 1
+
+        # coefficients for changed dimensions are read again
+        store.read_coefficients('source_dim', 'sink_dim', 'def')
+        assert store.data_store.read_coefficients.call_count == 2
+
+        # writing coefficients invalidates cached coefficients
+        store.write_coefficients('source_dim', 'sink_dim', conversion_coefficients * 2)
+        actual = store.read_coefficients('source_dim', 'sink_dim', 'abc')
+        assert store.data_store.read_coefficients.call_count == 3
+        numpy.testing.assert_equal(actual, conversion_coefficients * 2)
+
     def test_results(self, store, sample_results):
         # write
         store.write_results(sample_results, 'model_run_name', 'model_name', 0)
@@ -642,6 +687,17 @@ class TestStoreData():
         store.clear_results('model_run_name')
         assert not store.available_results('model_run_name')
 
+    def test_results_written_in_background(self, store, sample_results):
+        store.results_writer.max_workers = 2
+        store.write_results(sample_results, 'model_run_name', 'model_name', 0)
+        # read waits for the pending write
+        spec = sample_results.spec
+        assert store.read_results('model_run_name', 'model_name', spec, 0) == sample_results
+        store.flush_results()
+        assert store.available_results('model_run_name') == [
+            (0, None, 'model_name', spec.name)
+        ]
+
     def test_no_completed_jobs(self, full_store):
         expected = []
         actual = full_store.completed_jobs('unique_model_run_name')
@@ -664,6 +720,35 @@ class TestStoreData():
         actual = full_store.completed_jobs('unique_model_run_name')
         assert actual == expected
 
+    def test_no_job_journal(self, store):
+        assert store.job_journal('model_run_name') is None
+
+    def test_completed_jobs_from_journal(self, full_store, tmpdir):
+        full_store.data_store.results_folder = str(tmpdir)
+        journal = full_store.job_journal('unique_model_run_name')
+        assert journal.path == os.path.join(
+            str(tmpdir), 'unique_model_run_name', 'job_journal.jsonl')
+
+        model = full_store.read_model('energy_demand')
+        job = {
+            'model': Mock(),
+            'operation': ModelOperation.SIMULATE,
+            'current_timestep': 2015,
+            'decision_iteration': 0
+        }
+        job['model'].name = model['name']
+        journal.started('energy_demand_2015', job)
+        journal.finished('energy_demand_2015', job)
+        job['current_timestep'] = 2020
+        journal.started('energy_demand_2020', job)
+
+        assert full_store.completed_jobs('unique_model_run_name') == [
+            (2015, 0, 'energy_demand')]
+        assert full_store.prepare_warm_start('unique_model_run_name') == 2020
+
+        full_store.clear_results('unique_model_run_name')
+        assert not journal.exists()
+
     def test_filter_complete_available_results(self, store):
         available_results = [
             (2020, 0, 'test_model', 'output_a'),
@@ -815,3 +900,20 @@ class TestWrongRaises:
 
         expected = "Narrative name 'bla' does not exist in sos_model 'energy'"
         assert expected in str(ex.value)
+
+
+class TestStorePickle():
+    """Stores are pickled to send to worker processes
+    """
+    def test_pickle_file_store(self, setup_folder_structure, model_run):
+        store = Store.from_dict({
+            'interface': 'local_csv',
+            'dir': str(setup_folder_structure)
+        })
+        store.write_model_run(model_run)
+
+        unpickled = pickle.loads(pickle.dumps(store))
+        assert unpickled.read_model_run(model_run['name']) == \
+            store.read_model_run(model_run['name'])
+        assert unpickled.logger is store.logger
+        assert unpickled.data_store.logger is store.data_store.logger
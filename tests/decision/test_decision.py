@@ -223,6 +223,17 @@ class TestDecisionManager():
         with raises(StopIteration):
             next(dm)
 
+    def test_decision_loop_without_saving(self, decision_manager: DecisionManager):
+        df = decision_manager
+        df._store.write_state = Mock()
+        dm = df.decision_loop(save_decisions=False)
+        bundle = next(dm)
+        assert bundle == {
+            'decision_iterations': [0],
+            'timesteps': [2010, 2015]
+        }
+        df._store.write_state.assert_not_called()
+
     def test_available_interventions(self, decision_manager: DecisionManager):
         df = decision_manager
         df._register = {'a': {'name': 'a'},
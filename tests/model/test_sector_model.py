@@ -198,6 +198,25 @@ class TestSectorModel():
         actual['parameters'].sort(key=lambda m: m['name'])
         assert actual == sector_model_dict
 
+    def test_timeout_and_retries(self, sector_model_dict):
+        """Read and write optional timeout and retry settings
+        """
+        sector_model_dict['timeout'] = 60
+        sector_model_dict['retries'] = 2
+        sector_model_dict['retry_delay'] = 5
+        sector_model_dict['retry_timeouts'] = True
+        model = EmptySectorModel.from_dict(sector_model_dict)
+        assert model.timeout == 60
+        assert model.retries == 2
+        assert model.retry_delay == 5
+        assert model.retry_timeouts
+
+        actual = model.as_dict()
+        assert actual['timeout'] == 60
+        assert actual['retries'] == 2
+        assert actual['retry_delay'] == 5
+        assert actual['retry_timeouts']
+
     def test_add_input(self, empty_sector_model):
         """Add an input spec
         """